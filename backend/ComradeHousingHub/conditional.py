@@ -0,0 +1,108 @@
+"""
+Conditional GETs for catalog endpoints, driven by named change counters.
+
+A counter ("apartments", "universities") is a row of
+apartments.models.ChangeCounter: a version plus the time it last moved.
+It lives in the database so every worker process and every management
+command reads and moves the same value. Writes bump it once their
+transaction commits: signals for model saves and deletes, and explicit
+calls after bulk updates that bypass them. ConditionalGetMixin derives
+ETag and Last-Modified from the counters alone. A matching If-None-Match
+or If-Modified-Since therefore gets a 304 after one primary-key lookup,
+before the viewset runs its own queries or a serializer.
+
+A new counter starts from the current time in microseconds, never from
+1, so a fresh database cannot repeat an ETag handed out before it. Each
+bump moves the timestamp forward by at least a second, so Last-Modified
+(whole seconds) changes with every version.
+"""
+import time
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def _counter_model():
+    from apartments.models import ChangeCounter
+
+    return ChangeCounter
+
+
+def _create(name):
+    now = time.time()
+    counter, _ = _counter_model().objects.get_or_create(
+        name=name, defaults={"version": int(now * 1_000_000), "modified": now},
+    )
+    return counter.version, counter.modified
+
+
+def change_counters(names, request=None):
+    """{name: (version, last-modified timestamp)}, read in one query and at most once per request."""
+    known = getattr(request, "_change_counters", {})
+    missing = [name for name in names if name not in known]
+    if missing:
+        rows = _counter_model().objects.filter(name__in=missing).values_list("name", "version", "modified")
+        known = {**known, **{name: (version, modified) for name, version, modified in rows}}
+        for name in missing:
+            if name not in known:
+                known[name] = _create(name)
+        if request is not None:
+            request._change_counters = known
+    return {name: known[name] for name in names}
+
+
+def change_counter(name):
+    """(version, last-modified timestamp) of a change counter."""
+    return change_counters([name])[name]
+
+
+def _bump(names):
+    ChangeCounter, now = _counter_model(), time.time()
+    for name in names:
+        updated = ChangeCounter.objects.filter(name=name).update(
+            version=F("version") + 1, modified=Greatest(Value(now), F("modified") + 1),
+        )
+        if not updated:
+            _create(name)
+
+
+def bump_change_counters(*names):
+    """Advance the named counters once the current transaction commits."""
+    transaction.on_commit(lambda: _bump(names))
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified validators for list and retrieve, built from the
+    viewset's `change_counters` and the requesting user (querysets differ
+    per user). Responses are marked no-cache, so clients revalidate every
+    time and get a 304 while nothing has changed.
+    """
+    change_counters = ()
+
+    def get_validators(self, request):
+        counters = change_counters(self.change_counters, request)
+        user = f"u{request.user.pk}" if request.user.is_authenticated else "anon"
+        tag = "-".join([*(f"{name}{version}" for name, (version, _) in counters.items()), user])
+        return quote_etag(tag), int(max(modified for _, modified in counters.values()))
+
+    def conditional_response(self, request, respond, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            response["Cache-Control"] = "no-cache"
+            patch_vary_headers(response, ["Authorization"])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
@@ -0,0 +1,140 @@
+"""
+Media file serving with byte ranges and conditional GETs.
+
+Full responses are FileResponses, which WSGI servers hand to
+wsgi.file_wrapper (sendfile on gunicorn/uWSGI). Setting
+MEDIA_ACCEL_REDIRECT_PREFIX (e.g. "/protected-media/") instead returns an
+empty response with X-Accel-Redirect, so an nginx `internal` location
+serves the bytes, ranges included.
+
+Content-addressed paths (MEDIA_IMMUTABLE_PREFIXES) are cached for a year;
+everything else for MEDIA_MAX_AGE seconds and then revalidated with the
+ETag / Last-Modified validators.
+"""
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+MEDIA_IMMUTABLE_PREFIXES = getattr(settings, "MEDIA_IMMUTABLE_PREFIXES", ("apartments/images/",))
+MEDIA_MAX_AGE = getattr(settings, "MEDIA_MAX_AGE", 60 * 60)
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+RANGE_BLOCK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """File-like view of `length` bytes from `start`; read() stops at the end of the range."""
+
+    def __init__(self, file, start, length):
+        self.file, self.remaining = file, length
+        file.seek(start)
+
+    def read(self, size=RANGE_BLOCK_SIZE):
+        if self.remaining <= 0:
+            return b""
+        data = self.file.read(min(size if size and size > 0 else self.remaining, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Inclusive (start, end) of a single 'bytes=' range, or None to ignore the
+    header. Raises ValueError for an unsatisfiable range.
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None  # absent, malformed or multi-range: serve the whole file
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+def _if_range_matches(request, etag, mtime):
+    condition = request.headers.get("If-Range")
+    if condition is None:
+        return True
+    if condition.startswith(('"', "W/")):
+        return condition == etag
+    since = parse_http_date_safe(condition)
+    return since is not None and int(mtime) <= since
+
+
+def _cache_headers(response, path, etag, mtime):
+    response["ETag"] = etag
+    response["Last-Modified"] = formatdate(mtime, usegmt=True)
+    response["Accept-Ranges"] = "bytes"
+    if path.startswith(MEDIA_IMMUTABLE_PREFIXES):
+        response["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        response["Cache-Control"] = f"public, max-age={MEDIA_MAX_AGE}"
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (OSError, SuspiciousFileOperation):
+        raise Http404("Media file not found.")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found.")
+
+    size, mtime = stat.st_size, stat.st_mtime
+    etag = quote_etag(f"{stat.st_mtime_ns:x}-{size:x}")
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(mtime))
+    if not_modified is not None:
+        if isinstance(not_modified, HttpResponseNotModified):
+            _cache_headers(not_modified, path, etag, mtime)
+        return not_modified
+
+    accel_prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", None)
+    if accel_prefix:
+        response = HttpResponse(content_type=mimetypes.guess_type(full_path)[0] or "application/octet-stream")
+        response["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + path
+        return _cache_headers(response, path, etag, mtime)
+
+    byte_range = None
+    if request.headers.get("Range") and _if_range_matches(request, etag, mtime):
+        try:
+            byte_range = parse_range(request.headers["Range"], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return _cache_headers(response, path, etag, mtime)
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, "rb"))
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(RangeFile(open(full_path, "rb"), start, length), status=206)
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Type"] = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    return _cache_headers(response, path, etag, mtime)
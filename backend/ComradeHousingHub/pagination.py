@@ -0,0 +1,137 @@
+# ComradeHousingHub/pagination.py
+"""
+Opt-in keyset (cursor) pagination.
+
+Views using KeysetOrPageNumberPagination keep the default
+?page=N behaviour. Adding ?cursor= (empty for the first page) switches
+to keyset pagination: rows are ordered by the view's `keyset_ordering`
+(default newest first by created_at, id) and each page continues after
+the last row of the previous one. That avoids OFFSET scans and the
+COUNT(*) query on deep pages.
+
+The keyset order is fixed, so ?cursor= cannot be combined with parameters
+that choose another order (?ordering=, ?q= relevance); such requests get a 400.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class KeysetPagination:
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, ordering, page_size):
+        self.ordering = ordering
+        self.page_size = page_size
+
+    # -- cursor encoding ------------------------------------------------
+    @staticmethod
+    def encode_cursor(values):
+        payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        decoded = []
+        for field, value in zip(self._fields(), values):
+            if field.endswith("created_at"):
+                value = parse_datetime(value) if isinstance(value, str) else None
+            elif not isinstance(value, int):
+                value = None
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            decoded.append(value)
+        return decoded
+
+    # -- paging ---------------------------------------------------------
+    def _fields(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def _after(self, values):
+        """Q matching rows strictly after `values` in keyset order."""
+        condition = Q()
+        for i, (field, value) in enumerate(zip(self.ordering, values)):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            equal = {f: v for f, v in zip(self._fields()[:i], values[:i])}
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+        return condition
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor = None
+        if self.has_next:
+            last = rows[-1]
+            self.next_cursor = self.encode_cursor([getattr(last, f) for f in self._fields()])
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, "page")
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+
+class KeysetOrPageNumberPagination(PageNumberPagination):
+    """PageNumberPagination unless the request carries ?cursor=, then keyset pagination."""
+    default_keyset_ordering = ("-created_at", "-id")
+    # Parameters that order the results themselves (OrderingFilter, FullTextSearchFilter relevance)
+    ordering_params = ("ordering", "q")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if KeysetPagination.cursor_query_param in request.query_params:
+            conflicting = [name for name in self.ordering_params if request.query_params.get(name, "").strip()]
+            if conflicting:
+                raise ValidationError({
+                    KeysetPagination.cursor_query_param:
+                        f"cannot be combined with {', '.join(f'?{name}=' for name in conflicting)}; "
+                        "cursor pages keep a fixed order.",
+                })
+            ordering = getattr(view, "keyset_ordering", self.default_keyset_ordering)
+            self.keyset = KeysetPagination(ordering, self.page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
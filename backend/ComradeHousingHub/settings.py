@@ -19,6 +19,14 @@ import os
 BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Part files of in-progress chunked video uploads (not served)
+CHUNKED_UPLOAD_DIR = os.path.join(BASE_DIR, 'chunked_uploads')
+# Size and magic-byte checks on image/video uploads while the body streams in
+FILE_UPLOAD_HANDLERS = [
+    'apartments.upload_handlers.ValidatingUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
 
 
 # Quick-start development settings - unsuitable for production
@@ -119,6 +127,32 @@ DATABASES = {
 }
 
 
+# Caches
+# 'catalog' holds the anonymous apartment list cache (apartments.listing_cache).
+# Its keys carry the "apartments" change counter, a database row
+# (ComradeHousingHub.conditional), so no backend serves a page older than the last write.
+# 'locmem' only suits a single process (runserver, one worker): every worker fills its
+# own copy and only coalesces its own concurrent misses. Use 'file' when several worker
+# processes share a host.
+CATALOG_CACHE_BACKEND = 'locmem'
+_CATALOG_CACHE_BACKENDS = {
+    'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'catalog'},
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'catalog'),
+    },
+}
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'catalog': {
+        **_CATALOG_CACHE_BACKENDS[CATALOG_CACHE_BACKEND],
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.db import models
-from .models import Apartment, ApartmentImage, Room, RoomVideo
+from .models import Apartment, ApartmentImage, LandlordSummary, Room, RoomVideo
 
 
 # ------------------ INLINES ------------------
@@ -29,7 +29,7 @@ class ApartmentAdmin(admin.ModelAdmin):
         "average_rent",
         "is_approved",
         "created_at",
-        "distance_from_university",  # shows km if lat/lon + university coords exist
+        "distance_km",  # stored km from university (empty without coordinates)
     )
     list_filter = ("university", "is_approved", "created_at")
     search_fields = (
@@ -85,3 +85,19 @@ class RoomAdmin(admin.ModelAdmin):
 class RoomVideoAdmin(admin.ModelAdmin):
     list_display = ("apartment", "room_type")
     search_fields = ("apartment__name", "room_type")
+
+
+@admin.register(LandlordSummary)
+class LandlordSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        "landlord",
+        "apartment_count",
+        "room_count",
+        "pending_booking_count",
+        "confirmed_booking_count",
+        "total_earnings",
+        "updated_at",
+    )
+    search_fields = ("landlord__user__username",)
+    # maintained by signals; repair with `manage.py rebuild_landlord_summaries`
+    readonly_fields = list_display
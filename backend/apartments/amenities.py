@@ -0,0 +1,120 @@
+# apartments/amenities.py
+"""
+Canonical amenity vocabulary and the per-apartment bitmask built from it.
+
+Apartment.amenities stays a free-form list for display; Apartment.amenity_mask
+holds one bit per canonical amenity so "WiFi AND water AND parking" is a
+single integer predicate.
+"""
+import json
+import re
+
+from django.db.models import Count, F, Q
+
+# (code, label, aliases). The position in this list is the bit number:
+# only ever append, never reorder or remove, or stored masks change meaning.
+AMENITIES = [
+    ("wifi", "WiFi", ("wifi", "wi fi", "internet", "wireless internet")),
+    ("water", "Water", ("water", "running water", "borehole", "borehole water")),
+    ("electricity", "Electricity", ("electricity", "power", "tokens")),
+    ("parking", "Parking", ("parking", "car park", "parking space")),
+    ("security", "Security", ("security", "guard", "guards", "watchman", "gated", "24hr security")),
+    ("cctv", "CCTV", ("cctv", "cameras", "security cameras")),
+    ("laundry", "Laundry", ("laundry", "washing area", "washing machine")),
+    ("furnished", "Furnished", ("furnished", "furniture")),
+    ("hot_shower", "Hot shower", ("hot shower", "hot water", "water heater", "instant shower")),
+    ("kitchen", "Kitchen", ("kitchen", "shared kitchen")),
+    ("generator", "Backup generator", ("generator", "backup generator", "backup power")),
+    ("gym", "Gym", ("gym", "fitness")),
+    ("study_room", "Study room", ("study room", "reading room", "study area")),
+    ("dstv", "DSTV", ("dstv", "tv", "cable tv")),
+]
+
+AMENITY_BITS = {code: 1 << position for position, (code, _, _) in enumerate(AMENITIES)}
+AMENITY_LABELS = {code: label for code, label, _ in AMENITIES}
+_ALIASES = {
+    alias: code
+    for code, label, aliases in AMENITIES
+    for alias in (code.replace("_", " "), label.lower(), *aliases)
+}
+
+
+def _normalize(text):
+    return " ".join(re.findall(r"[a-z0-9]+", str(text).lower()))
+
+
+def _as_list(amenities):
+    """Amenities may be stored as a list, a JSON-encoded list or a comma-separated string."""
+    if isinstance(amenities, str):
+        try:
+            amenities = json.loads(amenities)
+        except ValueError:
+            amenities = amenities.split(",")
+    if not isinstance(amenities, (list, tuple)):
+        return []
+    return amenities
+
+
+def canonical_amenity(text):
+    """Canonical code for a free-form amenity label, or None if it is not in the vocabulary."""
+    return _ALIASES.get(_normalize(text))
+
+
+def amenities_to_mask(amenities):
+    """Bitmask of the canonical amenities found in a free-form amenities value."""
+    mask = 0
+    for item in _as_list(amenities):
+        code = canonical_amenity(item)
+        if code:
+            mask |= AMENITY_BITS[code]
+    return mask
+
+
+def parse_amenity_codes(value):
+    """
+    Mask for a comma-separated list of amenity codes or labels
+    (e.g. "wifi,parking"). Raises ValueError naming unknown amenities.
+    """
+    mask, unknown = 0, []
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        code = canonical_amenity(part)
+        if code is None:
+            unknown.append(part.strip())
+        else:
+            mask |= AMENITY_BITS[code]
+    if unknown:
+        raise ValueError(f"Unknown amenities: {', '.join(unknown)}")
+    return mask
+
+
+def with_amenities(queryset, mask):
+    """Apartments that have every amenity in `mask`."""
+    if not mask:
+        return queryset
+    return queryset.alias(_amenity_match=F("amenity_mask").bitand(mask)).filter(_amenity_match=mask)
+
+
+def amenity_count_aggregates():
+    """(aliases, aggregates) counting apartments per amenity, for use in a larger aggregate()."""
+    aliases = {f"_has_{code}": F("amenity_mask").bitand(bit) for code, bit in AMENITY_BITS.items()}
+    aggregates = {
+        f"amenity_{code}": Count("pk", filter=Q(**{f"_has_{code}": bit}))
+        for code, bit in AMENITY_BITS.items()
+    }
+    return aliases, aggregates
+
+
+def amenity_facet_list(counts):
+    """[{"code", "label", "count"}, ...] from the result of amenity_count_aggregates()."""
+    return [
+        {"code": code, "label": AMENITY_LABELS[code], "count": counts[f"amenity_{code}"]}
+        for code in AMENITY_BITS
+    ]
+
+
+def amenity_facets(queryset):
+    """Per-amenity counts over `queryset`, in one aggregate query."""
+    aliases, aggregates = amenity_count_aggregates()
+    return amenity_facet_list(queryset.order_by().alias(**aliases).aggregate(**aggregates))
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    from django.db import connections
+    from .search import ensure_search_index
+
+    ensure_search_index(connections[using])
 
 
 class ApartmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apartments'
+
+    def ready(self):
+        import apartments.signals  # noqa: F401
+
+        post_migrate.connect(ensure_search_index, sender=self)
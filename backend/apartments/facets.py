@@ -0,0 +1,68 @@
+# apartments/facets.py
+from django.db.models import Count, Q
+
+from .amenities import amenity_count_aggregates, amenity_facet_list
+from .models import ROOM_TYPE_CHOICES, VACANT_COUNT_FIELDS
+
+# Starting-rent (min_rent) bands in Ksh: (key, label, lower bound inclusive, upper bound exclusive)
+RENT_BANDS = [
+    ("under_5k", "Under 5,000", None, 5000),
+    ("5k_10k", "5,000 - 9,999", 5000, 10000),
+    ("10k_15k", "10,000 - 14,999", 10000, 15000),
+    ("15k_20k", "15,000 - 19,999", 15000, 20000),
+    ("20k_plus", "20,000 and above", 20000, None),
+]
+
+
+def _rent_band_q(low, high):
+    q = Q(min_rent__isnull=False)
+    if low is not None:
+        q &= Q(min_rent__gte=low)
+    if high is not None:
+        q &= Q(min_rent__lt=high)
+    return q
+
+
+def apartment_facets(queryset):
+    """
+    Bucketed counts over an Apartment queryset: starting-rent band, room
+    types with vacancies, vacancy, university and amenities. Everything
+    is read from the denormalized columns, so this costs two queries
+    regardless of how many apartments match.
+    """
+    queryset = queryset.order_by()
+    amenity_aliases, amenity_aggregates = amenity_count_aggregates()
+
+    counts = queryset.alias(**amenity_aliases).aggregate(
+        **{f"rent_{key}": Count("pk", filter=_rent_band_q(low, high)) for key, _, low, high in RENT_BANDS},
+        **{
+            f"room_type_{room_type}": Count("pk", filter=Q(**{f"{field}__gt": 0}))
+            for room_type, field in VACANT_COUNT_FIELDS.items()
+        },
+        vacant=Count("pk", filter=Q(vacant_room_count__gt=0)),
+        full=Count("pk", filter=Q(vacant_room_count=0)),
+        **amenity_aggregates,
+    )
+
+    universities = (
+        queryset.values("university_id", "university__name")
+        .annotate(count=Count("pk"))
+        .order_by("-count", "university__name")
+    )
+
+    return {
+        "rent": [
+            {"key": key, "label": label, "min": low, "max": high, "count": counts[f"rent_{key}"]}
+            for key, label, low, high in RENT_BANDS
+        ],
+        "room_type": [
+            {"code": room_type, "label": label, "count": counts[f"room_type_{room_type}"]}
+            for room_type, label in ROOM_TYPE_CHOICES
+        ],
+        "vacancy": {"vacant": counts["vacant"], "full": counts["full"]},
+        "university": [
+            {"id": row["university_id"], "name": row["university__name"], "count": row["count"]}
+            for row in universities
+        ],
+        "amenities": amenity_facet_list(counts),
+    }
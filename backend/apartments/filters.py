@@ -0,0 +1,59 @@
+# apartments/filters.py
+import django_filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .amenities import parse_amenity_codes, with_amenities
+from .models import Apartment, ROOM_TYPE_CHOICES, VACANT_COUNT_FIELDS
+from .search import search_apartments
+
+
+class ApartmentFilter(django_filters.FilterSet):
+    """Query-string filters for the apartment list."""
+    max_distance_km = django_filters.NumberFilter(field_name="distance_km", lookup_expr="lte")
+    amenities = django_filters.CharFilter(method="filter_amenities")
+    # Rent filters match apartments whose [min_rent, max_rent] range overlaps the request
+    min_rent = django_filters.NumberFilter(field_name="max_rent", lookup_expr="gte")
+    max_rent = django_filters.NumberFilter(field_name="min_rent", lookup_expr="lte")
+    room_type = django_filters.ChoiceFilter(choices=ROOM_TYPE_CHOICES, method="filter_room_type")
+    vacant = django_filters.BooleanFilter(method="filter_vacant")
+
+    class Meta:
+        model = Apartment
+        fields = {
+            "university": ["exact"],
+            "is_approved": ["exact"],
+            "average_rating": ["gte", "lte"],
+            "review_count": ["gte"],
+        }
+
+    def filter_amenities(self, queryset, name, value):
+        """?amenities=wifi,parking keeps apartments that have all of them."""
+        try:
+            mask = parse_amenity_codes(value)
+        except ValueError as e:
+            raise ValidationError({"amenities": str(e)})
+        return with_amenities(queryset, mask)
+
+    def filter_room_type(self, queryset, name, value):
+        """?room_type=single keeps apartments with at least one vacant room of that type."""
+        return queryset.filter(**{f"{VACANT_COUNT_FIELDS[value]}__gt": 0})
+
+    def filter_vacant(self, queryset, name, value):
+        if value:
+            return queryset.filter(vacant_room_count__gt=0)
+        return queryset.filter(vacant_room_count=0)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    ?q= full-text search over name, address, description and amenities.
+    Results come back by relevance unless ?ordering= is also given.
+    """
+    search_param = "q"
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text:
+            return queryset
+        return search_apartments(queryset, text)
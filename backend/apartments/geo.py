@@ -0,0 +1,164 @@
+# apartments/geo.py
+"""Distance helpers and an in-memory grid index for location-based search."""
+import threading
+from collections import defaultdict
+from math import radians, sin, cos, sqrt, atan2, floor
+
+try:
+    import numpy as np
+except ImportError:  # vectorized paths fall back to pure Python
+    np = None
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in km."""
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+
+def haversine_many(lat, lon, lats, lons):
+    """Distances in km from one point to each of `lats`/`lons` (vectorized when NumPy is available)."""
+    if np is None:
+        return [haversine_km(lat, lon, la, lo) for la, lo in zip(lats, lons)]
+
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lons, dtype=float))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def haversine_matrix(origin_lats, origin_lons, dest_lats, dest_lons):
+    """len(origins) x len(destinations) distances in km (NumPy array, or nested lists without NumPy)."""
+    if np is None:
+        return [haversine_many(lat, lon, dest_lats, dest_lons) for lat, lon in zip(origin_lats, origin_lons)]
+
+    lat1 = np.radians(np.asarray(origin_lats, dtype=float))[:, None]
+    lon1 = np.radians(np.asarray(origin_lons, dtype=float))[:, None]
+    lat2 = np.radians(np.asarray(dest_lats, dtype=float))[None, :]
+    lon2 = np.radians(np.asarray(dest_lons, dtype=float))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def round_rows(matrix, ndigits=2):
+    """Rows of a distance matrix as plain lists of rounded floats, ready for JSON."""
+    if np is not None and isinstance(matrix, np.ndarray):
+        return np.round(matrix, ndigits).tolist()
+    return [[round(d, ndigits) for d in row] for row in matrix]
+
+
+def haversine_sql(lat, lon, lat_field="lat", lon_field="lon"):
+    """
+    Database expression for the distance in km (2 dp) between a fixed point
+    and the coordinates stored in `lat_field`/`lon_field`.
+    NULL coordinates yield NULL.
+    """
+    from django.db.models import F, FloatField, Value
+    from django.db.models.functions import ASin, Cos, Power, Radians, Round, Sin, Sqrt
+
+    lat1, lon1 = Value(radians(lat), output_field=FloatField()), Value(radians(lon), output_field=FloatField())
+    lat2, lon2 = Radians(F(lat_field)), Radians(F(lon_field))
+    a = Power(Sin((lat2 - lat1) / 2), 2) + Cos(lat1) * Cos(lat2) * Power(Sin((lon2 - lon1) / 2), 2)
+    return Round(2 * EARTH_RADIUS_KM * ASin(Sqrt(a)), 2)
+
+
+def bounding_box(lat, lon, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) enclosing a circle of `radius_km` around a point."""
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = cos(radians(lat))
+    d_lon = 180 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180)
+    return max(lat - d_lat, -90), min(lat + d_lat, 90), lon - d_lon, lon + d_lon
+
+
+class GridIndex:
+    """
+    Buckets points into fixed-size lat/lon cells so a radius query only
+    has to look at the cells overlapping its bounding box.
+    Keys are arbitrary hashables (apartment ids).
+    """
+
+    def __init__(self, cell_size_deg=0.05):
+        self.cell_size_deg = cell_size_deg  # ~5.5 km at the equator
+        self._cells = defaultdict(set)
+        self._points = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def _cell(self, lat, lon):
+        return floor(lat / self.cell_size_deg), floor(lon / self.cell_size_deg)
+
+    def upsert(self, key, lat, lon):
+        with self._lock:
+            self.discard(key)
+            self._points[key] = (lat, lon)
+            self._cells[self._cell(lat, lon)].add(key)
+
+    def discard(self, key):
+        with self._lock:
+            point = self._points.pop(key, None)
+            if point is None:
+                return
+            cell = self._cell(*point)
+            self._cells[cell].discard(key)
+            if not self._cells[cell]:
+                del self._cells[cell]
+
+    def replace_all(self, points):
+        """Rebuild the index from an iterable of (key, lat, lon)."""
+        cells, stored = defaultdict(set), {}
+        for key, lat, lon in points:
+            stored[key] = (lat, lon)
+            cells[self._cell(lat, lon)].add(key)
+        with self._lock:
+            self._cells, self._points = cells, stored
+
+    def _candidates(self, min_lat, max_lat, min_lon, max_lon):
+        lat_lo, lon_lo = self._cell(min_lat, min_lon)
+        lat_hi, lon_hi = self._cell(max_lat, max_lon)
+        n_cells = (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1)
+
+        if n_cells > len(self._cells):
+            # Huge radius: cheaper to walk the occupied cells than the box
+            return [
+                key for (c_lat, c_lon), keys in self._cells.items()
+                if lat_lo <= c_lat <= lat_hi and lon_lo <= c_lon <= lon_hi
+                for key in keys
+            ]
+        keys = []
+        for c_lat in range(lat_lo, lat_hi + 1):
+            for c_lon in range(lon_lo, lon_hi + 1):
+                keys.extend(self._cells.get((c_lat, c_lon), ()))
+        return keys
+
+    def nearby(self, lat, lon, radius_km, limit=None):
+        """[(key, distance_km), ...] within `radius_km` of the point, closest first."""
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        with self._lock:
+            keys = self._candidates(min_lat, max_lat, min_lon, max_lon)
+            points = [self._points[key] for key in keys]
+        if not keys:
+            return []
+
+        distances = haversine_many(lat, lon, [p[0] for p in points], [p[1] for p in points])
+
+        if np is not None:
+            inside = np.flatnonzero(distances <= radius_km)
+            order = inside[np.argsort(distances[inside], kind="stable")]
+            if limit is not None:
+                order = order[:limit]
+            return [(keys[i], float(distances[i])) for i in order]
+
+        hits = sorted(
+            ((key, d) for key, d in zip(keys, distances) if d <= radius_km),
+            key=lambda hit: hit[1],
+        )
+        return hits[:limit] if limit is not None else hits
@@ -0,0 +1,142 @@
+# apartments/images.py
+"""
+Cover image storage keyed by content hash, plus responsive variants.
+
+Originals live at apartments/images/<h[:2]>/<hash><ext>, so uploading the
+same photo twice stores it once. Variants are resized copies at
+VARIANT_WIDTHS in WebP and JPEG, stored next to the original as
+<hash>/<width>w.<format>. They are built after the upload's transaction
+commits, on a small worker pool, and recorded on every ApartmentImage
+row with that hash.
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from ComradeHousingHub.conditional import bump_change_counters
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (320, 640, 1024)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True}),
+}
+HASH_CHUNK_SIZE = 64 * 1024
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-variants")
+
+
+def content_hash(file):
+    """SHA-256 hex digest of a file's contents (the file is rewound afterwards)."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_image_name(digest, filename):
+    ext = os.path.splitext(filename)[1].lower().replace(".jpeg", ".jpg")
+    return f"apartments/images/{digest[:2]}/{digest}{ext}"
+
+
+def variant_name(original_name, width, fmt):
+    return f"{os.path.splitext(original_name)[0]}/{width}w.{'jpg' if fmt == 'jpeg' else fmt}"
+
+
+def _encode(image, fmt):
+    pil_format, options = VARIANT_FORMATS[fmt]
+    if pil_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_variants(image_field):
+    """
+    Write the missing variants of a stored original; returns {format: {width: name}}.
+    Widths at or above the original's are skipped; the original covers them.
+    """
+    storage, name = image_field.storage, image_field.name
+    with storage.open(name, "rb") as original:
+        source = ImageOps.exif_transpose(Image.open(original))
+        source.load()
+    if source.mode not in ("RGB", "RGBA"):
+        source = source.convert("RGBA" if "transparency" in source.info else "RGB")
+
+    variants = {fmt: {} for fmt in VARIANT_FORMATS}
+    for width in VARIANT_WIDTHS:
+        if width >= source.width:
+            break
+        resized = None
+        for fmt in VARIANT_FORMATS:
+            target = variant_name(name, width, fmt)
+            if not storage.exists(target):
+                if resized is None:
+                    height = round(source.height * width / source.width)
+                    resized = source.resize((width, height), Image.LANCZOS)
+                storage.save(target, _encode(resized, fmt))
+            variants[fmt][str(width)] = target
+    return variants
+
+
+def build_variants(image_id):
+    """Generate variants for one ApartmentImage and store them on all rows sharing its content."""
+    from .models import ApartmentImage
+
+    image = ApartmentImage.objects.filter(pk=image_id).first()
+    if image is None or not image.image:
+        return None
+    variants = generate_variants(image.image)
+    rows = ApartmentImage.objects.filter(pk=image.pk)
+    if image.content_hash:
+        rows = ApartmentImage.objects.filter(content_hash=image.content_hash)
+    # queryset.update() so ApartmentImage.save() does not schedule another build
+    rows.update(variants=variants)
+    bump_change_counters("apartments")  # cover_srcset changed
+    return variants
+
+
+def _build_in_background(image_id):
+    try:
+        build_variants(image_id)
+    except Exception:
+        logger.exception("Building variants for apartment image %s failed", image_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(image_id):
+    """Build variants off the request thread once the current transaction commits."""
+    transaction.on_commit(lambda: _executor.submit(_build_in_background, image_id))
+
+
+def srcset(image, fmt, build_url=lambda url: url):
+    """'<url> 320w, <url> 640w, <original> <width>w' for a stored ApartmentImage, or None."""
+    widths = (image.variants or {}).get(fmt)
+    if not widths:
+        return None
+    storage = image.image.storage
+    candidates = [
+        f"{build_url(storage.url(name))} {width}w"
+        for width, name in sorted(widths.items(), key=lambda item: int(item[0]))
+    ]
+    if image.width:
+        candidates.append(f"{build_url(image.image.url)} {image.width}w")
+    return ", ".join(candidates)
+
+
+def srcsets(image, request=None):
+    """{"webp": srcset, "jpeg": srcset} for <picture> sources, or None before variants exist."""
+    build_url = request.build_absolute_uri if request else (lambda url: url)
+    sets = {fmt: srcset(image, fmt, build_url) for fmt in VARIANT_FORMATS}
+    return sets if any(sets.values()) else None
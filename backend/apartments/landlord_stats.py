@@ -0,0 +1,112 @@
+# apartments/landlord_stats.py
+"""
+Landlord dashboard data: totals plus one row per apartment.
+
+Totals are a primary-key lookup of the landlord's LandlordSummary. Rows
+are one page of apartments, then one grouped query per related model
+(room rents, bookings, payments) restricted to that page, plus a
+prefetch for videos.
+
+Results are cached per landlord and page, keyed by the landlord's
+"landlord-stats:<id>" change counter (see ComradeHousingHub.conditional).
+The counter is a database row, so a write in any worker moves it for
+every process: landlord_summary bumps it with every summary change, and
+apartments.signals for row-only edits (names, rents, images, videos).
+A cache hit costs the one counter lookup.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q, Sum
+
+from ComradeHousingHub.conditional import change_counter
+from bookings.models import Booking
+from payments.models import Payment
+from .landlord_summary import get_landlord_summary, landlord_stats_counter
+from .models import Apartment, Room
+
+CACHE_TIMEOUT = 60 * 15
+
+
+def _grouped(queryset, apartment_path, apartment_ids, **aggregates):
+    """{apartment_id: {name: value}} for one grouped query over the given apartments."""
+    rows = (
+        queryset.filter(**{f"{apartment_path}__in": apartment_ids})
+        .values(apartment_path).annotate(**aggregates).order_by()
+    )
+    return {row.pop(apartment_path): row for row in rows}
+
+
+def apartment_figures(apartment_ids):
+    """{apartment_id: {average_rent, pending_bookings, confirmed_bookings, earnings}}"""
+    rents = _grouped(Room.objects, "apartment_id", apartment_ids, average_rent=Avg("monthly_rent"))
+    bookings = _grouped(
+        Booking.objects, "room__apartment_id", apartment_ids,
+        pending_bookings=Count("pk", filter=Q(status="PENDING")),
+        confirmed_bookings=Count("pk", filter=Q(status="CONFIRMED")),
+    )
+    earnings = _grouped(Payment.objects, "booking__room__apartment_id", apartment_ids, earnings=Sum("amount"))
+    return {
+        apartment_id: {
+            "average_rent": rents.get(apartment_id, {}).get("average_rent") or 0,
+            "pending_bookings": bookings.get(apartment_id, {}).get("pending_bookings", 0),
+            "confirmed_bookings": bookings.get(apartment_id, {}).get("confirmed_bookings", 0),
+            "earnings": earnings.get(apartment_id, {}).get("earnings") or Decimal(0),
+        }
+        for apartment_id in apartment_ids
+    }
+
+
+def build_landlord_stats(landlord, offset, limit):
+    summary = get_landlord_summary(landlord.pk)
+
+    page = list(
+        Apartment.objects.filter(landlord=landlord).select_related("university", "image")
+        .prefetch_related("videos")
+        .order_by("-created_at", "-id")[offset:offset + limit]
+    )
+    figures = apartment_figures([apt.id for apt in page]) if page else {}
+
+    rows = []
+    for apt in page:
+        try:
+            cover_image_url = apt.image.image.url
+        except Apartment.image.RelatedObjectDoesNotExist:
+            cover_image_url = None
+        rows.append({
+            "id": apt.id,
+            "name": apt.name,
+            "description": apt.description,
+            "university": apt.university.name,
+            "average_rent": float(figures[apt.id]["average_rent"]),
+            "address": apt.address,
+            "is_approved": apt.is_approved,
+            "distance_km": apt.distance_km,
+            "amenities": apt.amenities,
+            "cover_image": cover_image_url,
+            "videos": [vid.video.url for vid in apt.videos.all()],
+            "created_at": apt.created_at,
+            "rooms_count": apt.room_count,
+            "pending_bookings": figures[apt.id]["pending_bookings"],
+            "confirmed_bookings": figures[apt.id]["confirmed_bookings"],
+            "earnings": figures[apt.id]["earnings"],
+        })
+
+    return {
+        "apartments": rows,
+        "totalApartments": summary.apartment_count,
+        "totalRooms": summary.room_count,
+        "pendingBookings": summary.pending_booking_count,
+        "confirmedBookings": summary.confirmed_booking_count,
+        "totalEarnings": summary.total_earnings,
+    }
+
+
+def get_landlord_stats(landlord, offset, limit):
+    version, _ = change_counter(landlord_stats_counter(landlord.pk))
+    key = f"landlord-stats:{landlord.pk}:v{version}:{offset}:{limit}"
+    data = cache.get(key)
+    if data is None:
+        data = build_landlord_stats(landlord, offset, limit)
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,146 @@
+# apartments/landlord_summary.py
+"""
+Maintenance of the LandlordSummary read model.
+
+Signals apply O(1) deltas with apply_summary_change. Anything a delta
+cannot express, such as an apartment changing landlord, rebuilds the
+affected rows with rebuild_landlord_summaries. The same function is the
+reconciliation pass run by `manage.py rebuild_landlord_summaries`.
+Both bump the landlord's dashboard counter (invalidate_landlord_stats)
+whenever a summary actually changes.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from ComradeHousingHub.conditional import bump_change_counters
+from accounts.models import Profile
+from .models import Apartment, LandlordSummary, Room
+
+SUMMARY_FIELDS = [
+    "apartment_count", "room_count", "pending_booking_count", "confirmed_booking_count", "total_earnings",
+]
+BOOKING_COUNT_FIELDS = {"PENDING": "pending_booking_count", "CONFIRMED": "confirmed_booking_count"}
+
+
+def landlord_of_apartment(apartment_id):
+    return Apartment.objects.filter(pk=apartment_id).values_list("landlord_id", flat=True).first()
+
+
+def landlord_of_room(room_id):
+    return Apartment.objects.filter(rooms=room_id).values_list("landlord_id", flat=True).first()
+
+
+def landlord_of_booking(booking_id):
+    return Apartment.objects.filter(rooms__bookings=booking_id).values_list("landlord_id", flat=True).first()
+
+
+def landlord_stats_counter(landlord_id):
+    """Name of the change counter that versions a landlord's cached dashboard pages."""
+    return f"landlord-stats:{landlord_id}"
+
+
+def invalidate_landlord_stats(*landlord_ids):
+    """Make every cached dashboard page of these landlords stale, once the transaction commits."""
+    names = {landlord_stats_counter(landlord_id) for landlord_id in landlord_ids if landlord_id is not None}
+    if names:
+        bump_change_counters(*sorted(names))
+
+
+def apply_summary_change(landlord_id, create=True, **deltas):
+    """
+    Add deltas to a landlord's summary, e.g. room_count=1 or total_earnings=-amount.
+    A landlord without a summary row gets one computed from scratch, unless
+    create is False (deletes may be part of deleting the landlord itself).
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if landlord_id is None or not deltas:
+        return
+    updated = LandlordSummary.objects.filter(pk=landlord_id).update(
+        updated_at=timezone.now(), **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if updated:
+        invalidate_landlord_stats(landlord_id)
+    elif create:
+        rebuild_landlord_summaries([landlord_id])
+
+
+def get_landlord_summary(landlord_id):
+    summary = LandlordSummary.objects.filter(pk=landlord_id).first()
+    if summary is None:
+        rebuild_landlord_summaries([landlord_id])
+        summary = LandlordSummary.objects.get(pk=landlord_id)
+    return summary
+
+
+def compute_landlord_summaries(landlord_ids=None):
+    """{landlord_id: {field: value}} from the raw tables, one grouped query per field group."""
+    from bookings.models import Booking
+    from payments.models import Payment
+
+    def grouped(queryset, landlord_path, *extra, aggregate):
+        if landlord_ids is not None:
+            queryset = queryset.filter(**{f"{landlord_path}__in": landlord_ids})
+        return queryset.values_list(landlord_path, *extra).annotate(value=aggregate).order_by()
+
+    computed = defaultdict(dict)
+    for landlord_id, n in grouped(Apartment.objects, "landlord", aggregate=Count("id")):
+        computed[landlord_id]["apartment_count"] = n
+    for landlord_id, n in grouped(Room.objects, "apartment__landlord", aggregate=Count("id")):
+        computed[landlord_id]["room_count"] = n
+    bookings = Booking.objects.filter(status__in=BOOKING_COUNT_FIELDS)
+    for landlord_id, status, n in grouped(bookings, "room__apartment__landlord", "status", aggregate=Count("id")):
+        computed[landlord_id][BOOKING_COUNT_FIELDS[status]] = n
+    for landlord_id, total in grouped(Payment.objects, "booking__room__apartment__landlord", aggregate=Sum("amount")):
+        computed[landlord_id]["total_earnings"] = total
+    return computed
+
+
+def rebuild_landlord_summaries(landlord_ids=None, dry_run=False, batch_size=500):
+    """
+    Recompute summaries from scratch and store the ones that drifted.
+    landlord_ids=None covers every landlord with apartments or a stored summary.
+    Returns {landlord_id: {field: (stored, actual)}}, where stored is None for
+    a missing row.
+    """
+    computed = compute_landlord_summaries(landlord_ids)
+
+    existing = LandlordSummary.objects.all()
+    if landlord_ids is None:
+        ids = set(computed)
+    else:
+        existing = existing.filter(pk__in=landlord_ids)
+        ids = set(Profile.objects.filter(pk__in=landlord_ids).values_list("pk", flat=True))
+    existing = {summary.pk: summary for summary in existing}
+    ids |= set(existing)
+
+    drift, to_create, to_update = {}, [], []
+    now = timezone.now()
+    for landlord_id in sorted(ids):
+        values = {field: 0 for field in SUMMARY_FIELDS} | computed.get(landlord_id, {})
+        values["total_earnings"] = Decimal(values["total_earnings"])
+        summary = existing.get(landlord_id)
+        if summary is None:
+            drift[landlord_id] = {field: (None, value) for field, value in values.items()}
+            to_create.append(LandlordSummary(landlord_id=landlord_id, **values))
+            continue
+        changed = {
+            field: (getattr(summary, field), value)
+            for field, value in values.items() if getattr(summary, field) != value
+        }
+        if changed:
+            drift[landlord_id] = changed
+            for field, value in values.items():
+                setattr(summary, field, value)
+            summary.updated_at = now
+            to_update.append(summary)
+
+    if not dry_run:
+        with transaction.atomic():
+            LandlordSummary.objects.bulk_create(to_create, batch_size=batch_size, ignore_conflicts=True)
+            LandlordSummary.objects.bulk_update(to_update, [*SUMMARY_FIELDS, "updated_at"], batch_size=batch_size)
+        invalidate_landlord_stats(*drift)
+    return drift
@@ -0,0 +1,166 @@
+# apartments/listing_cache.py
+"""
+Response cache for anonymous apartment listings.
+
+Anonymous visitors all see the same approved apartments, so a list page
+depends only on its query parameters. Pages are stored in the "catalog"
+cache (settings.CATALOG_CACHE_BACKEND: local memory or files), keyed by
+the normalised parameters and the "apartments" change counter (see
+ComradeHousingHub.conditional). The counter is a database row, so a write
+made by any worker or management command moves it for every process: any
+apartment, room, image, video or review write, and the bulk paths that
+skip signals. Old entries are then never read again and simply expire.
+
+A miss is computed once. Concurrent requests for the same key in this
+process wait on a per-key lock. Processes sharing a file backend wait
+(best effort) on a short lease in the cache, then read the fresh entry.
+
+Hit/miss counts are kept per process; see get_listing_cache_stats().
+
+Requests running inside a transaction neither read nor fill the cache,
+because they may see their own uncommitted writes.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.db import connection
+from rest_framework.response import Response
+
+from ComradeHousingHub.conditional import change_counters
+from .filters import ApartmentFilter
+
+CACHE_ALIAS = "catalog"
+LEASE_TIMEOUT = 10  # seconds a recomputation may hold the lease
+LEASE_WAIT = 2.0  # seconds a waiter polls before computing the page itself
+LEASE_POLL = 0.05
+
+# Parameters that change a list response; others (cache busters, tracking tags) are left out of the key
+LISTING_PARAMS = {
+    *ApartmentFilter.base_filters, "search", "q", "ordering", "page", "page_size", "cursor", "fields", "expand",
+}
+# Comma-separated parameters whose order does not matter
+UNORDERED_PARAMS = {"fields", "expand", "amenities"}
+
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def listing_cache_key(request, version):
+    params = []
+    for name, values in request.query_params.lists():
+        if name not in LISTING_PARAMS:
+            continue
+        for value in values:
+            value = value.strip()
+            if name in UNORDERED_PARAMS:
+                value = ",".join(sorted({part.strip() for part in value.split(",") if part.strip()}))
+            if value:
+                params.append((name, value))
+    # the host is part of the key because pagination links are absolute
+    digest = hashlib.sha256(f"{request.get_host()}?{urlencode(sorted(params))}".encode()).hexdigest()
+    return f"apartment-list:v{version}:{digest[:32]}"
+
+
+@contextmanager
+def _key_lock(key):
+    """Per-key lock, dropped once nobody holds or waits for it."""
+    with _key_locks_guard:
+        lock, users = _key_locks.get(key, (None, 0))
+        lock = lock or threading.Lock()
+        _key_locks[key] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _key_locks_guard:
+            lock, users = _key_locks[key]
+            if users == 1:
+                del _key_locks[key]
+            else:
+                _key_locks[key] = (lock, users - 1)
+
+
+def _record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def cached_page(key, compute):
+    """(data, "HIT" or "MISS") for `key`, calling compute() at most once per key at a time."""
+    cache = caches[CACHE_ALIAS]
+    data = cache.get(key)
+    if data is not None:
+        _record("hits")
+        return data, "HIT"
+
+    with _key_lock(key):
+        data = cache.get(key)
+        if data is not None:
+            _record("coalesced")  # another thread computed it while we waited
+            return data, "HIT"
+
+        lease = f"{key}:lease"
+        leased = cache.add(lease, 1, timeout=LEASE_TIMEOUT)
+        if not leased:  # another process is computing it
+            deadline = time.monotonic() + LEASE_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(LEASE_POLL)
+                data = cache.get(key)
+                if data is not None:
+                    _record("coalesced")
+                    return data, "HIT"
+        try:
+            data = compute()
+            cache.set(key, data)
+        finally:
+            if leased:
+                cache.delete(lease)
+        _record("misses")
+        return data, "MISS"
+
+
+def get_listing_cache_stats():
+    """Hit/miss counts of this process; coalesced requests waited for another's result."""
+    with _stats_lock:
+        hits, coalesced, misses = _stats["hits"], _stats["coalesced"], _stats["misses"]
+    total = hits + coalesced + misses
+    return {
+        "hits": hits,
+        "coalesced": coalesced,
+        "misses": misses,
+        "hit_rate": round((hits + coalesced) / total, 4) if total else None,
+        "backend": caches[CACHE_ALIAS].__class__.__name__,
+    }
+
+
+def reset_listing_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class ListingCacheMixin:
+    """Serve anonymous list requests from the listing cache (X-Cache: HIT/MISS)."""
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated or connection.in_atomic_block:
+            return super().list(request, *args, **kwargs)
+
+        computed = []
+
+        def compute():
+            response = super(ListingCacheMixin, self).list(request, *args, **kwargs)
+            computed.append(response)
+            return response.data
+
+        key = listing_cache_key(request, change_counters(["apartments"], request)["apartments"][0])
+        data, status = cached_page(key, compute)
+        response = computed[0] if computed else Response(data)
+        response["X-Cache"] = status
+        return response
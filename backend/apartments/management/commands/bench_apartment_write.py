@@ -0,0 +1,83 @@
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import Profile
+from apartments.models import Apartment, Room
+from apartments.serializers import ApartmentWriteSerializer
+from universities.models import University
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ApartmentWriteSerializer create/update for large apartment blocks "
+        "against per-room writes (runs in a rolled-back transaction)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, nargs="+", default=[20, 200, 1000], help="Rooms per apartment")
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            self.university = University.objects.create(name="Benchmark University")
+            self.landlord = Profile.objects.create(
+                user=User.objects.create(username="bench-landlord"), role="landlord"
+            )
+            for room_count in kwargs["rooms"]:
+                self.run(room_count)
+            transaction.set_rollback(True)
+
+    def payload(self, rooms):
+        return {
+            "university": self.university.id, "name": "Benchmark Block", "amenities": ["WiFi"],
+            "roomTypes": [{"type": "single", "monthly_rent": "6000", "rooms": rooms}],
+        }
+
+    def timed(self, func):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        return result, elapsed, queries
+
+    def save(self, rooms, instance=None):
+        request = SimpleNamespace(user=self.landlord.user, data=self.payload(rooms))
+        serializer = ApartmentWriteSerializer(instance, data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def per_room(self, room_count):
+        """The previous write path: one INSERT (and its signals) per room."""
+        apartment = Apartment.objects.create(
+            landlord=self.landlord, university=self.university, name="Benchmark Block", amenities=["WiFi"]
+        )
+        for i in range(room_count):
+            Room.objects.create(apartment=apartment, room_type="single", label=f"R{i}", monthly_rent=6000)
+        return apartment
+
+    def run(self, room_count):
+        rooms = [{"label": f"R{i}", "status": "Vacant"} for i in range(room_count)]
+        _, legacy, legacy_queries = self.timed(lambda: self.per_room(room_count))
+        apartment, create, create_queries = self.timed(lambda: self.save(rooms))
+
+        existing = [
+            {"id": room_id, "label": label, "status": "Occupied"}
+            for room_id, label in apartment.rooms.values_list("id", "label")
+        ]
+        _, update, update_queries = self.timed(lambda: self.save(existing, apartment))
+
+        self.stdout.write(
+            f"{room_count:>5} rooms  per-room create {legacy * 1000:8.1f} ms ({legacy_queries} queries)   "
+            f"bulk create {create * 1000:7.1f} ms ({create_queries})   "
+            f"bulk update {update * 1000:7.1f} ms ({update_queries})"
+        )
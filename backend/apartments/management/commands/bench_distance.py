@@ -0,0 +1,73 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from apartments.geo import haversine_km, haversine_matrix, np
+from apartments.views import calculate_distance
+
+
+class Command(BaseCommand):
+    help = "Benchmark the batch distance matrix against per-pair calculate_distance calls"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--origins", type=int, default=20, help="Number of origins (universities)")
+        parser.add_argument("--destinations", type=int, default=50, help="Number of destinations (apartments)")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **kwargs):
+        rng = random.Random(kwargs["seed"])
+        # Points spread over Kenya
+        origins = [[rng.uniform(-4.5, 4.5), rng.uniform(34.0, 41.5)] for _ in range(kwargs["origins"])]
+        destinations = [[rng.uniform(-4.5, 4.5), rng.uniform(34.0, 41.5)] for _ in range(kwargs["destinations"])]
+        pairs = len(origins) * len(destinations)
+        factory = APIRequestFactory()
+
+        self.stdout.write(f"{len(origins)} origins x {len(destinations)} destinations = {pairs} pairs "
+                          f"(NumPy {'available' if np is not None else 'missing'})")
+
+        # 1. Scalar endpoint: one GET per pair, as the frontend does today
+        start = time.perf_counter()
+        for o_lat, o_lon in origins:
+            for d_lat, d_lon in destinations:
+                request = factory.get("/api/apartments/calculate-distance/", {
+                    "uni_lat": o_lat, "uni_lon": o_lon, "apt_lat": d_lat, "apt_lon": d_lon,
+                })
+                calculate_distance(request).render()
+        scalar_requests = time.perf_counter() - start
+
+        # 2. Batch endpoint: a single POST
+        start = time.perf_counter()
+        request = factory.post(
+            "/api/apartments/calculate-distance/",
+            json.dumps({"origins": origins, "destinations": destinations}),
+            content_type="application/json",
+        )
+        calculate_distance(request).render()
+        batch_request = time.perf_counter() - start
+
+        # 3. Computation only, without the HTTP layer
+        start = time.perf_counter()
+        for o_lat, o_lon in origins:
+            for d_lat, d_lon in destinations:
+                haversine_km(o_lat, o_lon, d_lat, d_lon)
+        scalar_math = time.perf_counter() - start
+
+        start = time.perf_counter()
+        haversine_matrix([o[0] for o in origins], [o[1] for o in origins],
+                         [d[0] for d in destinations], [d[1] for d in destinations])
+        batch_math = time.perf_counter() - start
+
+        rows = [
+            ("per-pair GET requests", scalar_requests),
+            ("one batch POST", batch_request),
+            ("scalar haversine loop", scalar_math),
+            ("vectorized matrix", batch_math),
+        ]
+        for label, seconds in rows:
+            self.stdout.write(f"  {label:<24} {seconds * 1000:10.2f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"Batch request is {scalar_requests / batch_request:.0f}x faster than per-pair requests"
+        ))
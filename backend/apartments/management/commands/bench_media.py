@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import path
+from django.views.static import serve
+
+from ComradeHousingHub.media import serve_media
+
+urlpatterns = [
+    path("static-view/<path:path>", serve, {"document_root": None}),
+    path("media-view/<path:path>", serve_media),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the Range/conditional media view against django.views.static.serve "
+        "(full downloads, video seeks and revalidations of a synthetic file)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size-mb", type=int, default=50, help="Size of the synthetic video")
+        parser.add_argument("--repeat", type=int, default=5, help="Requests per scenario")
+
+    def handle(self, *args, **kwargs):
+        size = kwargs["size_mb"] * 1024 * 1024
+        with tempfile.TemporaryDirectory() as media_root:
+            with open(os.path.join(media_root, "tour.mp4"), "wb") as video:
+                for _ in range(kwargs["size_mb"]):
+                    video.write(os.urandom(1024 * 1024))
+            urlpatterns[0].default_args["document_root"] = media_root
+            with override_settings(MEDIA_ROOT=media_root, ROOT_URLCONF=__name__, ALLOWED_HOSTS=["testserver"]):
+                self.run(size, kwargs["repeat"])
+
+    def timed(self, client, url, repeat, **headers):
+        best, received, status = float("inf"), 0, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get(url, **headers)
+            if response.streaming:
+                received = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                received = len(response.content)
+            best = min(best, time.perf_counter() - start)
+            status = response.status_code
+        return best, received, status
+
+    def run(self, size, repeat):
+        client = Client()
+        validators = client.get("/media-view/tour.mp4")
+        validators.close()
+        scenarios = [
+            ("full download", {}),
+            ("seek: last 1 MB", {"HTTP_RANGE": f"bytes={size - 1024 * 1024}-"}),
+            ("revalidate (ETag)", {"HTTP_IF_NONE_MATCH": validators["ETag"]}),
+            ("revalidate (date)", {"HTTP_IF_MODIFIED_SINCE": validators["Last-Modified"]}),
+        ]
+        for label, headers in scenarios:
+            line = f"  {label:<20}"
+            for name, url in (("static", "/static-view/tour.mp4"), ("media", "/media-view/tour.mp4")):
+                elapsed, received, status = self.timed(client, url, repeat, **headers)
+                rate = received / elapsed / 1024 / 1024 if received else 0
+                line += (
+                    f"  {name} {status} {received / 1024 / 1024:6.1f} MB "
+                    f"{elapsed * 1000:7.1f} ms ({rate:5.0f} MB/s)"
+                )
+            self.stdout.write(line)
@@ -0,0 +1,81 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.models import Profile
+from apartments.models import Apartment
+from apartments.search import search_apartments
+from universities.models import University
+
+WORDS = (
+    "spacious quiet secure modern cosy affordable furnished bright tiled gated "
+    "borehole balcony kitchen shower backup generator near stage market campus "
+    "road estate court plaza heights gardens villa hostel lane avenue"
+).split()
+PLACES = "Juja Kahawa Ruiru Thika Githurai Maseno Kisumu Eldoret Nakuru Njoro Kikuyu Rongai".split()
+AMENITIES = ["WiFi", "Water", "Parking", "Security", "CCTV", "Laundry", "Gym", "Electricity"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark ?q= full-text search against icontains scans (runs in a rolled-back transaction)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--apartments", type=int, default=50000, help="Number of synthetic apartments")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per query")
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            self.populate(kwargs["apartments"])
+            self.run(kwargs["repeat"])
+            transaction.set_rollback(True)
+
+    def populate(self, count):
+        rng = random.Random(0)
+        # Zipf-like vocabulary so common words match many rows and rarer ones few
+        vocabulary = WORDS + PLACES + [f"{rng.choice(WORDS)}{n}" for n in range(3000)]
+        weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+        self.rare_term = vocabulary[len(vocabulary) // 2]
+        university = University.objects.create(name="Benchmark University")
+        landlord = Profile.objects.create(user=User.objects.create(username="bench-landlord"), role="landlord")
+        apartments = [
+            Apartment(
+                university=university, landlord=landlord, is_approved=True,
+                name=f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}",
+                address=f"{rng.choice(PLACES)} {rng.choice(WORDS)}",
+                description=" ".join(rng.choices(vocabulary, weights, k=40)),
+                amenities=rng.sample(AMENITIES, 3),
+            )
+            for i in range(count)
+        ]
+        start = time.perf_counter()
+        Apartment.objects.bulk_create(apartments, batch_size=2000)
+        self.stdout.write(f"Inserted {count} apartments in {time.perf_counter() - start:.1f}s")
+
+    def timed(self, queryset, repeat):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ids = list(queryset.values_list("id", flat=True)[:20])
+            best = min(best, time.perf_counter() - start)
+        return best, ids
+
+    def run(self, repeat):
+        queryset = Apartment.objects.filter(is_approved=True)
+        for text in ["kahawa", "generator balcony", "gym juja", self.rare_term, "gard"]:
+            words = text.split()
+            condition = Q()
+            for word in words:
+                condition &= (
+                    Q(name__icontains=word) | Q(address__icontains=word)
+                    | Q(description__icontains=word) | Q(amenities__icontains=word)
+                )
+            scan, _ = self.timed(queryset.filter(condition).order_by("-created_at"), repeat)
+            fts, _ = self.timed(search_apartments(queryset, text), repeat)
+            self.stdout.write(
+                f"  {text!r:<22} icontains {scan * 1000:8.2f} ms   fts {fts * 1000:8.2f} ms   "
+                f"({scan / fts:.1f}x)"
+            )
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from PIL import UnidentifiedImageError
+
+from ComradeHousingHub.conditional import bump_change_counters
+from apartments.images import build_variants, content_hash, hashed_image_name
+from apartments.models import ApartmentImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill cover images: move originals to content-hash keys (deduplicating copies), "
+        "record their dimensions and build the responsive variants"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-run variant generation for every image, e.g. after VARIANT_WIDTHS changes",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Number of image rows fetched per query",
+        )
+
+    def handle(self, *args, **kwargs):
+        rehashed = deduplicated = built = failed = missing = 0
+
+        for image in ApartmentImage.objects.order_by("pk").iterator(chunk_size=kwargs["batch_size"]):
+            if not image.image or not image.image.storage.exists(image.image.name):
+                missing += 1
+                self.stderr.write(self.style.WARNING(f"Image {image.pk} ({image.image.name}): file missing, skipped"))
+                continue
+            try:
+                updates = {}
+                if not image.content_hash:
+                    storage, current = image.image.storage, image.image.name
+                    with storage.open(current, "rb") as original:
+                        digest = content_hash(original)
+                    name = hashed_image_name(digest, current)
+                    if name != current:
+                        if storage.exists(name):
+                            deduplicated += 1
+                        else:
+                            with storage.open(current, "rb") as original:
+                                name = storage.save(name, original)
+                        updates["image"] = name
+                    updates["content_hash"] = digest
+                    rehashed += 1
+                if image.width is None:
+                    updates["width"], updates["height"] = image.image.width, image.image.height
+                if updates:
+                    # queryset.update() so ApartmentImage.save() does not re-upload or schedule a build
+                    ApartmentImage.objects.filter(pk=image.pk).update(**updates)
+
+                if kwargs["force"] or not image.variants:
+                    build_variants(image.pk)
+                    built += 1
+            except (OSError, UnidentifiedImageError) as e:
+                failed += 1
+                self.stderr.write(self.style.ERROR(f"Image {image.pk} ({image.image.name}): {e}"))
+        if rehashed:
+            bump_change_counters("apartments")  # cover image URLs moved
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Hashed {rehashed} image(s) ({deduplicated} duplicate(s) now share a file), "
+            f"built variants for {built}, {failed} failed, {missing} missing"
+        ))
+        if rehashed:
+            self.stdout.write("Originals at their old paths were left in place.")
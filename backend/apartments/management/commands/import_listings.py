@@ -0,0 +1,284 @@
+import csv
+import json
+import math
+import os
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import Profile
+from apartments.amenities import amenities_to_mask
+from apartments.landlord_summary import invalidate_landlord_stats, rebuild_landlord_summaries
+from apartments.models import Apartment, Room, ROOM_TYPE_CHOICES
+from apartments.room_stats import refresh_room_stats
+from universities.models import University
+
+ROOM_TYPES = {value for value, _ in ROOM_TYPE_CHOICES}
+
+
+class RowError(Exception):
+    pass
+
+
+def _clean(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def _amenities(value):
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in (value or "").split(";") if item.strip()]
+
+
+def _checked(model, field, value):
+    """Run the model field's own validation (max_length, max_digits, ...) so bad rows fail here, not in the batch insert."""
+    try:
+        return model._meta.get_field(field).clean(value, None)
+    except ValidationError as exc:
+        raise RowError(f"'{field}': {' '.join(exc.messages)}")
+
+
+def _coordinate(record, field):
+    value = _clean(record.get(field))
+    if value in (None, ""):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise RowError(f"'{field}' must be a number")
+    if not math.isfinite(value):
+        raise RowError(f"'{field}' must be a number")
+    return value
+
+
+def _room(data):
+    if not isinstance(data, dict):
+        raise RowError("each room must be an object")
+    room_type = _clean(data.get("room_type")) or "single"
+    if room_type not in ROOM_TYPES:
+        raise RowError(f"unknown room_type '{room_type}'")
+    label = _clean(data.get("label"))
+    if not label:
+        raise RowError("room 'label' is required")
+    label = _checked(Room, "label", str(label))
+    try:
+        monthly_rent = Decimal(str(_clean(data.get("monthly_rent"))))
+    except InvalidOperation:
+        raise RowError("'monthly_rent' must be a number")
+    if not monthly_rent.is_finite():  # Decimal() accepts "NaN" and "Infinity"
+        raise RowError("'monthly_rent' must be a number")
+    if monthly_rent < 0:
+        raise RowError("'monthly_rent' must not be negative")
+    monthly_rent = _checked(Room, "monthly_rent", monthly_rent)
+    status = _clean(data.get("status")) or "Vacant"
+    if status not in ("Vacant", "Occupied"):
+        raise RowError("'status' must be Vacant or Occupied")
+    return {"room_type": room_type, "label": label, "monthly_rent": monthly_rent, "is_vacant": status == "Vacant"}
+
+
+def parse_record(record):
+    """
+    Validate one input record: the apartment it belongs to plus its rooms.
+    CSV rows carry one room inline; JSONL lines may instead carry a "rooms" list.
+    """
+    apartment = {field: _clean(record.get(field)) or "" for field in ("landlord", "university", "name")}
+    for field, value in apartment.items():
+        if not value:
+            raise RowError(f"'{field}' is required")
+    apartment["name"] = _checked(Apartment, "name", str(apartment["name"]))
+    apartment.update(
+        address=_checked(Apartment, "address", str(_clean(record.get("address")) or "")),
+        description=_clean(record.get("description")) or "",
+        amenities=_amenities(record.get("amenities")),
+        lat=_coordinate(record, "lat"),
+        lon=_coordinate(record, "lon"),
+    )
+    if "rooms" in record:
+        if not isinstance(record["rooms"] or [], list):
+            raise RowError("'rooms' must be a list")
+        rooms = [_room(room) for room in record["rooms"] or []]
+    elif record.get("label"):
+        rooms = [_room(record)]
+    else:
+        rooms = []
+    return apartment, rooms
+
+
+class Command(BaseCommand):
+    help = (
+        "Import apartments and rooms from a CSV or JSONL file, streaming it in batches. "
+        "CSV rows hold one room each (apartment columns repeated); JSONL lines may nest a 'rooms' list."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            type=str,
+            required=True,
+            help="Path to the CSV or JSONL file containing listings",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Input format (default: from the file extension)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of records committed per transaction",
+        )
+        parser.add_argument(
+            "--resume-from",
+            type=int,
+            default=1,
+            help="Line number to start at, as printed after the last committed batch",
+        )
+
+    def handle(self, *args, **kwargs):
+        file_path = kwargs["file"]
+        file_format = kwargs["format"] or ("jsonl" if file_path.endswith((".jsonl", ".ndjson")) else "csv")
+        if kwargs["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        self.errors = self.apartments_created = self.rooms_created = 0
+        try:
+            with open(file_path, newline="", encoding="utf-8") as listings:
+                records = self.read_csv(listings) if file_format == "csv" else self.read_jsonl(listings)
+                records = ((line, record) for line, record in records if line >= kwargs["resume_from"])
+                while batch := list(islice(records, kwargs["batch_size"])):
+                    self.import_batch(batch)
+                    last_line = batch[-1][0]
+                    self.stdout.write(
+                        f"Committed through line {last_line} (resume with --resume-from {last_line + 1})"
+                    )
+        except FileNotFoundError:
+            raise CommandError(f"File not found: {file_path}")
+
+        summary = (
+            f"Imported {self.apartments_created} apartment(s) and {self.rooms_created} room(s) "
+            f"from {os.path.basename(file_path)}"
+        )
+        if self.errors:
+            self.stdout.write(self.style.WARNING(f"{summary}; {self.errors} row(s) rejected"))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
+
+    # ---------------- Readers ----------------
+    def read_csv(self, listings):
+        """Yield (line number, row) pairs; line numbers stay exact for quoted multi-line fields."""
+        reader = csv.DictReader(listings)
+        reader.fieldnames  # consume the header
+        line = reader.line_num + 1
+        for row in reader:
+            yield line, row
+            line = reader.line_num + 1
+
+    def read_jsonl(self, listings):
+        for line, text in enumerate(listings, start=1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except json.JSONDecodeError as exc:
+                record = exc
+            yield line, record
+
+    def reject(self, line, message):
+        self.errors += 1
+        self.stderr.write(self.style.ERROR(f"line {line}: {message}"))
+
+    # ---------------- Batch import ----------------
+    def import_batch(self, batch):
+        parsed = []
+        for line, record in batch:
+            try:
+                if isinstance(record, Exception):
+                    raise RowError(f"invalid JSON ({record})")
+                if not isinstance(record, dict):
+                    raise RowError("expected an object")
+                parsed.append((line, *parse_record(record)))
+            except RowError as exc:
+                self.reject(line, exc)
+
+        landlords = {
+            profile.user.username: profile
+            for profile in Profile.objects.select_related("user").filter(
+                role="landlord", user__username__in={apartment["landlord"] for _, apartment, _ in parsed}
+            )
+        }
+        universities = {
+            university.name: university
+            for university in University.objects.filter(name__in={apartment["university"] for _, apartment, _ in parsed})
+        }
+
+        with transaction.atomic():
+            apartments = self.upsert_apartments(parsed, landlords, universities)
+            self.create_rooms(parsed, apartments)
+
+            # bulk writes skip the model signals; refresh what they would have maintained
+            apartment_ids = {apartment.id for apartment in apartments.values()}
+            landlord_ids = {apartment.landlord_id for apartment in apartments.values()}
+            refresh_room_stats(apartment_ids)
+            rebuild_landlord_summaries(landlord_ids)
+            invalidate_landlord_stats(*landlord_ids)
+
+    def upsert_apartments(self, parsed, landlords, universities):
+        """
+        Map (landlord, university, name) to an apartment, creating the missing ones in bulk.
+        Existing apartments are reused as they are; rows that fail a lookup are dropped from parsed.
+        """
+        apartments, new, valid = {}, {}, []
+        for line, data, rooms in parsed:
+            landlord = landlords.get(data["landlord"])
+            university = universities.get(data["university"])
+            if landlord is None:
+                self.reject(line, f"unknown landlord '{data['landlord']}'")
+            elif university is None:
+                self.reject(line, f"unknown university '{data['university']}'")
+            else:
+                key = (landlord.pk, university.pk, data["name"])
+                valid.append((line, key, rooms))
+                if key not in new:
+                    new[key] = Apartment(
+                        landlord=landlord, university=university, name=data["name"],
+                        address=data["address"], description=data["description"], amenities=data["amenities"],
+                        lat=data["lat"], lon=data["lon"], amenity_mask=amenities_to_mask(data["amenities"]),
+                    )
+        parsed[:] = valid
+
+        existing = Apartment.objects.filter(
+            landlord_id__in={key[0] for key in new}, name__in={key[2] for key in new}
+        ).only("id", "landlord_id", "university_id", "name")
+        for apartment in existing:
+            key = (apartment.landlord_id, apartment.university_id, apartment.name)
+            if key in new:
+                apartments[key] = apartment
+                del new[key]
+
+        for apartment in new.values():
+            # bulk_create skips Apartment.save()
+            apartment.distance_km = apartment.distance_from_university()
+        Apartment.objects.bulk_create(new.values(), batch_size=500)
+        self.apartments_created += len(new)
+        apartments.update(new)
+        return apartments
+
+    def create_rooms(self, parsed, apartments):
+        """Insert rooms not already present (by apartment and label), so re-running a range is harmless."""
+        taken = set(
+            Room.objects.filter(apartment__in=apartments.values()).values_list("apartment_id", "label")
+        )
+        rooms = []
+        for line, key, room_list in parsed:
+            apartment = apartments[key]
+            for room in room_list:
+                if (apartment.id, room["label"]) in taken:
+                    continue
+                taken.add((apartment.id, room["label"]))
+                rooms.append(Room(apartment=apartment, **room))
+        Room.objects.bulk_create(rooms, batch_size=500)
+        self.rooms_created += len(rooms)
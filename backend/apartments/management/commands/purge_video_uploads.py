@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apartments.models import VideoUpload
+
+
+class Command(BaseCommand):
+    help = "Delete chunked video uploads that stalled or finished, with their part files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=24,
+            help="Remove uploads not touched for this many hours",
+        )
+
+    def handle(self, *args, **kwargs):
+        cutoff = timezone.now() - timedelta(hours=kwargs["hours"])
+        stale = VideoUpload.objects.filter(updated_at__lt=cutoff)
+        count = 0
+        for upload in stale.iterator():
+            upload.discard_part()
+            count += 1
+        stale.delete()
+        self.stdout.write(self.style.SUCCESS(f"Removed {count} video upload(s)"))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ComradeHousingHub.conditional import bump_change_counters
+from apartments.amenities import amenities_to_mask
+from apartments.models import Apartment
+
+
+class Command(BaseCommand):
+    help = "Recompute the amenity bitmask of every apartment from its amenities list"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of apartments written per bulk update",
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs["batch_size"]
+        changed, updated = [], 0
+        with transaction.atomic():
+            for apartment in Apartment.objects.only("id", "amenities", "amenity_mask").iterator(chunk_size=batch_size):
+                mask = amenities_to_mask(apartment.amenities)
+                if mask != apartment.amenity_mask:
+                    apartment.amenity_mask = mask
+                    changed.append(apartment)
+                if len(changed) >= batch_size:
+                    updated += Apartment.objects.bulk_update(changed, ["amenity_mask"])
+                    changed = []
+            updated += Apartment.objects.bulk_update(changed, ["amenity_mask"])
+            if updated:
+                bump_change_counters("apartments")  # ?amenities= results may differ
+
+        self.stdout.write(self.style.SUCCESS(f"Amenity index rebuilt ({updated} apartment(s) updated)"))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from apartments.landlord_summary import rebuild_landlord_summaries
+
+
+class Command(BaseCommand):
+    help = "Reconcile the landlord dashboard summaries with the raw tables and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--landlord",
+            type=int,
+            action="append",
+            dest="landlords",
+            help="Profile id of a landlord to reconcile (repeatable; default: all)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drift without writing anything",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of summaries written per bulk query",
+        )
+
+    def handle(self, *args, **kwargs):
+        drift = rebuild_landlord_summaries(
+            kwargs["landlords"], dry_run=kwargs["dry_run"], batch_size=kwargs["batch_size"]
+        )
+        for landlord_id, fields in drift.items():
+            changes = ", ".join(f"{field}: {stored} -> {actual}" for field, (stored, actual) in fields.items())
+            self.stdout.write(f"landlord {landlord_id}: {changes}")
+
+        verb = "would be rebuilt" if kwargs["dry_run"] else "rebuilt"
+        self.stdout.write(self.style.SUCCESS(f"{len(drift)} landlord summary(ies) {verb}"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apartments.room_stats import rebuild_room_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized rent range and vacancy counts on apartments"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of apartments written per bulk update",
+        )
+
+    def handle(self, *args, **kwargs):
+        updated = rebuild_room_stats(batch_size=kwargs["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt room stats ({updated} apartment(s) updated)"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from ComradeHousingHub.conditional import bump_change_counters
+from apartments.search import ensure_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over apartments"
+
+    def handle(self, *args, **kwargs):
+        ensure_search_index()
+        if rebuild_search_index():
+            bump_change_counters("apartments")  # ?q= results may differ
+            self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
+        else:
+            self.stdout.write(self.style.WARNING("Full-text index is only used on SQLite; nothing to rebuild"))
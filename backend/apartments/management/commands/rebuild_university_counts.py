@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apartments.university_counts import rebuild_university_counts
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized approved apartment and vacant room counts on universities"
+
+    def handle(self, *args, **kwargs):
+        updated = rebuild_university_counts()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt university counts ({updated} university(ies) updated)"))
@@ -0,0 +1,63 @@
+# apartments/media_types.py
+"""
+Accepted upload types and their limits, and content sniffing from magic bytes.
+
+Shared by the model validators (which see the whole file) and
+ValidatingUploadHandler (which sees it chunk by chunk), so both apply the
+same rules. Kept free of model imports so the upload handler can load it
+before the app registry is ready.
+"""
+import os
+
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
+VIDEO_EXTENSIONS = [".mp4", ".mov", ".avi"]
+MAX_IMAGE_SIZE_MB = 5
+MAX_VIDEO_SIZE_MB = 50
+
+IMAGE_TYPES = {"image/jpeg", "image/png"}
+VIDEO_TYPES = {"video/mp4", "video/quicktime", "video/x-msvideo"}
+
+# enough leading bytes to recognise every accepted type
+SNIFF_BYTES = 16
+
+# Upload field names whose files are always checked, whatever their extension.
+UPLOAD_FIELD_KINDS = {"image": "image", "coverImage": "image", "video": "video"}
+
+# Top-level atoms an old QuickTime file may start with instead of 'ftyp'.
+_QUICKTIME_ATOMS = {b"moov", b"mdat", b"wide", b"free", b"skip", b"pnot"}
+
+
+def sniff_media_type(head):
+    """MIME type of the accepted upload types from a file's first bytes, or None."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return "video/x-msvideo"
+    if head[4:8] == b"ftyp":
+        return "video/quicktime" if head[8:12] == b"qt  " else "video/mp4"
+    if head[4:8] in _QUICKTIME_ATOMS:
+        return "video/quicktime"
+    return None
+
+
+def read_head(file):
+    """The first SNIFF_BYTES bytes of a file, leaving its position unchanged."""
+    position = file.tell()
+    file.seek(0)
+    head = file.read(SNIFF_BYTES)
+    file.seek(position)
+    return head
+
+
+def upload_kind(field_name, file_name):
+    """'image', 'video' or None (not ours to check) for an uploaded file."""
+    if field_name in UPLOAD_FIELD_KINDS:
+        return UPLOAD_FIELD_KINDS[field_name]
+    ext = os.path.splitext(file_name or "")[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    if ext in VIDEO_EXTENSIONS:
+        return "video"
+    return None
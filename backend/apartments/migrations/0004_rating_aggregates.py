@@ -0,0 +1,68 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Apartment = apps.get_model("apartments", "Apartment")
+    Review = apps.get_model("reviews", "Review")
+
+    histograms = {}
+    counts = Review.objects.values_list("apartment_id", "rating").annotate(n=Count("id")).order_by()
+    for apartment_id, rating, n in counts:
+        histograms.setdefault(apartment_id, {})[rating] = n
+
+    for apartment_id, histogram in histograms.items():
+        total = sum(histogram.values())
+        values = {f"rating_{star}_count": histogram.get(star, 0) for star in range(1, 6)}
+        values["review_count"] = total
+        values["average_rating"] = sum(star * n for star, n in histogram.items()) / total
+        Apartment.objects.filter(pk=apartment_id).update(**values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0003_remove_apartment_monthly_rent_room_monthly_rent'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apartment',
+            name='average_rating',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='review_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:41
+
+from math import radians, sin, cos, sqrt, atan2
+
+from django.db import migrations, models
+
+
+def backfill_distance_km(apps, schema_editor):
+    Apartment = apps.get_model("apartments", "Apartment")
+    apartments = Apartment.objects.filter(
+        lat__isnull=False, lon__isnull=False,
+        university__lat__isnull=False, university__lng__isnull=False,
+    ).values_list("id", "lat", "lon", "university__lat", "university__lng")
+
+    for pk, lat, lon, uni_lat, uni_lng in apartments:
+        lat1, lon1, lat2, lon2 = map(radians, (uni_lat, uni_lng, lat, lon))
+        a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+        distance = round(6371 * 2 * atan2(sqrt(a), sqrt(1 - a)), 2)
+        Apartment.objects.filter(pk=pk).update(distance_km=distance)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('apartments', '0004_rating_aggregates'),
+        ('universities', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apartment',
+            name='distance_km',
+            field=models.FloatField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='apartment',
+            index=models.Index(fields=['university', 'distance_km'], name='apartment_uni_distance_idx'),
+        ),
+        migrations.RunPython(backfill_distance_km, migrations.RunPython.noop),
+    ]
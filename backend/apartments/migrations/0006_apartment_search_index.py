@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:05
+
+from django.db import migrations
+
+from apartments.search import create_search_index, drop_search_index
+
+
+def create_index(apps, schema_editor):
+    create_search_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0005_apartment_distance_km'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('apartments', '0006_apartment_search_index'),
+        ('universities', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apartment',
+            name='amenity_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='apartment',
+            index=models.Index(fields=['is_approved', 'amenity_mask'], name='apartment_amenity_mask_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:46
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q
+
+ROOM_TYPES = ["single", "bedsitter", "onebedroom", "twobedroom"]
+
+
+def backfill_room_stats(apps, schema_editor):
+    Apartment = apps.get_model("apartments", "Apartment")
+    Room = apps.get_model("apartments", "Room")
+
+    rows = Room.objects.values("apartment_id").annotate(
+        min_rent=Min("monthly_rent"),
+        max_rent=Max("monthly_rent"),
+        room_count=Count("id"),
+        vacant_room_count=Count("id", filter=Q(is_vacant=True)),
+        **{
+            f"vacant_{room_type}_count": Count("id", filter=Q(is_vacant=True, room_type=room_type))
+            for room_type in ROOM_TYPES
+        },
+    ).order_by()
+    for row in rows:
+        Apartment.objects.filter(pk=row.pop("apartment_id")).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0007_apartment_amenity_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apartment',
+            name='max_rent',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='min_rent',
+            field=models.DecimalField(db_index=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='room_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='vacant_bedsitter_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='vacant_onebedroom_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='vacant_room_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='vacant_single_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='apartment',
+            name='vacant_twobedroom_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_room_stats, migrations.RunPython.noop),
+    ]
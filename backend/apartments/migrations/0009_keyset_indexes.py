@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('apartments', '0008_apartment_room_stats'),
+        ('universities', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apartment',
+            index=models.Index(fields=['created_at', 'id'], name='apartment_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apartment',
+            index=models.Index(fields=['is_approved', 'created_at', 'id'], name='apartment_approved_created_idx'),
+        ),
+    ]
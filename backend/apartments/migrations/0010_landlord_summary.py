@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('apartments', '0009_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LandlordSummary',
+            fields=[
+                ('landlord', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='accounts.profile')),
+                ('apartment_count', models.IntegerField(default=0)),
+                ('room_count', models.IntegerField(default=0)),
+                ('pending_booking_count', models.IntegerField(default=0)),
+                ('confirmed_booking_count', models.IntegerField(default=0)),
+                ('total_earnings', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'landlord summaries',
+            },
+        ),
+    ]
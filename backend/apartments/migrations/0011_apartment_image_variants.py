@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:01
+
+import apartments.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0010_landlord_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apartmentimage',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='apartmentimage',
+            name='height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='apartmentimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='apartmentimage',
+            name='width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='apartmentimage',
+            name='image',
+            field=models.ImageField(height_field='height', upload_to=apartments.models.apartment_image_upload_path, validators=[apartments.models.validate_image], width_field='width'),
+        ),
+    ]
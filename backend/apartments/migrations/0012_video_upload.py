@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:04
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('apartments', '0011_apartment_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('room_type', models.CharField(choices=[('single', 'Single'), ('bedsitter', 'Bedsitter'), ('onebedroom', 'One Bedroom'), ('twobedroom', 'Two Bedroom')], max_length=20)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('checksum', models.CharField(blank=True, max_length=64)),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('complete', 'Complete'), ('failed', 'Failed')], default='uploading', max_length=12)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('apartment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='video_uploads', to='apartments.apartment')),
+                ('landlord', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='video_uploads', to='accounts.profile')),
+                ('room_video', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='apartments.roomvideo')),
+            ],
+        ),
+    ]
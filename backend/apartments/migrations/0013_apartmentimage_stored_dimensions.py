@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 21:12
+
+import apartments.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0012_video_upload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='apartmentimage',
+            name='image',
+            field=models.ImageField(upload_to=apartments.models.apartment_image_upload_path, validators=[apartments.models.validate_image]),
+        ),
+    ]
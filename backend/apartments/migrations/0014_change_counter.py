@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:25
+
+import time
+
+from django.db import migrations, models
+
+
+def create_counters(apps, schema_editor):
+    ChangeCounter = apps.get_model("apartments", "ChangeCounter")
+    now = time.time()
+    for name in ("apartments", "universities"):
+        ChangeCounter.objects.get_or_create(name=name, defaults={"version": int(now * 1_000_000), "modified": now})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0013_apartmentimage_stored_dimensions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('name', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField()),
+                ('modified', models.FloatField()),
+            ],
+        ),
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+    ]
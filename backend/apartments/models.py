@@ -1,35 +1,51 @@
+import os
+import uuid
+
+from django.conf import settings
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.core.files.images import get_image_dimensions
+from ComradeHousingHub.conditional import bump_change_counters
 from universities.models import University
 from accounts.models import Profile
-from math import radians, sin, cos, sqrt, atan2
+from .amenities import amenities_to_mask
+from .geo import haversine_km, haversine_sql
+from .images import content_hash, hashed_image_name, schedule_variants
+from .media_types import (
+    IMAGE_EXTENSIONS, IMAGE_TYPES, MAX_IMAGE_SIZE_MB, MAX_VIDEO_SIZE_MB, VIDEO_EXTENSIONS, VIDEO_TYPES,
+    read_head, sniff_media_type,
+)
 
 # ------------------ VALIDATORS ------------------
 def validate_image(file):
-    """Ensure uploaded images are JPG or PNG and within size limit."""
-    valid_extensions = [".jpg", ".jpeg", ".png"]
-    if not any(file.name.lower().endswith(ext) for ext in valid_extensions):
+    """Ensure uploaded images are JPG or PNG (by name and content) and within size limit."""
+    if not any(file.name.lower().endswith(ext) for ext in IMAGE_EXTENSIONS):
         raise ValidationError("Only JPG and PNG images are allowed.")
 
-    max_size_mb = 5
-    if file.size > max_size_mb * 1024 * 1024:
-        raise ValidationError(f"Image size should not exceed {max_size_mb}MB.")
+    if file.size > MAX_IMAGE_SIZE_MB * 1024 * 1024:
+        raise ValidationError(f"Image size should not exceed {MAX_IMAGE_SIZE_MB}MB.")
+
+    if sniff_media_type(read_head(file)) not in IMAGE_TYPES:
+        raise ValidationError("File content is not a JPG or PNG image.")
 
 
 def validate_video(file):
-    """Ensure uploaded videos are valid formats and within size limit."""
-    valid_extensions = [".mp4", ".mov", ".avi"]
-    if not any(file.name.lower().endswith(ext) for ext in valid_extensions):
+    """Ensure uploaded videos are valid formats (by name and content) and within size limit."""
+    if not any(file.name.lower().endswith(ext) for ext in VIDEO_EXTENSIONS):
         raise ValidationError("Only MP4, MOV, or AVI videos are allowed.")
 
-    max_size_mb = 50
-    if file.size > max_size_mb * 1024 * 1024:
-        raise ValidationError(f"Video size should not exceed {max_size_mb}MB.")
+    if file.size > MAX_VIDEO_SIZE_MB * 1024 * 1024:
+        raise ValidationError(f"Video size should not exceed {MAX_VIDEO_SIZE_MB}MB.")
+
+    if sniff_media_type(read_head(file)) not in VIDEO_TYPES:
+        raise ValidationError("File content is not an MP4, MOV, or AVI video.")
 
 
 # ------------------ UPLOAD PATHS ------------------
 def apartment_image_upload_path(instance, filename):
-    """Upload path for apartment cover images."""
+    """Upload path for apartment cover images, keyed by content hash when known."""
+    if instance.content_hash:
+        return hashed_image_name(instance.content_hash, filename)
     return f"apartments/{instance.apartment.id}/{filename}"
 
 
@@ -39,6 +55,19 @@ def room_video_upload_path(instance, filename):
 
 
 # ------------------ MODELS ------------------
+ROOM_TYPE_CHOICES = [
+    ("single", "Single"),
+    ("bedsitter", "Bedsitter"),
+    ("onebedroom", "One Bedroom"),
+    ("twobedroom", "Two Bedroom"),
+]
+
+# Denormalized per-star review counts on Apartment, keyed by star rating
+RATING_COUNT_FIELDS = {star: f"rating_{star}_count" for star in range(1, 6)}
+# Denormalized vacant-room counts on Apartment, keyed by room type
+VACANT_COUNT_FIELDS = {room_type: f"vacant_{room_type}_count" for room_type, _ in ROOM_TYPE_CHOICES}
+
+
 class Apartment(models.Model):
     """
     Represents an apartment listed by a landlord.
@@ -50,6 +79,8 @@ class Apartment(models.Model):
     description = models.TextField(blank=True)
     address = models.CharField(max_length=255, blank=True)
     amenities = models.JSONField(default=list, blank=True)
+    # One bit per canonical amenity (see apartments.amenities), derived from `amenities` on save
+    amenity_mask = models.BigIntegerField(default=0, editable=False)
     is_approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -57,24 +88,99 @@ class Apartment(models.Model):
     lat = models.FloatField(null=True, editable=False)
     lon = models.FloatField(null=True, editable=False)
 
+    # Stored distance_from_university(); recomputed on save and when the university moves
+    distance_km = models.FloatField(null=True, db_index=True, editable=False)
+
+    # Review aggregates, kept in sync by reviews.signals (rebuild with `rebuild_rating_stats`)
+    average_rating = models.FloatField(default=0, db_index=True, editable=False)
+    review_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Room aggregates, kept in sync by apartments.signals (rebuild with `rebuild_room_stats`)
+    min_rent = models.DecimalField(max_digits=10, decimal_places=2, null=True, db_index=True, editable=False)
+    max_rent = models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False)
+    room_count = models.PositiveIntegerField(default=0, editable=False)
+    vacant_room_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+    vacant_single_count = models.PositiveIntegerField(default=0, editable=False)
+    vacant_bedsitter_count = models.PositiveIntegerField(default=0, editable=False)
+    vacant_onebedroom_count = models.PositiveIntegerField(default=0, editable=False)
+    vacant_twobedroom_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["university", "distance_km"], name="apartment_uni_distance_idx"),
+            models.Index(fields=["is_approved", "amenity_mask"], name="apartment_amenity_mask_idx"),
+            # keyset pagination (newest first)
+            models.Index(fields=["created_at", "id"], name="apartment_created_id_idx"),
+            models.Index(fields=["is_approved", "created_at", "id"], name="apartment_approved_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.university.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_location = instance._location()
+        instance._loaded_landlord_id = instance.__dict__.get("landlord_id")
+        instance._loaded_listing = (instance.__dict__.get("university_id"), instance.__dict__.get("is_approved"))
+        return instance
+
+    def _location(self):
+        return (self.__dict__.get("university_id"), self.__dict__.get("lat"), self.__dict__.get("lon"))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        location_changed = getattr(self, "_loaded_location", None) != self._location()
+        if location_changed and (
+            update_fields is None or {"lat", "lon", "university", "university_id"} & set(update_fields)
+        ):
+            self.distance_km = self.distance_from_university()
+            if update_fields is not None:
+                kwargs["update_fields"] = update_fields = {*update_fields, "distance_km"}
+        if update_fields is None or "amenities" in update_fields:
+            self.amenity_mask = amenities_to_mask(self.amenities)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "amenity_mask"}
+        super().save(*args, **kwargs)
+        self._loaded_location = self._location()
+
     def distance_from_university(self):
         """Calculate distance from university in km using Haversine formula."""
-        if not self.university.lat or not self.university.lng or not self.lat or not self.lon:
+        university = self.university
+        if None in (university.lat, university.lng, self.lat, self.lon):
             return None
+        return round(haversine_km(university.lat, university.lng, self.lat, self.lon), 2)
 
-        R = 6371  # Earth radius in km
-        lat1, lon1 = radians(self.university.lat), radians(self.university.lng)
-        lat2, lon2 = radians(self.lat), radians(self.lon)
+    @classmethod
+    def refresh_distances(cls, universities):
+        """Recompute distance_km in bulk for every apartment of the given universities."""
+        for university in universities:
+            apartments = cls.objects.filter(university=university)
+            if university.lat is None or university.lng is None:
+                apartments.update(distance_km=None)
+            else:
+                apartments.update(distance_km=haversine_sql(university.lat, university.lng))
+        bump_change_counters("apartments")
 
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+    @property
+    def rating_histogram(self):
+        """Number of reviews per star rating, e.g. {1: 0, 2: 1, 3: 0, 4: 5, 5: 2}."""
+        return {star: getattr(self, field) for star, field in RATING_COUNT_FIELDS.items()}
 
-        a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        return round(R * c, 2)  # distance in kilometers
+    @staticmethod
+    def rating_stats(histogram):
+        """Column values for the review aggregates described by a {star: count} histogram."""
+        values = {field: histogram.get(star, 0) for star, field in RATING_COUNT_FIELDS.items()}
+        total = sum(values.values())
+        weighted = sum(star * histogram.get(star, 0) for star in RATING_COUNT_FIELDS)
+        values["review_count"] = total
+        values["average_rating"] = weighted / total if total else 0
+        return values
 
 
 class ApartmentImage(models.Model):
@@ -89,10 +195,38 @@ class ApartmentImage(models.Model):
     )
     image = models.ImageField(upload_to=apartment_image_upload_path, validators=[validate_image])
     caption = models.CharField(max_length=120, blank=True)
+    # Set from the upload in save() (not width_field/height_field, which reopen the file on every load);
+    # rows from before they existed are filled in by build_image_variants
+    width = models.PositiveIntegerField(null=True, editable=False)
+    height = models.PositiveIntegerField(null=True, editable=False)
+    # SHA-256 of the original; identical uploads share one stored file (see apartments/images.py)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    # {"webp": {"320": name, ...}, "jpeg": {...}}, filled in after upload
+    variants = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"Cover image for {self.apartment.name}"
 
+    def save(self, *args, **kwargs):
+        upload = self.image
+        new_upload = bool(upload) and not upload._committed
+        if new_upload:
+            self.width, self.height = get_image_dimensions(upload)
+            self.content_hash = content_hash(upload)
+            self.variants = {}
+            name = hashed_image_name(self.content_hash, upload.name)
+            if upload.storage.exists(name):
+                # Same photo already stored: reuse the file and its variants
+                upload.name = name
+                upload._committed = True
+                self.variants = (
+                    ApartmentImage.objects.filter(content_hash=self.content_hash)
+                    .exclude(variants={}).values_list("variants", flat=True).first()
+                ) or {}
+        super().save(*args, **kwargs)
+        if new_upload and not self.variants:
+            schedule_variants(self.pk)
+
 
 class Room(models.Model):
     """
@@ -103,12 +237,7 @@ class Room(models.Model):
     - Monthly Rent (specific to that room type)
     - Vacancy status
     """
-    ROOM_TYPE_CHOICES = [
-        ("single", "Single"),
-        ("bedsitter", "Bedsitter"),
-        ("onebedroom", "One Bedroom"),
-        ("twobedroom", "Two Bedroom"),
-    ]
+    ROOM_TYPE_CHOICES = ROOM_TYPE_CHOICES
 
     apartment = models.ForeignKey(Apartment, on_delete=models.CASCADE, related_name="rooms")
     label = models.CharField(max_length=30)  # e.g., "Room A"
@@ -116,6 +245,12 @@ class Room(models.Model):
     monthly_rent = models.DecimalField(max_digits=10, decimal_places=2)
     is_vacant = models.BooleanField(default=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_apartment_id = instance.__dict__.get("apartment_id")
+        return instance
+
     def __str__(self):
         return f"{self.label} ({self.get_room_type_display()}) @ {self.apartment.name}"
 
@@ -134,3 +269,94 @@ class RoomVideo(models.Model):
 
     def __str__(self):
         return f"Video for {self.apartment.name} - {self.get_room_type_display()}"
+
+
+class VideoUpload(models.Model):
+    """
+    A resumable, chunked upload of a room video (see apartments/uploads.py).
+    Chunks are written at their offset into a part file under
+    CHUNKED_UPLOAD_DIR; the finished file is checked with validate_video
+    and attached to the apartment's RoomVideo for room_type.
+    """
+    STATUS_CHOICES = [
+        ("uploading", "Uploading"),
+        ("complete", "Complete"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    landlord = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name="video_uploads")
+    apartment = models.ForeignKey(Apartment, on_delete=models.CASCADE, related_name="video_uploads")
+    room_type = models.CharField(max_length=20, choices=ROOM_TYPE_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    checksum = models.CharField(max_length=64, blank=True)  # sha256 hex of the whole file, optional
+    offset = models.PositiveBigIntegerField(default=0)  # bytes received so far
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default="uploading")
+    error = models.CharField(max_length=255, blank=True)
+    room_video = models.ForeignKey(RoomVideo, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.offset}/{self.size} bytes)"
+
+    @property
+    def part_path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_DIR, f"{self.pk}.part")
+
+    def discard_part(self):
+        try:
+            os.remove(self.part_path)
+        except FileNotFoundError:
+            pass
+
+
+class LandlordSummary(models.Model):
+    """
+    Dashboard totals for one landlord, kept current by signals
+    (see apartments/landlord_summary.py) so the dashboard reads one row.
+    Rebuild with `manage.py rebuild_landlord_summaries`.
+    """
+    landlord = models.OneToOneField(Profile, on_delete=models.CASCADE, primary_key=True, related_name="summary")
+    apartment_count = models.IntegerField(default=0)
+    room_count = models.IntegerField(default=0)
+    pending_booking_count = models.IntegerField(default=0)
+    confirmed_booking_count = models.IntegerField(default=0)
+    total_earnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "landlord summaries"
+
+    def __str__(self):
+        return f"Summary for {self.landlord}"
+
+
+class ChangeCounter(models.Model):
+    """
+    A named catalog version ("apartments", "universities", ...) shared by
+    every worker and management command; see ComradeHousingHub.conditional.
+    `modified` is a Unix timestamp that moves forward at least one second
+    per bump, so Last-Modified changes with every version.
+    """
+    name = models.CharField(max_length=40, primary_key=True)
+    version = models.PositiveBigIntegerField()
+    modified = models.FloatField()
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class ApartmentLocationChange(models.Model):
+    """
+    Apartments added, moved, approved, unapproved or deleted, in commit order.
+    Each worker's grid index (apartments/spatial.py) reads the entries after
+    the last one it applied and patches just those apartments. Entries older
+    than spatial.LOG_RETENTION are pruned.
+    """
+    apartment_id = models.BigIntegerField()  # not a ForeignKey: deletions are logged too
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Apartment {self.apartment_id} changed at {self.created_at}"
@@ -0,0 +1,69 @@
+# apartments/ratings.py
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from ComradeHousingHub.conditional import bump_change_counters
+from .models import Apartment, RATING_COUNT_FIELDS
+
+
+def apply_rating_change(apartment_id, added=None, removed=None):
+    """
+    Incrementally adjust an apartment's review aggregates.
+    - added: star rating of a review that now counts towards the apartment
+    - removed: star rating of a review that no longer does
+    """
+    with transaction.atomic():
+        apartment = (
+            Apartment.objects.select_for_update()
+            .filter(pk=apartment_id)
+            .only("id", *RATING_COUNT_FIELDS.values())
+            .first()
+        )
+        if apartment is None:  # apartment is being deleted along with its reviews
+            return
+
+        histogram = apartment.rating_histogram
+        if removed in histogram:
+            histogram[removed] = max(histogram[removed] - 1, 0)
+        if added in histogram:
+            histogram[added] += 1
+
+        # queryset.update() so Apartment save hooks are not triggered
+        Apartment.objects.filter(pk=apartment_id).update(**Apartment.rating_stats(histogram))
+
+
+def rebuild_rating_stats(apartments=None, batch_size=500):
+    """
+    Recompute review aggregates from scratch with one grouped query.
+    Returns the number of apartments whose stored aggregates were out of date.
+    """
+    from reviews.models import Review
+
+    apartments = Apartment.objects.all() if apartments is None else apartments
+
+    histograms = defaultdict(dict)
+    counts = (
+        Review.objects.filter(apartment__in=apartments)
+        .values_list("apartment_id", "rating")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for apartment_id, rating, n in counts:
+        histograms[apartment_id][rating] = n
+
+    fields = ["average_rating", "review_count", *RATING_COUNT_FIELDS.values()]
+    changed = []
+    with transaction.atomic():
+        for apartment in apartments.only("id", *fields).iterator(chunk_size=batch_size):
+            values = Apartment.rating_stats(histograms.get(apartment.id, {}))
+            if any(getattr(apartment, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(apartment, field, value)
+                changed.append(apartment)
+        Apartment.objects.bulk_update(changed, fields, batch_size=batch_size)
+    if changed:
+        bump_change_counters("apartments")
+
+    return len(changed)
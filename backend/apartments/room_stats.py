@@ -0,0 +1,76 @@
+# apartments/room_stats.py
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+
+from ComradeHousingHub.conditional import bump_change_counters
+from .models import Apartment, Room, VACANT_COUNT_FIELDS
+from .university_counts import refresh_university_counts_for_apartments
+
+ROOM_STATS_FIELDS = ["min_rent", "max_rent", "room_count", "vacant_room_count", *VACANT_COUNT_FIELDS.values()]
+
+
+def _room_aggregates():
+    return {
+        "min_rent": Min("monthly_rent"),
+        "max_rent": Max("monthly_rent"),
+        "room_count": Count("id"),
+        "vacant_room_count": Count("id", filter=Q(is_vacant=True)),
+        **{
+            field: Count("id", filter=Q(is_vacant=True, room_type=room_type))
+            for room_type, field in VACANT_COUNT_FIELDS.items()
+        },
+    }
+
+
+def _empty_stats():
+    return {field: None if field.endswith("_rent") else 0 for field in ROOM_STATS_FIELDS}
+
+
+def refresh_room_stats(apartment_ids):
+    """
+    Recompute rent range and vacancy counts for the given apartments (one grouped query),
+    then the vacant room totals of their universities.
+    """
+    apartment_ids = set(apartment_ids)
+    if not apartment_ids:
+        return
+
+    rows = (
+        Room.objects.filter(apartment_id__in=apartment_ids)
+        .values("apartment_id")
+        .annotate(**_room_aggregates())
+        .order_by()
+    )
+    stats = {row.pop("apartment_id"): row for row in rows}
+
+    with transaction.atomic():
+        for apartment_id in apartment_ids:
+            # queryset.update() so Apartment save hooks are not triggered
+            Apartment.objects.filter(pk=apartment_id).update(**stats.get(apartment_id, _empty_stats()))
+        refresh_university_counts_for_apartments(apartment_ids)
+    bump_change_counters("apartments")
+
+
+def rebuild_room_stats(batch_size=500):
+    """
+    Recompute room aggregates for every apartment.
+    Returns the number of apartments whose stored values were out of date.
+    """
+    stats = {
+        row.pop("apartment_id"): row
+        for row in Room.objects.values("apartment_id").annotate(**_room_aggregates()).order_by()
+    }
+
+    changed = []
+    with transaction.atomic():
+        for apartment in Apartment.objects.only("id", *ROOM_STATS_FIELDS).iterator(chunk_size=batch_size):
+            values = stats.get(apartment.id, _empty_stats())
+            if any(getattr(apartment, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(apartment, field, value)
+                changed.append(apartment)
+        Apartment.objects.bulk_update(changed, ROOM_STATS_FIELDS, batch_size=batch_size)
+    if changed:
+        bump_change_counters("apartments")
+
+    return len(changed)
@@ -0,0 +1,140 @@
+# apartments/search.py
+"""
+Full-text search over apartment name, address, description and amenities.
+
+On SQLite this is an FTS5 table using apartments_apartment as external
+content, kept in sync by triggers. Schema changes that rebuild the
+apartments table drop those triggers, so ensure_search_index() runs
+after every migrate and reinstalls them. Other databases fall back to
+icontains lookups.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "apartments_apartment_fts"
+CONTENT_TABLE = "apartments_apartment"
+FTS_COLUMNS = ("name", "address", "description", "amenities")
+# bm25 column weights, in FTS_COLUMNS order
+FTS_WEIGHTS = (10.0, 5.0, 1.0, 2.0)
+
+_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {CONTENT_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, address, description, amenities)
+            VALUES (new.id, new.name, new.address, new.description, new.amenities);
+        END""",
+    f"{FTS_TABLE}_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {CONTENT_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, address, description, amenities)
+            VALUES ('delete', old.id, old.name, old.address, old.description, old.amenities);
+        END""",
+    f"{FTS_TABLE}_au": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF name, address, description, amenities ON {CONTENT_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, address, description, amenities)
+            VALUES ('delete', old.id, old.name, old.address, old.description, old.amenities);
+            INSERT INTO {FTS_TABLE}(rowid, name, address, description, amenities)
+            VALUES (new.id, new.name, new.address, new.description, new.amenities);
+        END""",
+}
+
+
+def is_supported(conn=connection):
+    return conn.vendor == "sqlite"
+
+
+def create_search_index(conn=connection):
+    """Create the FTS5 table and its triggers, then index existing rows."""
+    if not is_supported(conn):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+                {", ".join(FTS_COLUMNS)},
+                content='{CONTENT_TABLE}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )""")
+        for sql in _TRIGGERS.values():
+            cursor.execute(sql)
+    rebuild_search_index(conn)
+
+
+def drop_search_index(conn=connection):
+    if not is_supported(conn):
+        return
+    with conn.cursor() as cursor:
+        for name in _TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def ensure_search_index(conn=connection):
+    """Reinstall missing triggers (and reindex) after a table rebuild."""
+    if not is_supported(conn):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return  # migration not applied yet
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [CONTENT_TABLE])
+        present = {row[0] for row in cursor.fetchall()}
+    if not set(_TRIGGERS) <= present:
+        create_search_index(conn)
+
+
+def rebuild_search_index(conn=connection):
+    """Reindex every apartment from the content table."""
+    if not is_supported(conn):
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def to_match_query(text):
+    """
+    Turn free text into an FTS5 query: every word must match, and the
+    last word may be a prefix (search-as-you-type). Returns "" if there
+    is nothing to search for.
+    """
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return ""
+    quoted = ['"{}"'.format(term.replace('"', '""')) for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_apartments(queryset, text):
+    """
+    Restrict an Apartment queryset to full-text matches for `text`,
+    ordered by BM25 relevance (best first).
+    """
+    match = to_match_query(text)
+    if not match:
+        return queryset.none()
+
+    if not is_supported(connection):
+        words = re.findall(r"\w+", text)
+        condition = Q()
+        for word in words:
+            condition &= (
+                Q(name__icontains=word) | Q(address__icontains=word)
+                | Q(description__icontains=word) | Q(amenities__icontains=word)
+            )
+        return queryset.filter(condition)
+
+    # RawSQL rather than extra(): the filter takes the matching rowids; the rank is a
+    # second MATCH materialized once (LIMIT -1 stops SQLite from flattening it into
+    # a per-row FTS query) and looked up by apartment id.
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    matches = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+    rank = RawSQL(
+        f"SELECT hit.rank FROM (SELECT rowid AS id, bm25({FTS_TABLE}, {weights}) AS rank "
+        f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT -1) AS hit WHERE hit.id = {CONTENT_TABLE}.id",
+        [match], output_field=FloatField(),
+    )
+    return queryset.filter(id__in=matches).annotate(search_rank=rank).order_by("search_rank")
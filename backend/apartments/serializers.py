@@ -1,7 +1,16 @@
+from collections import defaultdict
+import os
+
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-from django.db.models import Avg
-from .models import Apartment, ApartmentImage, Room, RoomVideo
+from django.db import transaction
+from django.db.models import Prefetch
+from .images import srcsets
+from .landlord_summary import apply_summary_change, invalidate_landlord_stats
+from .models import (
+    Apartment, ApartmentImage, Room, RoomVideo, VideoUpload, MAX_VIDEO_SIZE_MB, VIDEO_EXTENSIONS,
+)
+from .room_stats import refresh_room_stats
 from reviews.models import Review
 from accounts.models import Profile
 
@@ -9,11 +18,15 @@ from accounts.models import Profile
 class ApartmentImageSerializer(serializers.ModelSerializer):
     """Serializer for the cover image of an apartment."""
     apartment = serializers.PrimaryKeyRelatedField(queryset=Apartment.objects.all())
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = ApartmentImage
-        fields = ["id", "apartment", "image", "caption"]
-        read_only_fields = ["id"]
+        fields = ["id", "apartment", "image", "caption", "width", "height", "srcset"]
+        read_only_fields = ["id", "width", "height"]
+
+    def get_srcset(self, obj):
+        return srcsets(obj, self.context.get("request"))
 
 # ---------------- Room Serializer ----------------
 class RoomSerializer(serializers.ModelSerializer):
@@ -35,6 +48,30 @@ class RoomVideoSerializer(serializers.ModelSerializer):
         fields = ["id", "apartment", "room_type", "video"]
         read_only_fields = ["id"]
 
+# ---------------- Chunked Video Upload Serializer ----------------
+class VideoUploadSerializer(serializers.ModelSerializer):
+    """Starts a resumable room video upload; chunks are then PATCHed to it (see apartments/uploads.py)."""
+    apartment = serializers.PrimaryKeyRelatedField(queryset=Apartment.objects.all())
+    checksum = serializers.RegexField(r"^[0-9a-fA-F]{64}$", required=False, allow_blank=True)
+
+    class Meta:
+        model = VideoUpload
+        fields = [
+            "id", "apartment", "room_type", "filename", "size", "checksum",
+            "offset", "status", "error", "room_video", "created_at",
+        ]
+        read_only_fields = ["id", "offset", "status", "error", "room_video", "created_at"]
+
+    def validate_filename(self, value):
+        if not any(value.lower().endswith(ext) for ext in VIDEO_EXTENSIONS):
+            raise ValidationError("Only MP4, MOV, or AVI videos are allowed.")
+        return os.path.basename(value)
+
+    def validate_size(self, value):
+        if not 0 < value <= MAX_VIDEO_SIZE_MB * 1024 * 1024:
+            raise ValidationError(f"Video size should be between 1 byte and {MAX_VIDEO_SIZE_MB}MB.")
+        return value
+
 # ---------------- Review Serializer (Nested) ----------------
 class ReviewSerializer(serializers.ModelSerializer):
     """Read-only serializer for apartment reviews."""
@@ -45,6 +82,19 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ["id", "reviewer", "rating", "comment", "created_at"]
         read_only_fields = ["id", "created_at", "reviewer"]
 
+# Reviews embedded in an apartment payload; the rest are paged through
+# the nested /api/reviews/apartments/{id}/reviews/ route.
+EMBEDDED_REVIEW_LIMIT = 5
+
+
+def latest_reviews_prefetch():
+    """Prefetch the newest EMBEDDED_REVIEW_LIMIT reviews (with their user) per apartment in one windowed query."""
+    return Prefetch(
+        "reviews",
+        queryset=Review.objects.select_related("user").order_by("-created_at", "-id")[:EMBEDDED_REVIEW_LIMIT],
+        to_attr="latest_reviews",
+    )
+
 # ---------------- Grouped Room Serializer ----------------
 class GroupedRoomSerializer(serializers.Serializer):
     """Groups rooms by room_type, showing vacant and booked rooms separately."""
@@ -59,8 +109,8 @@ class ApartmentReadSerializer(serializers.ModelSerializer):
     videos = RoomVideoSerializer(many=True, read_only=True)
     distance_km = serializers.SerializerMethodField()
     landlord = serializers.ReadOnlyField(source="landlord.user.username")
-    reviews = ReviewSerializer(many=True, read_only=True)
-    average_rating = serializers.SerializerMethodField()
+    reviews = serializers.SerializerMethodField()
+    rating_histogram = serializers.ReadOnlyField()
     grouped_rooms = serializers.SerializerMethodField()
 
     class Meta:
@@ -69,39 +119,137 @@ class ApartmentReadSerializer(serializers.ModelSerializer):
             "id", "university", "landlord", "name", "description",
             "address", "amenities", "is_approved", "created_at", "lat", "lon",
             "distance_km", "image", "videos", "reviews", "average_rating",
-            "grouped_rooms"
+            "review_count", "rating_histogram", "min_rent", "max_rent",
+            "room_count", "vacant_room_count", "grouped_rooms"
         ]
         read_only_fields = [
             "id", "created_at", "lat", "lon", "is_approved",
-            "landlord", "reviews", "average_rating"
+            "landlord", "average_rating", "review_count",
+            "min_rent", "max_rent", "room_count", "vacant_room_count"
         ]
 
     def get_distance_km(self, obj):
-        distance = obj.distance_from_university()
-        return distance if distance is not None else 0.0
-
-    def get_average_rating(self, obj):
-        return obj.reviews.aggregate(avg=Avg("rating"))["avg"] or 0
+        return obj.distance_km if obj.distance_km is not None else 0.0
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load every relation this serializer renders in a fixed number of queries."""
+        return queryset.select_related(
+            "landlord__user", "image"
+        ).prefetch_related("rooms", "videos", latest_reviews_prefetch())
+
+    def get_reviews(self, obj):
+        """Newest EMBEDDED_REVIEW_LIMIT reviews; review_count has the total."""
+        reviews = getattr(obj, "latest_reviews", None)
+        if reviews is None:
+            reviews = obj.reviews.select_related("user").order_by("-created_at", "-id")[:EMBEDDED_REVIEW_LIMIT]
+        return ReviewSerializer(reviews, many=True).data
 
     def get_grouped_rooms(self, obj):
-        grouped_data = []
-        room_types = obj.rooms.values_list("room_type", flat=True).distinct()
-
-        for room_type in room_types:
-            rooms_of_type = obj.rooms.filter(room_type=room_type)
-            vacant_rooms = rooms_of_type.filter(is_vacant=True)
-            booked_rooms = rooms_of_type.filter(is_vacant=False)
-
-            grouped_data.append({
+        # Group in one pass over the (prefetched) rooms, keeping room types
+        # in the order they first appear.
+        groups = {}
+        for room in obj.rooms.all():
+            group = groups.setdefault(room.room_type, {"vacant": [], "booked": []})
+            group["vacant" if room.is_vacant else "booked"].append(room)
+
+        return [
+            {
                 "room_type": room_type,
-                "total_rooms": rooms_of_type.count(),
-                "vacant_rooms": RoomSerializer(vacant_rooms, many=True).data,
-                "booked_rooms": RoomSerializer(booked_rooms, many=True).data,
-            })
+                "total_rooms": len(group["vacant"]) + len(group["booked"]),
+                "vacant_rooms": RoomSerializer(group["vacant"], many=True).data,
+                "booked_rooms": RoomSerializer(group["booked"], many=True).data,
+            }
+            for room_type, group in groups.items()
+        ]
+
+# ---------------- Apartment List Serializer ----------------
+class ApartmentListSerializer(ApartmentReadSerializer):
+    """
+    Compact apartment card for list endpoints.
+    - ?fields=a,b limits the output to the named fields.
+    - ?expand=videos,reviews adds heavier fields that are left out by default.
+    Relations that end up unused are neither serialized nor prefetched
+    (see setup_eager_loading).
+    """
+    cover_image = serializers.SerializerMethodField()
+    cover_srcset = serializers.SerializerMethodField()
+
+    # Fields shown when the request names neither ?fields= nor ?expand=
+    default_fields = [
+        "id", "university", "name", "description", "address", "amenities",
+        "is_approved", "created_at", "distance_km", "cover_image", "cover_srcset",
+        "min_rent", "max_rent", "vacant_room_count", "average_rating", "review_count",
+    ]
+
+    # field -> (select_related paths, prefetch_related lookups) it needs
+    eager_loading = {
+        "cover_image": (["image"], []),
+        "cover_srcset": (["image"], []),
+        "image": (["image"], []),
+        "landlord": (["landlord__user"], []),
+        "videos": ([], ["videos"]),
+        "reviews": ([], [latest_reviews_prefetch()]),
+        "grouped_rooms": ([], ["rooms"]),
+    }
+
+    class Meta(ApartmentReadSerializer.Meta):
+        fields = ApartmentReadSerializer.Meta.fields + ["cover_image", "cover_srcset"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = self.context.get("fields")
+        if wanted is not None:
+            for name in set(self.fields) - set(wanted):
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, query_params):
+        """Field names to render for a request's ?fields= / ?expand= parameters."""
+        def names(param):
+            return [n.strip() for n in query_params.get(param, "").split(",") if n.strip()]
+
+        fields, expand = names("fields"), names("expand")
+        unknown = set(fields + expand) - set(cls.Meta.fields)
+        if unknown:
+            raise ValidationError({"fields": f"Unknown fields: {', '.join(sorted(unknown))}"})
+        return list(dict.fromkeys((fields or cls.default_fields) + expand))
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """Join/prefetch only the relations the requested fields need."""
+        fields = cls.default_fields if fields is None else fields
+        select, prefetch = [], []
+        for name in fields:
+            related, lookups = cls.eager_loading.get(name, ([], []))
+            select += related
+            prefetch += lookups
+        if select:
+            queryset = queryset.select_related(*dict.fromkeys(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    def get_cover_image(self, obj):
+        try:
+            image = obj.image
+        except ApartmentImage.DoesNotExist:
+            return None
+        request = self.context.get("request")
+        url = image.image.url
+        return request.build_absolute_uri(url) if request else url
 
-        return grouped_data
+    def get_cover_srcset(self, obj):
+        try:
+            image = obj.image
+        except ApartmentImage.DoesNotExist:
+            return None
+        return srcsets(image, self.context.get("request"))
 
 # ---------------- Apartment Write Serializer ----------------
+ROOM_BATCH_SIZE = 500
+
+
 class ApartmentWriteSerializer(serializers.ModelSerializer):
     """
     Handles apartment creation and updates.
@@ -125,32 +273,16 @@ class ApartmentWriteSerializer(serializers.ModelSerializer):
         room_types_data = self.context['request'].data.get("roomTypes", [])
         cover_image = self.context['request'].data.get("coverImage")
 
-        # Create apartment
-        apartment = Apartment.objects.create(landlord=landlord_profile, **validated_data)
+        with transaction.atomic():
+            # Create apartment
+            apartment = Apartment.objects.create(landlord=landlord_profile, **validated_data)
 
-        # Set cover image if provided
-        if cover_image:
-            from .models import ApartmentImage
-            ApartmentImage.objects.create(apartment=apartment, image=cover_image)
+            # Set cover image if provided
+            if cover_image:
+                ApartmentImage.objects.create(apartment=apartment, image=cover_image)
 
-        # Create rooms and room videos
-        for type_data in room_types_data:
-            room_type = type_data.get("type")
-            monthly_rent = type_data.get("monthly_rent")
-            video_file = type_data.get("video")
-            rooms_list = type_data.get("rooms", [])
-
-            if video_file:
-                RoomVideo.objects.create(apartment=apartment, room_type=room_type, video=video_file)
-
-            for room in rooms_list:
-                Room.objects.create(
-                    apartment=apartment,
-                    room_type=room_type,
-                    label=room.get("label"),
-                    monthly_rent=monthly_rent,
-                    is_vacant=(room.get("status") == "Vacant")
-                )
+            # Create rooms and room videos
+            self._save_room_types(apartment, room_types_data, created=True)
 
         return apartment
 
@@ -158,19 +290,35 @@ class ApartmentWriteSerializer(serializers.ModelSerializer):
         room_types_data = self.context['request'].data.get("roomTypes", [])
         cover_image = self.context['request'].data.get("coverImage")
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            # Update cover image
+            if cover_image:
+                ApartmentImage.objects.update_or_create(
+                    apartment=instance,
+                    defaults={"image": cover_image}
+                )
+
+            # Update rooms and videos
+            self._save_room_types(instance, room_types_data)
 
-        # Update cover image
-        if cover_image:
-            from .models import ApartmentImage
-            ApartmentImage.objects.update_or_create(
-                apartment=instance,
-                defaults={"image": cover_image}
-            )
+        return instance
+
+    def _save_room_types(self, apartment, room_types_data, created=False):
+        """
+        Write the rooms and videos of every room type. Existing rooms and videos are
+        fetched once; new rooms go in with bulk_create and existing ones with a few
+        set-based UPDATEs. Bulk writes skip the Room signals, so derived data is
+        refreshed here.
+        """
+        existing_rooms = {} if created else {room.id: room for room in apartment.rooms.only("id", "apartment_id", "label")}
+        existing_videos = {} if created else {video.room_type: video for video in apartment.videos.all()}
+        new_rooms, relabelled_rooms = [], []
+        changed_rooms = defaultdict(list)
 
-        # Update rooms and videos
         for type_data in room_types_data:
             room_type = type_data.get("type")
             monthly_rent = type_data.get("monthly_rent")
@@ -178,28 +326,39 @@ class ApartmentWriteSerializer(serializers.ModelSerializer):
             rooms_list = type_data.get("rooms", [])
 
             if video_file:
-                RoomVideo.objects.update_or_create(
-                    apartment=instance,
-                    room_type=room_type,
-                    defaults={"video": video_file}
-                )
+                # saved one by one: FileField uploads happen in save(), at most one per room type
+                video = existing_videos.get(room_type) or RoomVideo(apartment=apartment, room_type=room_type)
+                video.video = video_file
+                video.save()
 
             for room in rooms_list:
+                values = {
+                    "room_type": room_type,
+                    "label": room.get("label"),
+                    "monthly_rent": monthly_rent,
+                    "is_vacant": room.get("status") == "Vacant",
+                }
                 room_id = room.get("id")
-                if room_id:
-                    r = Room.objects.get(id=room_id, apartment=instance)
-                    r.label = room.get("label")
-                    r.room_type = room_type
-                    r.monthly_rent = monthly_rent
-                    r.is_vacant = (room.get("status") == "Vacant")
-                    r.save()
-                else:
-                    Room.objects.create(
-                        apartment=instance,
-                        room_type=room_type,
-                        label=room.get("label"),
-                        monthly_rent=monthly_rent,
-                        is_vacant=(room.get("status") == "Vacant")
-                    )
-
-        return instance
+                if not room_id:
+                    new_rooms.append(Room(apartment=apartment, **values))
+                    continue
+                try:
+                    existing = existing_rooms[int(room_id)]
+                except (KeyError, TypeError, ValueError):
+                    raise ValidationError({"roomTypes": f"Room {room_id} does not belong to this apartment."})
+                # rooms of a type share type and rent, so the shared columns become
+                # one UPDATE per (type, rent, vacancy) group; only changed labels go row by row
+                changed_rooms[values["room_type"], values["monthly_rent"], values["is_vacant"]].append(existing.id)
+                if existing.label != values["label"]:
+                    existing.label = values["label"]
+                    relabelled_rooms.append(existing)
+
+        Room.objects.bulk_create(new_rooms, batch_size=ROOM_BATCH_SIZE)
+        for (room_type, monthly_rent, is_vacant), ids in changed_rooms.items():
+            Room.objects.filter(id__in=ids).update(room_type=room_type, monthly_rent=monthly_rent, is_vacant=is_vacant)
+        Room.objects.bulk_update(relabelled_rooms, ["label"], batch_size=ROOM_BATCH_SIZE)
+
+        if new_rooms or changed_rooms:
+            refresh_room_stats([apartment.id])
+            apply_summary_change(apartment.landlord_id, room_count=len(new_rooms))
+            invalidate_landlord_stats(apartment.landlord_id)  # rents and vacancy are not in the summary
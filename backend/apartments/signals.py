@@ -0,0 +1,143 @@
+# apartments/signals.py
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from ComradeHousingHub.conditional import bump_change_counters
+from universities.models import University
+from .landlord_summary import (
+    apply_summary_change, invalidate_landlord_stats, landlord_of_apartment, rebuild_landlord_summaries,
+)
+from .models import Apartment, ApartmentImage, Room, RoomVideo
+from .room_stats import refresh_room_stats
+from .spatial import record_location_change
+from .university_counts import refresh_university_counts
+
+
+@receiver(post_save, sender=Apartment)
+def update_spatial_index(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # runs before the handlers below reset _loaded_listing
+    _, lat, lon = getattr(instance, "_loaded_location", (None, None, None))
+    _, approved = getattr(instance, "_loaded_listing", (None, None))
+    if created or (lat, lon, approved) != (instance.lat, instance.lon, instance.is_approved):
+        record_location_change(instance.pk)
+
+
+@receiver(post_delete, sender=Apartment)
+def remove_from_spatial_index(sender, instance, **kwargs):
+    record_location_change(instance.pk)
+
+
+@receiver(post_save, sender=University)
+def refresh_apartment_distances(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created and instance.coordinates_changed:
+        Apartment.refresh_distances([instance])
+    instance._loaded_coords = (instance.lat, instance.lng)
+
+
+@receiver(post_save, sender=Room)
+def update_room_stats_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_loaded_apartment_id", None)
+    refresh_room_stats({instance.apartment_id, previous} - {None})
+    instance._loaded_apartment_id = instance.apartment_id
+
+
+@receiver(post_delete, sender=Room)
+def update_room_stats_on_delete(sender, instance, **kwargs):
+    refresh_room_stats([instance.apartment_id])
+
+
+# --- Landlord summary ---
+@receiver(post_save, sender=Apartment)
+def update_landlord_summary_on_apartment_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_loaded_landlord_id", None)
+    if created:
+        apply_summary_change(instance.landlord_id, apartment_count=1)
+    elif previous != instance.landlord_id:
+        # rooms, bookings and payments move with the apartment
+        rebuild_landlord_summaries({previous, instance.landlord_id} - {None})
+    instance._loaded_landlord_id = instance.landlord_id
+
+
+@receiver(post_delete, sender=Apartment)
+def update_landlord_summary_on_apartment_delete(sender, instance, **kwargs):
+    apply_summary_change(instance.landlord_id, create=False, apartment_count=-1)
+
+
+@receiver(pre_save, sender=Room)
+def remember_previous_room_landlord(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, "_loaded_apartment_id", None)
+    instance._previous_landlord_id = None
+    if not raw and instance.pk and previous != instance.apartment_id:
+        instance._previous_landlord_id = landlord_of_apartment(previous)
+
+
+@receiver(post_save, sender=Room)
+def update_landlord_summary_on_room_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        apply_summary_change(landlord_of_apartment(instance.apartment_id), room_count=1)
+        return
+    previous = getattr(instance, "_previous_landlord_id", None)
+    if previous is not None:
+        landlord_id = landlord_of_apartment(instance.apartment_id)
+        if landlord_id != previous:
+            rebuild_landlord_summaries({previous, landlord_id} - {None})
+
+
+@receiver(post_delete, sender=Room)
+def update_landlord_summary_on_room_delete(sender, instance, **kwargs):
+    apply_summary_change(landlord_of_apartment(instance.apartment_id), create=False, room_count=-1)
+
+
+# --- Landlord dashboard cache ---
+# Summary changes bump the counter themselves; these cover edits that only change dashboard rows.
+@receiver(post_save, sender=Apartment)
+def invalidate_stats_for_apartment(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        invalidate_landlord_stats(instance.landlord_id)
+
+
+@receiver(post_save, sender=Room)
+@receiver([post_save, post_delete], sender=ApartmentImage)
+@receiver([post_save, post_delete], sender=RoomVideo)
+def invalidate_stats_for_child(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not (sender is Room and created):
+        invalidate_landlord_stats(landlord_of_apartment(instance.apartment_id))
+
+
+# --- University counts ---
+@receiver(post_save, sender=Apartment)
+def update_university_counts_on_apartment_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    listing = (instance.university_id, instance.is_approved)
+    previous = getattr(instance, "_loaded_listing", None)
+    if created:
+        if instance.is_approved:
+            refresh_university_counts([instance.university_id])
+    elif previous != listing:
+        # approved, unapproved or moved to another university
+        refresh_university_counts({instance.university_id, previous[0] if previous else None})
+    instance._loaded_listing = listing
+
+
+@receiver(post_delete, sender=Apartment)
+def update_university_counts_on_apartment_delete(sender, instance, **kwargs):
+    if instance.is_approved:
+        refresh_university_counts([instance.university_id])
+
+
+# --- Catalog change counters (conditional GETs) ---
+@receiver([post_save, post_delete], sender=Apartment)
+@receiver([post_save, post_delete], sender=Room)
+@receiver([post_save, post_delete], sender=ApartmentImage)
+@receiver([post_save, post_delete], sender=RoomVideo)
+def bump_apartments_counter(sender, **kwargs):
+    bump_change_counters("apartments")
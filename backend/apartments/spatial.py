@@ -0,0 +1,111 @@
+# apartments/spatial.py
+"""
+Process-wide grid index over approved apartments with coordinates.
+
+Built lazily on first use. apartments.signals log every apartment that is
+added, moved, approved, unapproved or deleted (ApartmentLocationChange).
+Each query reads the log entries after the last one its index applied and
+re-reads only those apartments, so every worker picks up writes made by
+the others without rescanning the table.
+
+The index is rebuilt from scratch every FULL_REBUILD_AFTER seconds, well
+within LOG_RETENTION. That way pruned entries are never needed. It also
+bounds how long an entry committed out of id order (possible with
+database sequences) can be missed.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .geo import GridIndex
+
+FULL_REBUILD_AFTER = 15 * 60
+LOG_RETENTION = timedelta(hours=1)
+PRUNE_EVERY = 100  # entries logged between prunes
+
+_index = None
+_build_lock = threading.Lock()
+_apply_lock = threading.Lock()
+
+
+def record_location_change(pk):
+    """Log that apartment `pk` may have entered, moved in or left the index, once the transaction commits."""
+    transaction.on_commit(lambda: _log_change(pk))
+
+
+def _log_change(pk):
+    from .models import ApartmentLocationChange
+
+    change = ApartmentLocationChange.objects.create(apartment_id=pk)
+    if change.pk % PRUNE_EVERY == 0:
+        ApartmentLocationChange.objects.filter(created_at__lt=timezone.now() - LOG_RETENTION).delete()
+
+
+def get_apartment_index():
+    """The current index, patched with logged changes (or rebuilt when cold or due)."""
+    global _index
+    index = _index
+    if index is None or time.monotonic() - index.built_at > FULL_REBUILD_AFTER:
+        with _build_lock:
+            index = _index
+            if index is None or time.monotonic() - index.built_at > FULL_REBUILD_AFTER:
+                index = _index = build_apartment_index()
+        return index
+    apply_location_changes(index)
+    return index
+
+
+def build_apartment_index():
+    from .models import Apartment, ApartmentLocationChange
+
+    index = GridIndex()
+    # log position read first, so changes made while building are applied afterwards
+    index.last_change = ApartmentLocationChange.objects.aggregate(last=Max("id"))["last"] or 0
+    index.built_at = time.monotonic()
+    index.replace_all(
+        Apartment.objects.filter(is_approved=True, lat__isnull=False, lon__isnull=False)
+        .values_list("id", "lat", "lon")
+        .iterator(chunk_size=5000)
+    )
+    return index
+
+
+def _changes_since(last_change):
+    from .models import ApartmentLocationChange
+
+    return list(ApartmentLocationChange.objects.filter(id__gt=last_change).values_list("id", "apartment_id"))
+
+
+def apply_location_changes(index):
+    """Upsert or discard the apartments logged since the index last looked."""
+    from .models import Apartment
+
+    if not _changes_since(index.last_change):
+        return
+    with _apply_lock:
+        changes = _changes_since(index.last_change)  # another thread may have applied some meanwhile
+        if not changes:
+            return
+        ids = {apartment_id for _, apartment_id in changes}
+        located = {
+            pk: (lat, lon)
+            for pk, lat, lon in Apartment.objects.filter(
+                pk__in=ids, is_approved=True, lat__isnull=False, lon__isnull=False
+            ).values_list("id", "lat", "lon")
+        }
+        for pk in ids:
+            if pk in located:
+                index.upsert(pk, *located[pk])
+            else:
+                index.discard(pk)
+        index.last_change = max(change_id for change_id, _ in changes)
+
+
+def reset_apartment_index():
+    """Drop this process's index; the next query rebuilds it from the database."""
+    global _index
+    _index = None
@@ -1,3 +1,1155 @@
-from django.test import TestCase
+import json
+from io import BytesIO, StringIO
+import os
+import random
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from accounts.models import Profile
+from reviews.models import Review
+from universities.models import University
+from .geo import GridIndex, haversine_km
+from .models import Apartment, Room, RoomVideo, VideoUpload
+from .spatial import reset_apartment_index
+
+
+class ApartmentQueryCountTests(TestCase):
+    """The apartment endpoints must not issue queries per apartment or per room."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.university = University.objects.create(name="Kenyatta University", lat=-1.2171, lng=36.9435)
+        landlord_user = User.objects.create(username="landlord")
+        cls.landlord = Profile.objects.create(user=landlord_user, role="landlord")
+        cls.student = User.objects.create(username="student")
+
+        for i in range(5):
+            apartment = Apartment.objects.create(
+                university=cls.university, landlord=cls.landlord,
+                name=f"Apartment {i}", is_approved=True,
+            )
+            for j, room_type in enumerate(["single", "bedsitter", "single", "onebedroom"]):
+                Room.objects.create(
+                    apartment=apartment, label=f"Room {j}", room_type=room_type,
+                    monthly_rent=5000 + j, is_vacant=(j % 2 == 0),
+                )
+            Review.objects.create(apartment=apartment, user=cls.student, rating=4)
+
+        cls.apartment = apartment
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_list_query_count(self):
+        # change counter, count, apartments (cover image joined)
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/apartments/apartments/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 5)
+        self.assertNotIn("reviews", response.data["results"][0])
+
+    def test_list_expand_query_count(self):
+        # change counter, count, apartments, rooms, reviews
+        with self.assertNumQueries(5):
+            response = self.client.get("/api/apartments/apartments/", {"expand": "grouped_rooms,reviews"})
+        card = response.data["results"][0]
+        self.assertIn("cover_image", card)
+        self.assertEqual(len(card["reviews"]), 1)
+        self.assertEqual(card["grouped_rooms"][0]["room_type"], "single")
+
+    def test_sparse_fieldset(self):
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/apartments/apartments/", {"fields": "id,name"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "name"})
+
+        response = self.client.get("/api/apartments/apartments/", {"fields": "id,password"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_university_apartments_use_compact_cards(self):
+        with self.assertNumQueries(4):  # university, count, apartments, videos
+            response = self.client.get(
+                f"/api/universities/universities/{self.university.id}/apartments/", {"expand": "videos"}
+            )
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(response.data["results"][0]["videos"], [])
+
+    def test_retrieve_query_count(self):
+        # change counter, apartment, rooms, videos, reviews
+        with self.assertNumQueries(5):
+            response = self.client.get(f"/api/apartments/apartments/{self.apartment.id}/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_grouped_rooms_shape(self):
+        response = self.client.get(f"/api/apartments/apartments/{self.apartment.id}/")
+        grouped = response.data["grouped_rooms"]
+
+        self.assertEqual([g["room_type"] for g in grouped], ["single", "bedsitter", "onebedroom"])
+        single = grouped[0]
+        self.assertEqual(single["total_rooms"], 2)
+        self.assertEqual([r["label"] for r in single["vacant_rooms"]], ["Room 0", "Room 2"])
+        self.assertEqual(single["booked_rooms"], [])
+        self.assertEqual(grouped[1]["total_rooms"], 1)
+        self.assertEqual(len(grouped[1]["booked_rooms"]), 1)
+        self.assertEqual(response.data["average_rating"], 4)
+
+
+class GridIndexTests(TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        points = [(i, rng.uniform(-1.5, -0.9), rng.uniform(36.6, 37.2)) for i in range(2000)]
+        index = GridIndex()
+        index.replace_all(points)
+
+        hits = index.nearby(-1.2171, 36.9435, 3)
+        expected = sorted(
+            (key, haversine_km(-1.2171, 36.9435, lat, lon)) for key, lat, lon in points
+            if haversine_km(-1.2171, 36.9435, lat, lon) <= 3
+        )
+        self.assertEqual(sorted(key for key, _ in hits), [key for key, _ in expected])
+        self.assertEqual([d for _, d in hits], sorted(d for _, d in hits))
+
+    def test_upsert_moves_and_discard_removes(self):
+        index = GridIndex()
+        index.upsert(1, -1.0, 36.0)
+        index.upsert(1, -1.3, 36.8)
+        self.assertEqual([key for key, _ in index.nearby(-1.3, 36.8, 1)], [1])
+        self.assertEqual(index.nearby(-1.0, 36.0, 1), [])
+        index.discard(1)
+        self.assertEqual(len(index), 0)
+
+
+class NearbyApartmentsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.university = University.objects.create(name="Egerton University")
+        cls.landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+
+    def setUp(self):
+        reset_apartment_index()
+        self.addCleanup(reset_apartment_index)
+        self.client = APIClient()
+
+    def make_apartment(self, name, lat, lon, approved=True):
+        return Apartment.objects.create(
+            university=self.university, landlord=self.landlord, name=name,
+            lat=lat, lon=lon, is_approved=approved,
+        )
+
+    def nearby(self, **params):
+        return self.client.get("/api/apartments/nearby/", {"lat": -0.37, "lon": 35.93, **params})
+
+    def test_orders_by_distance_and_refreshes_on_save(self):
+        far = self.make_apartment("Far", -0.40, 35.93)
+        self.make_apartment("Near", -0.371, 35.93)
+        self.make_apartment("Pending", -0.37, 35.93, approved=False)
+
+        response = self.nearby(radius_km=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([a["name"] for a in response.data["results"]], ["Near", "Far"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            far.lat = 60.0
+            far.save()
+        response = self.nearby(radius_km=5)
+        self.assertEqual([a["name"] for a in response.data["results"]], ["Near"])
+
+    def test_rejects_bad_coordinates(self):
+        self.assertEqual(self.client.get("/api/apartments/nearby/").status_code, 400)
+        self.assertEqual(self.nearby(lat="north").status_code, 400)
+        self.assertEqual(self.nearby(radius_km=-1).status_code, 400)
+        for value in ("nan", "inf"):
+            self.assertEqual(self.nearby(radius_km=value).status_code, 400)
+            self.assertEqual(self.nearby(lat=value).status_code, 400)
+
+    def test_applies_logged_changes_without_rebuilding(self):
+        from .spatial import _log_change, get_apartment_index
+
+        moved = self.make_apartment("Moved", -0.40, 35.93)
+        gone = self.make_apartment("Gone", -0.37, 35.93)
+        self.assertEqual([a["name"] for a in self.nearby(radius_km=1).data["results"]], ["Gone"])
+        index = get_apartment_index()
+
+        # another worker moves one apartment and deletes the other: only the log tells this process
+        Apartment.objects.filter(pk=moved.pk).update(lat=-0.37)
+        _log_change(moved.pk)
+        gone_pk = gone.pk
+        Apartment.objects.filter(pk=gone_pk).delete()
+        _log_change(gone_pk)
+        with self.assertNumQueries(3):  # log entries (checked, then re-read under the lock), the two apartments
+            self.assertIs(get_apartment_index(), index)
+        self.assertEqual([a["name"] for a in self.nearby(radius_km=1).data["results"]], ["Moved"])
+        self.assertNotIn(gone_pk, index)
+
+
+class DistanceMatrixTests(TestCase):
+    url = "/api/apartments/calculate-distance/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.origins = [[-1.2171, 36.9435], [0.0926, 34.2587]]
+        self.destinations = [[-1.28, 36.82], [-1.2171, 36.9435], [-0.37, 35.93]]
+
+    def test_single_pair_matches_matrix(self):
+        single = self.client.get(self.url, {
+            "uni_lat": -1.2171, "uni_lon": 36.9435, "apt_lat": -1.28, "apt_lon": 36.82,
+        })
+        batch = self.client.post(self.url, {
+            "origins": self.origins, "destinations": self.destinations,
+        }, format="json")
+
+        self.assertEqual(batch.status_code, 200)
+        matrix = batch.data["distances_km"]
+        self.assertEqual((len(matrix), len(matrix[0])), (2, 3))
+        self.assertEqual(matrix[0][0], single.data["distance_km"])
+        self.assertEqual(matrix[0][1], 0)
+
+    def test_streamed_rows(self):
+        response = self.client.post(self.url, {
+            "origins": self.origins, "destinations": self.destinations, "stream": True,
+        }, format="json")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2], round(haversine_km(0.0926, 34.2587, -0.37, 35.93), 2))
+
+    def test_rejects_malformed_points(self):
+        for body in ({"origins": [], "destinations": [[0, 0]]},
+                     {"origins": [[0, 0, 0]], "destinations": [[0, 0]]},
+                     {"origins": [[95, 0]], "destinations": [[0, 0]]}):
+            self.assertEqual(self.client.post(self.url, body, format="json").status_code, 400)
+
+
+class StoredDistanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        cls.university = University.objects.create(name="Kenyatta University", lat=-1.2171, lng=36.9435)
+        cls.other = University.objects.create(name="Maseno University", lat=-0.0037, lng=34.6062)
+
+    def make_apartment(self, name, lat, lon):
+        return Apartment.objects.create(
+            university=self.university, landlord=self.landlord, name=name, lat=lat, lon=lon, is_approved=True,
+        )
+
+    def test_distance_follows_apartment_and_university(self):
+        apartment = self.make_apartment("Block A", -1.28, 36.82)
+        self.assertEqual(apartment.distance_km, round(haversine_km(-1.2171, 36.9435, -1.28, 36.82), 2))
+
+        apartment.university = self.other
+        apartment.save()
+        apartment.refresh_from_db()
+        self.assertEqual(apartment.distance_km, round(haversine_km(-0.0037, 34.6062, -1.28, 36.82), 2))
+
+        self.other.lat, self.other.lng = -1.2171, 36.9435
+        self.other.save()
+        apartment.refresh_from_db()
+        self.assertEqual(apartment.distance_km, round(haversine_km(-1.2171, 36.9435, -1.28, 36.82), 2))
+
+        self.other.lat = None
+        self.other.save()
+        apartment.refresh_from_db()
+        self.assertIsNone(apartment.distance_km)
+
+    def test_order_and_filter_by_distance(self):
+        self.make_apartment("Far", -1.40, 36.94)
+        self.make_apartment("Near", -1.22, 36.94)
+        self.make_apartment("Middle", -1.30, 36.94)
+
+        client = APIClient()
+        response = client.get("/api/apartments/apartments/", {"ordering": "distance_km"})
+        self.assertEqual([a["name"] for a in response.data["results"]], ["Near", "Middle", "Far"])
+
+        response = client.get("/api/apartments/apartments/", {"max_distance_km": 10})
+        self.assertEqual(sorted(a["name"] for a in response.data["results"]), ["Middle", "Near"])
+
+
+class FullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        university = University.objects.create(name="Moi University")
+        landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        cls.make = lambda name, **fields: Apartment.objects.create(
+            university=university, landlord=landlord, name=name, is_approved=True, **fields
+        )
+
+    def search(self, q):
+        response = APIClient().get("/api/apartments/apartments/", {"q": q})
+        return [a["name"] for a in response.data["results"]]
+
+    def test_ranks_and_matches_prefixes(self):
+        self.make("Kesses Court", description="Close to the Kesses gate, borehole water", amenities=["WiFi"])
+        self.make("Sunrise Hostel", description="Quiet rooms near Kesses", amenities=["WiFi", "Parking"])
+        self.make("Annex Plaza", address="Eldoret town")
+
+        self.assertEqual(self.search("kesses"), ["Kesses Court", "Sunrise Hostel"])
+        self.assertEqual(self.search("wifi park"), ["Sunrise Hostel"])
+        self.assertEqual(self.search("eldor"), ["Annex Plaza"])
+        self.assertEqual(self.search('"; DROP'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        apartment = self.make("Green Villa")
+        apartment.name = "Blue Villa"
+        apartment.save()
+        self.assertEqual(self.search("green"), [])
+        self.assertEqual(self.search("blue"), ["Blue Villa"])
+
+        Apartment.objects.filter(pk=apartment.pk).update(description="swimming pool")
+        self.assertEqual(self.search("swimming"), ["Blue Villa"])
+
+        apartment.delete()
+        self.assertEqual(self.search("villa"), [])
+
+
+class AmenityIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        university = University.objects.create(name="Chuka University")
+        landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        for name, amenities in [
+            ("All In", ["Wi-Fi", "Borehole water", "Parking", "Gym"]),
+            ("No Car", ["WiFi", "water"]),
+            ("Encoded", '["wifi", "Car park", "Water"]'),
+            ("Bare", []),
+        ]:
+            Apartment.objects.create(
+                university=university, landlord=landlord, name=name, amenities=amenities, is_approved=True,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_filters_on_all_requested_amenities(self):
+        response = self.client.get("/api/apartments/apartments/", {"amenities": "wifi,water,parking"})
+        self.assertEqual(sorted(a["name"] for a in response.data["results"]), ["All In", "Encoded"])
+
+        response = self.client.get("/api/apartments/apartments/", {"amenities": "wifi,sauna"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_facet_counts(self):
+        response = self.client.get("/api/apartments/apartments/amenities/")
+        counts = {facet["code"]: facet["count"] for facet in response.data}
+        self.assertEqual((counts["wifi"], counts["parking"], counts["gym"], counts["cctv"]), (3, 2, 1, 0))
+
+        response = self.client.get("/api/apartments/apartments/amenities/", {"amenities": "parking"})
+        counts = {facet["code"]: facet["count"] for facet in response.data}
+        self.assertEqual((counts["wifi"], counts["gym"]), (2, 1))
+
+        response = self.client.get("/api/apartments/apartments/amenities/", {"q": "encoded"})
+        counts = {facet["code"]: facet["count"] for facet in response.data}
+        self.assertEqual((counts["wifi"], counts["gym"]), (1, 0))
+
+    def test_rebuild_command(self):
+        Apartment.objects.update(amenity_mask=0)
+        call_command("rebuild_amenity_index", stdout=StringIO())
+        response = self.client.get("/api/apartments/apartments/", {"amenities": "gym"})
+        self.assertEqual([a["name"] for a in response.data["results"]], ["All In"])
+
+
+class RoomStatsAndFacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.moi = University.objects.create(name="Moi University")
+        cls.maseno = University.objects.create(name="Maseno University")
+        landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        cls.cheap = Apartment.objects.create(university=cls.moi, landlord=landlord, name="Cheap", is_approved=True)
+        cls.mid = Apartment.objects.create(university=cls.moi, landlord=landlord, name="Mid", is_approved=True)
+        cls.full = Apartment.objects.create(university=cls.maseno, landlord=landlord, name="Full", is_approved=True)
+
+        Room.objects.create(apartment=cls.cheap, label="A", room_type="single", monthly_rent=4000)
+        Room.objects.create(apartment=cls.cheap, label="B", room_type="bedsitter", monthly_rent=6500, is_vacant=False)
+        Room.objects.create(apartment=cls.mid, label="A", room_type="bedsitter", monthly_rent=9000)
+        Room.objects.create(apartment=cls.full, label="A", room_type="onebedroom", monthly_rent=15000, is_vacant=False)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_stats_follow_room_changes(self):
+        self.cheap.refresh_from_db()
+        self.assertEqual((self.cheap.min_rent, self.cheap.max_rent), (4000, 6500))
+        self.assertEqual((self.cheap.room_count, self.cheap.vacant_room_count), (2, 1))
+        self.assertEqual((self.cheap.vacant_single_count, self.cheap.vacant_bedsitter_count), (1, 0))
+
+        room = self.cheap.rooms.get(label="B")
+        room.is_vacant = True
+        room.save()
+        self.cheap.rooms.get(label="A").delete()
+        self.cheap.refresh_from_db()
+        self.assertEqual((self.cheap.min_rent, self.cheap.vacant_room_count), (6500, 1))
+        self.assertEqual((self.cheap.vacant_single_count, self.cheap.vacant_bedsitter_count), (0, 1))
+
+        Apartment.objects.update(min_rent=None, room_count=0)
+        call_command("rebuild_room_stats", stdout=StringIO())
+        self.cheap.refresh_from_db()
+        self.assertEqual((self.cheap.min_rent, self.cheap.room_count), (6500, 1))
+
+    def test_rent_room_type_and_vacancy_filters(self):
+        def names(**params):
+            response = self.client.get("/api/apartments/apartments/", params)
+            return sorted(a["name"] for a in response.data["results"])
+
+        self.assertEqual(names(min_rent=6000, max_rent=10000), ["Cheap", "Mid"])
+        self.assertEqual(names(max_rent=5000), ["Cheap"])
+        self.assertEqual(names(room_type="bedsitter"), ["Mid"])
+        self.assertEqual(names(vacant="false"), ["Full"])
+
+    def test_search_returns_results_and_facets(self):
+        with self.assertNumQueries(5):  # university lookup, count, page, 2 facet queries
+            response = self.client.get("/api/apartments/apartments/search/", {"university": self.moi.id})
+
+        self.assertEqual(response.data["count"], 2)
+        facets = response.data["facets"]
+        self.assertEqual({b["key"]: b["count"] for b in facets["rent"]}["under_5k"], 1)
+        self.assertEqual({b["key"]: b["count"] for b in facets["rent"]}["5k_10k"], 1)
+        self.assertEqual({r["code"]: r["count"] for r in facets["room_type"]}["bedsitter"], 1)
+        self.assertEqual(facets["vacancy"], {"vacant": 2, "full": 0})
+        self.assertEqual(facets["university"], [{"id": self.moi.id, "name": "Moi University", "count": 2}])
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        university = University.objects.create(name="Pwani University")
+        landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        for i in range(5):
+            Apartment.objects.create(university=university, landlord=landlord, name=f"Apt {i}", is_approved=True)
+        # Identical timestamps force the id tie-breaker
+        first = Apartment.objects.order_by("id").first()
+        Apartment.objects.exclude(pk=first.pk).update(created_at=first.created_at)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_walks_all_pages_newest_first(self):
+        expected = list(Apartment.objects.order_by("-created_at", "-id").values_list("name", flat=True))
+        seen, url, params = [], "/api/apartments/apartments/", {"cursor": "", "page_size": 2}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            seen += [a["name"] for a in response.data["results"]]
+            url, params = response.data["next"], None
+        self.assertEqual(seen, expected)
+
+    def test_page_numbers_still_default_and_bad_cursor_rejected(self):
+        response = self.client.get("/api/apartments/apartments/")
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(self.client.get("/api/apartments/apartments/", {"cursor": "garbage"}).status_code, 404)
+
+    def test_cursor_rejects_other_orderings(self):
+        url = "/api/apartments/apartments/"
+        response = self.client.get(url, {"cursor": "", "ordering": "min_rent"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("?ordering=", response.data["cursor"])
+        self.assertEqual(self.client.get(url, {"cursor": "", "q": "apt"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"cursor": "", "ordering": "", "search": "apt"}).status_code, 200)
+
+
+class LandlordStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from bookings.models import Booking
+        from payments.models import Payment
+
+        university = University.objects.create(name="Moi University")
+        cls.landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        student = Profile.objects.create(user=User.objects.create(username="student"), role="student")
+        for i in range(3):
+            apartment = Apartment.objects.create(university=university, landlord=cls.landlord, name=f"Block {i}")
+            for label, rent in (("A", 4000), ("B", 6000)):
+                Room.objects.create(apartment=apartment, label=label, room_type="single", monthly_rent=rent)
+        cls.room = apartment.rooms.first()
+        booking = Booking.objects.create(student=student, room=cls.room, full_name="S", phone="0712345678")
+        Payment.objects.create(booking=booking, user=student, amount=4000)
+        cls.booking = booking
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.landlord.user)
+
+    def test_totals_and_rows(self):
+        from ComradeHousingHub.conditional import change_counter
+        from .landlord_summary import landlord_stats_counter
+
+        change_counter(landlord_stats_counter(self.landlord.pk))  # created by the first summary bump
+        # counter, totals, page, videos, room rents, bookings, payments
+        with self.assertNumQueries(7):
+            response = self.client.get("/api/apartments/landlord/stats/")
+
+        self.assertEqual(response.data["totalApartments"], 3)
+        self.assertEqual(response.data["totalRooms"], 6)
+        self.assertEqual(response.data["pendingBookings"], 1)
+        self.assertEqual(response.data["confirmedBookings"], 0)
+        self.assertEqual(response.data["totalEarnings"], 4000)
+        newest = response.data["apartments"][0]
+        self.assertEqual((newest["name"], newest["average_rent"], newest["earnings"]), ("Block 2", 5000.0, 4000))
+        self.assertEqual((newest["pending_bookings"], newest["confirmed_bookings"]), (1, 0))
+        self.assertEqual(response.data["apartments"][1]["earnings"], 0)
+
+    def test_cached_until_a_booking_changes(self):
+        self.client.get("/api/apartments/landlord/stats/")
+        with self.assertNumQueries(1):  # the landlord's change counter
+            self.client.get("/api/apartments/landlord/stats/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.status = "CONFIRMED"
+            self.booking.save()
+        response = self.client.get("/api/apartments/landlord/stats/")
+        self.assertEqual((response.data["pendingBookings"], response.data["confirmedBookings"]), (0, 1))
+        self.assertEqual(response.data["apartments"][0]["confirmed_bookings"], 1)
+
+    def test_room_write_invalidates(self):
+        self.client.get("/api/apartments/landlord/stats/")
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(apartment=self.room.apartment, label="C", room_type="single", monthly_rent=5000)
+        self.assertEqual(self.client.get("/api/apartments/landlord/stats/").data["totalRooms"], 7)
+
+        # a rent change leaves the summary alone but still changes the row
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.monthly_rent = 7000
+            self.room.save()
+        newest = self.client.get("/api/apartments/landlord/stats/").data["apartments"][0]
+        self.assertEqual(newest["average_rent"], 6000.0)
+
+    def test_other_landlords_keep_their_cache(self):
+        other = Profile.objects.create(user=User.objects.create(username="other"), role="landlord")
+        self.client.get("/api/apartments/landlord/stats/")
+        with self.captureOnCommitCallbacks(execute=True):
+            Apartment.objects.create(university=self.room.apartment.university, landlord=other, name="Elsewhere")
+        with self.assertNumQueries(1):
+            self.client.get("/api/apartments/landlord/stats/")
+
+    def test_pagination(self):
+        response = self.client.get("/api/apartments/landlord/stats/", {"page_size": 2})
+        self.assertEqual(len(response.data["apartments"]), 2)
+        self.assertEqual(response.data["count"], 3)
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.client.get("/api/apartments/landlord/stats/", {"page_size": 2, "page": 2})
+        self.assertEqual([a["name"] for a in response.data["apartments"]], ["Block 0"])
+        self.assertIsNone(response.data["next"])
+        self.assertIsNotNone(response.data["previous"])
+
+
+class LandlordSummaryTests(TestCase):
+    """LandlordSummary follows apartment, room, booking and payment writes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        university = University.objects.create(name="Kisii University")
+        cls.landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        cls.other = Profile.objects.create(user=User.objects.create(username="other"), role="landlord")
+        cls.student = Profile.objects.create(user=User.objects.create(username="student"), role="student")
+        cls.apartment = Apartment.objects.create(university=university, landlord=cls.landlord, name="Block A")
+
+    def assertSummary(self, landlord, **expected):
+        from .models import LandlordSummary
+
+        summary = LandlordSummary.objects.get(pk=landlord.pk)
+        self.assertEqual({field: getattr(summary, field) for field in expected}, expected)
+
+    def test_incremental_updates(self):
+        from bookings.models import Booking
+        from payments.models import Payment
+
+        rooms = [
+            Room.objects.create(apartment=self.apartment, label=label, room_type="single", monthly_rent=5000)
+            for label in "AB"
+        ]
+        booking = Booking.objects.create(student=self.student, room=rooms[0], full_name="S", phone="0712345678")
+        payment = Payment.objects.create(booking=booking, user=self.student, amount=5000)
+        self.assertSummary(self.landlord, apartment_count=1, room_count=2, pending_booking_count=1, total_earnings=5000)
+
+        booking.status = "CONFIRMED"
+        booking.save()
+        payment.amount = 4500
+        payment.save()
+        self.assertSummary(self.landlord, pending_booking_count=0, confirmed_booking_count=1, total_earnings=4500)
+
+        booking.delete()  # cascades to the payment
+        rooms[1].delete()
+        self.assertSummary(self.landlord, room_count=1, confirmed_booking_count=0, total_earnings=0)
+
+        self.apartment.landlord = self.other
+        self.apartment.save()
+        self.assertSummary(self.landlord, apartment_count=0, room_count=0)
+        self.assertSummary(self.other, apartment_count=1, room_count=1)
+
+    def test_reconciliation_reports_and_repairs_drift(self):
+        from .models import LandlordSummary
+
+        Room.objects.create(apartment=self.apartment, label="A", room_type="single", monthly_rent=5000)
+        LandlordSummary.objects.filter(pk=self.landlord.pk).update(room_count=7)
+
+        out = StringIO()
+        call_command("rebuild_landlord_summaries", "--dry-run", stdout=out)
+        self.assertIn(f"landlord {self.landlord.pk}: room_count: 7 -> 1", out.getvalue())
+        self.assertSummary(self.landlord, room_count=7)
+
+        call_command("rebuild_landlord_summaries", stdout=StringIO())
+        self.assertSummary(self.landlord, apartment_count=1, room_count=1)
+
+
+class ApartmentWriteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.university = University.objects.create(name="Karatina University")
+        cls.landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.landlord.user)
+
+    def payload(self, room_count, **extra):
+        rooms = [{"label": f"R{i}", "status": "Vacant" if i % 2 else "Occupied"} for i in range(room_count)]
+        return {
+            "university": self.university.id, "name": "Block", "amenities": [],
+            "roomTypes": [{"type": "single", "monthly_rent": "5000", "rooms": rooms}],
+            **extra,
+        }
+
+    def test_query_count_independent_of_room_count(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.client.post("/api/apartments/apartments/", self.payload(1), format="json")  # creates the summary row
+        counts = []
+        for room_count in (2, 200):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post("/api/apartments/apartments/", self.payload(room_count), format="json")
+            self.assertEqual(response.status_code, 201)
+            counts.append(len(queries))
+        # only the number of INSERT batches grows (SQLite caps bound parameters per statement)
+        self.assertLessEqual(counts[1], counts[0] + 2)
+
+        apartment = Apartment.objects.get(pk=response.data["id"])
+        self.assertEqual((apartment.room_count, apartment.vacant_room_count), (200, 100))
+        self.assertEqual(self.landlord.summary.room_count, 203)
+
+    def test_update_and_rollback(self):
+        response = self.client.post("/api/apartments/apartments/", self.payload(3), format="json")
+        apartment = Apartment.objects.get(pk=response.data["id"])
+        first = apartment.rooms.order_by("id").first()
+
+        rooms = [{"id": first.id, "label": "Renamed", "status": "Vacant"}, {"label": "New", "status": "Vacant"}]
+        data = {**self.payload(0), "roomTypes": [{"type": "bedsitter", "monthly_rent": "7000", "rooms": rooms}]}
+        response = self.client.put(f"/api/apartments/apartments/{apartment.id}/", data, format="json")
+        self.assertEqual(response.status_code, 200)
+        first.refresh_from_db()
+        self.assertEqual((first.label, first.room_type, first.monthly_rent), ("Renamed", "bedsitter", 7000))
+        apartment.refresh_from_db()
+        self.assertEqual((apartment.room_count, apartment.max_rent), (4, 7000))
+
+        data = {**self.payload(0, name="Changed"), "roomTypes": [
+            {"type": "single", "monthly_rent": "1", "rooms": [{"label": "X"}, {"id": 999999, "label": "Y"}]},
+        ]}
+        response = self.client.put(f"/api/apartments/apartments/{apartment.id}/", data, format="json")
+        self.assertEqual(response.status_code, 400)
+        apartment.refresh_from_db()
+        self.assertEqual((apartment.name, apartment.room_count), ("Block", 4))
+
+
+class ImportListingsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.university = University.objects.create(name="Chuka University", lat=-0.3333, lng=37.65)
+        cls.landlord = Profile.objects.create(user=User.objects.create(username="agent"), role="landlord")
+
+    def write(self, suffix, text):
+        handle = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False, encoding="utf-8")
+        with handle:
+            handle.write(text)
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def run_import(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_listings", *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_rows_batches_and_errors(self):
+        path = self.write(".csv", (
+            "landlord,university,name,address,amenities,lat,lon,room_type,label,monthly_rent,status\n"
+            "agent,Chuka University,Hill View,Ndagani,WiFi;Water,-0.32,37.66,single,A1,4500,Vacant\n"
+            "agent,Chuka University,Hill View,Ndagani,WiFi;Water,-0.32,37.66,single,A2,4500,Occupied\n"
+            "agent,Nowhere University,Ghost,,,,,single,G1,4500,Vacant\n"
+            "agent,Chuka University,Hill View,Ndagani,,,,bedsitter,B1,abc,Vacant\n"
+            "agent,Chuka University,Riverside,,,,,bedsitter,B1,6000,Vacant\n"
+        ))
+        out, err = self.run_import("--file", path, "--batch-size", "2")
+
+        self.assertIn("line 4: unknown university 'Nowhere University'", err)
+        self.assertIn("line 5: 'monthly_rent' must be a number", err)
+        self.assertIn("Committed through line 3 (resume with --resume-from 4)", out)
+        hill_view = Apartment.objects.get(name="Hill View")
+        self.assertEqual((hill_view.room_count, hill_view.vacant_room_count), (2, 1))
+        self.assertTrue(hill_view.amenity_mask)
+        self.assertIsNotNone(hill_view.distance_km)
+        self.assertEqual(self.landlord.summary.room_count, 3)
+
+        # re-running a committed range does not duplicate rooms
+        self.run_import("--file", path, "--resume-from", "2")
+        self.assertEqual(Room.objects.count(), 3)
+        self.assertEqual(Apartment.objects.count(), 2)
+
+    def test_out_of_range_values_are_rejected_per_row(self):
+        base = {"landlord": "agent", "university": "Chuka University"}
+        lines = [
+            {**base, "name": "NaN Rent", "rooms": [{"label": "1", "monthly_rent": "NaN"}]},
+            {**base, "name": "Huge Rent", "rooms": [{"label": "1", "monthly_rent": "123456789012"}]},
+            {**base, "name": "Long Label", "rooms": [{"label": "x" * 31, "monthly_rent": 5000}]},
+            {**base, "name": "N" * 201},
+            {**base, "name": "Bad Rooms", "rooms": 3},
+            {**base, "name": "Nowhere", "lat": "nan"},
+            {**base, "name": "Good", "rooms": [{"label": "1", "monthly_rent": 5000}]},
+        ]
+        path = self.write(".jsonl", "\n".join(json.dumps(line) for line in lines))
+        out, err = self.run_import("--file", path)
+
+        self.assertIn("line 1: 'monthly_rent' must be a number", err)
+        self.assertIn("line 2: 'monthly_rent': Ensure that there are no more than 10 digits in total.", err)
+        self.assertIn("line 3: 'label': Ensure this value has at most 30 characters (it has 31).", err)
+        self.assertIn("line 4: 'name': Ensure this value has at most 200 characters (it has 201).", err)
+        self.assertIn("line 5: 'rooms' must be a list", err)
+        self.assertIn("line 6: 'lat' must be a number", err)
+        self.assertIn("6 row(s) rejected", out)
+        self.assertEqual(list(Apartment.objects.values_list("name", flat=True)), ["Good"])
+
+    def test_jsonl_nested_rooms_and_resume(self):
+        lines = [
+            {"landlord": "agent", "university": "Chuka University", "name": "Block A",
+             "rooms": [{"label": "1", "monthly_rent": 5000}, {"label": "2", "monthly_rent": 5500}]},
+            {"landlord": "agent", "university": "Chuka University", "name": "Block B",
+             "rooms": [{"label": "1", "monthly_rent": 7000, "room_type": "onebedroom"}]},
+        ]
+        path = self.write(".jsonl", "\n".join(json.dumps(line) for line in lines) + "\n{broken\n")
+        out, err = self.run_import("--file", path, "--resume-from", "2")
+
+        self.assertIn("line 3: invalid JSON", err)
+        self.assertEqual(list(Apartment.objects.values_list("name", flat=True)), ["Block B"])
+        self.assertEqual(Apartment.objects.get().min_rent, 7000)
+
+
+class ImageVariantTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        university = University.objects.create(name="Pwani University")
+        landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        cls.first, cls.second = (
+            Apartment.objects.create(university=university, landlord=landlord, name=name, is_approved=True)
+            for name in ("Ocean View", "Palm Court")
+        )
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def photo(self, name="cover.jpg", size=(1200, 800)):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new("RGB", size, (200, 120, 40)).save(buffer, "JPEG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+    def test_duplicate_uploads_share_one_file_and_its_variants(self):
+        from .images import build_variants
+        from .models import ApartmentImage
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            first = ApartmentImage.objects.create(apartment=self.first, image=self.photo("a.jpg"))
+        # variants are built after commit, off the request thread (the others bump the change counters)
+        self.assertEqual(len(callbacks), 3)
+        build_variants(first.pk)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            second = ApartmentImage.objects.create(apartment=self.second, image=self.photo("b.JPEG"))
+        self.assertEqual(len(callbacks), 2)  # change counters only: no second build
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual((second.width, second.height), (1200, 800))
+        self.assertEqual(sorted(second.variants["webp"], key=int), ["320", "640", "1024"])
+        self.assertTrue(second.image.storage.exists(second.variants["webp"]["320"]))
+
+        results = APIClient().get("/api/apartments/apartments/").data["results"]
+        srcset = results[0]["cover_srcset"]
+        self.assertRegex(srcset["webp"], r"^http://testserver/media/\S+/320w\.webp 320w, .* 1200w$")
+        self.assertIn("640w.jpg 640w", srcset["jpeg"])
+
+    def test_backfill_command(self):
+        from django.core.files.storage import default_storage
+        from .models import ApartmentImage
+
+        legacy = default_storage.save(f"apartments/{self.first.id}/legacy.jpg", self.photo())
+        ApartmentImage.objects.bulk_create([ApartmentImage(apartment=self.first, image=legacy)])
+
+        out = StringIO()
+        call_command("build_image_variants", stdout=out, stderr=out)
+        image = ApartmentImage.objects.get()
+        self.assertIn("Hashed 1 image(s)", out.getvalue())
+        self.assertTrue(image.image.name.startswith(f"apartments/images/{image.content_hash[:2]}/"))
+        self.assertEqual(image.width, 1200)
+        self.assertEqual(len(image.variants["jpeg"]), 3)
+
+    def test_missing_original_does_not_break_listing_or_backfill(self):
+        from .models import ApartmentImage
+
+        ApartmentImage.objects.bulk_create([ApartmentImage(apartment=self.first, image="apartments/1/gone.jpg")])
+
+        response = APIClient().get("/api/apartments/apartments/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+
+        out, err = StringIO(), StringIO()
+        call_command("build_image_variants", stdout=out, stderr=err)
+        self.assertIn("file missing, skipped", err.getvalue())
+        self.assertIn("1 missing", out.getvalue())
+        self.assertIsNone(ApartmentImage.objects.get().width)
+
+
+class ChunkedVideoUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        university = University.objects.create(name="Laikipia University")
+        cls.landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        cls.apartment = Apartment.objects.create(university=university, landlord=cls.landlord, name="Rift View")
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name, CHUNKED_UPLOAD_DIR=os.path.join(media.name, "parts"))
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.landlord.user)
+
+    def start(self, data, **extra):
+        import hashlib
+
+        payload = {
+            "apartment": self.apartment.id, "room_type": "single", "filename": "tour.mp4",
+            "size": len(data), "checksum": hashlib.sha256(data).hexdigest(), **extra,
+        }
+        return self.client.post("/api/apartments/video-uploads/", payload, format="json")
+
+    def send(self, upload_id, chunk, offset, **headers):
+        return self.client.generic(
+            "PATCH", f"/api/apartments/video-uploads/{upload_id}/", chunk,
+            content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET=str(offset),
+            **{f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()},
+        )
+
+    def test_resumable_upload_attaches_room_video(self):
+        import hashlib
+
+        data = b"\x00\x00\x00\x18ftypmp42" + os.urandom(300_000 - 12)
+        upload_id = self.start(data).data["id"]
+
+        self.assertEqual(self.send(upload_id, data[:100_000], 0).data["offset"], 100_000)
+        # a retried or out-of-order chunk is refused with the offset to resume from
+        response = self.send(upload_id, data[:100_000], 0)
+        self.assertEqual((response.status_code, response.data["offset"]), (409, 100_000))
+        response = self.send(upload_id, data[100_000:200_000], 100_000, **{"Upload-Checksum": "0" * 64})
+        self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(self.client.get(f"/api/apartments/video-uploads/{upload_id}/").data["offset"], 100_000)
+        chunk = data[100_000:]
+        response = self.send(upload_id, chunk, 100_000, **{"Upload-Checksum": hashlib.sha256(chunk).hexdigest()})
+        self.assertEqual(response.data["status"], "complete")
+
+        video = RoomVideo.objects.get(apartment=self.apartment, room_type="single")
+        self.assertEqual(response.data["room_video"], video.id)
+        with video.video.open("rb") as stored:
+            self.assertEqual(stored.read(), data)
+        self.assertFalse(os.path.exists(VideoUpload.objects.get().part_path))
+
+    def test_limits_and_ownership(self):
+        self.assertEqual(self.start(b"x", filename="tour.exe").status_code, 400)
+        self.assertEqual(self.start(b"x", size=51 * 1024 * 1024).status_code, 400)
+
+        upload_id = self.start(b"abc").data["id"]
+        self.assertEqual(self.send(upload_id, b"abcd", 0).status_code, 413)
+
+        intruder = Profile.objects.create(user=User.objects.create(username="intruder"), role="landlord")
+        self.client.force_authenticate(intruder.user)
+        self.assertEqual(self.send(upload_id, b"abc", 0).status_code, 404)
+        self.assertEqual(self.start(b"abc").status_code, 403)
+
+    def test_bad_final_checksum_fails_the_upload(self):
+        upload_id = self.start(b"abc", checksum="f" * 64).data["id"]
+        response = self.send(upload_id, b"abc", 0)
+        self.assertEqual((response.data["status"], response.data["error"]), ("failed", "File checksum mismatch."))
+        self.assertFalse(RoomVideo.objects.exists())
+
+    def test_racing_chunks_for_one_offset_advance_it_once(self):
+        from .uploads import ChunkError, write_chunk
+
+        upload_id = self.start(b"abcdef").data["id"]
+        # two requests that both read the upload at offset 0 before either wrote
+        first, second = VideoUpload.objects.get(pk=upload_id), VideoUpload.objects.get(pk=upload_id)
+        self.assertEqual(write_chunk(first, BytesIO(b"abc"), 0, 3), 3)
+        with self.assertRaises(ChunkError) as raised:
+            write_chunk(second, BytesIO(b"abc"), 0, 3)
+        self.assertEqual((raised.exception.status, second.offset), (409, 3))
+        self.assertEqual(VideoUpload.objects.get(pk=upload_id).offset, 3)
+
+        response = self.send(upload_id, b"abc", 0)
+        self.assertEqual((response.status_code, response.data["offset"]), (409, 3))
+        self.assertEqual(self.send(upload_id, b"def", 3).data["offset"], 6)
+
+
+class UploadHandlerTests(TestCase):
+    MP4_HEADER = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00"
+
+    def parse(self, field, name, content):
+        """Run a multipart body through the configured handlers; returns (files or error, bytes read)."""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.core.files.uploadhandler import load_handler
+        from django.conf import settings
+        from django.http.multipartparser import MultiPartParser
+        from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+        from .upload_handlers import UploadRejected
+
+        body = encode_multipart(BOUNDARY, {field: SimpleUploadedFile(name, content)})
+        stream = BytesIO(body)
+        meta = {"CONTENT_TYPE": MULTIPART_CONTENT, "CONTENT_LENGTH": len(body)}
+        handlers = [load_handler(path) for path in settings.FILE_UPLOAD_HANDLERS]
+        try:
+            result = MultiPartParser(meta, stream, handlers).parse()[1]
+        except UploadRejected as exc:
+            result = str(exc)
+        return result, stream.tell()
+
+    def test_spoofed_video_is_rejected_after_the_first_chunk(self):
+        error, read = self.parse("video", "tour.mp4", b"<html>" + b"x" * (20 * 1024 * 1024))
+        self.assertEqual(error, "video: File content is not an MP4, MOV, or AVI video.")
+        self.assertLess(read, 1024 * 1024)
+
+    def test_oversized_image_is_rejected_at_the_limit(self):
+        error, read = self.parse("coverImage", "cover.jpg", b"\xff\xd8\xff\xe0" + b"\x00" * (8 * 1024 * 1024))
+        self.assertEqual(error, "coverImage: Image size should not exceed 5MB.")
+        self.assertLess(read, 6 * 1024 * 1024)
+
+    def test_valid_and_unrelated_files_pass_through(self):
+        files, _ = self.parse("video", "tour.mov", self.MP4_HEADER + b"\x00" * 1000)
+        self.assertEqual(files["video"].read()[:16], self.MP4_HEADER)
+        files, _ = self.parse("document", "lease.pdf", b"%PDF-1.7")
+        self.assertEqual(files["document"].read(), b"%PDF-1.7")
+
+    def test_spoofed_cover_image_is_refused_by_the_api(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        University.objects.create(name="Laikipia University")
+        landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        client = APIClient()
+        client.force_authenticate(landlord.user)
+        response = client.post(
+            "/api/apartments/apartments/",
+            {"name": "Rift View", "coverImage": SimpleUploadedFile("cover.jpg", b"#!/bin/sh\necho hi\n")},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("File content is not a JPG or PNG image.", response.data["detail"])
+        self.assertFalse(Apartment.objects.exists())
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        university = University.objects.create(name="Maseno University")
+        cls.landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        cls.apartment = Apartment.objects.create(
+            university=university, landlord=cls.landlord, name="Lakeside", is_approved=True,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_unchanged_catalog_is_not_modified(self):
+        url = f"/api/apartments/apartments/{self.apartment.id}/"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+        with self.assertNumQueries(1):  # the change counter only
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        modified_since = response["Last-Modified"]
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=modified_since).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(apartment=self.apartment, label="R1", monthly_rent=4000)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["room_count"], 1)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_every_bump_moves_last_modified(self):
+        from django.core.cache import caches
+        from ComradeHousingHub.conditional import _bump
+
+        url = "/api/apartments/apartments/"
+        first = self.client.get(url)
+        caches["catalog"].clear()  # counters live in the database, not in a per-process cache
+        self.assertEqual(self.client.get(url)["ETag"], first["ETag"])
+
+        _bump(["apartments"])
+        _bump(["apartments"])  # within the same second
+        second = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(second.status_code, 200)
+        third = self.client.get(url, HTTP_IF_MODIFIED_SINCE=second["Last-Modified"])
+        self.assertEqual(third.status_code, 304)
+        _bump(["apartments"])
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=second["Last-Modified"]).status_code, 200)
+
+    def test_validators_are_per_user(self):
+        anonymous = self.client.get("/api/apartments/apartments/")["ETag"]
+        self.client.force_authenticate(self.landlord.user)
+        response = self.client.get("/api/apartments/apartments/", HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], anonymous)
+
+
+class ListingCacheTests(TransactionTestCase):
+    """Real commits, so writes move the change counter as they do in production."""
+
+    url = "/api/apartments/apartments/"
+
+    def setUp(self):
+        from django.core.cache import caches
+        from .listing_cache import reset_listing_cache_stats
+
+        caches["catalog"].clear()
+        reset_listing_cache_stats()
+        university = University.objects.create(name="Moi University")
+        self.landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        self.apartment = Apartment.objects.create(
+            university=university, landlord=self.landlord, name="Kesses Court", is_approved=True,
+        )
+        self.client = APIClient()
+
+    def test_anonymous_pages_are_cached_until_a_write(self):
+        self.assertEqual(self.client.get(self.url, {"fields": "name,id"})["X-Cache"], "MISS")
+        with self.assertNumQueries(1):  # the change counter, shared by the ETag and the cache key
+            response = self.client.get(self.url, {"fields": "id, name", "utm_source": "poster"})
+        self.assertEqual((response["X-Cache"], response.data["results"][0]["name"]), ("HIT", "Kesses Court"))
+
+        Room.objects.create(apartment=self.apartment, label="R1", monthly_rent=4500)
+        response = self.client.get(self.url, {"fields": "id,name,min_rent"})
+        self.assertEqual((response["X-Cache"], response.data["results"][0]["min_rent"]), ("MISS", "4500.00"))
+
+        self.client.force_authenticate(self.landlord.user)
+        self.assertNotIn("X-Cache", self.client.get(self.url))
+
+    def test_bulk_write_elsewhere_invalidates(self):
+        from ComradeHousingHub.conditional import bump_change_counters
+
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "MISS")
+        # what a management command in another process does; the counter is shared through the database
+        Apartment.objects.filter(pk=self.apartment.pk).update(name="Kesses Heights")
+        bump_change_counters("apartments")
+        response = self.client.get(self.url)
+        self.assertEqual((response["X-Cache"], response.data["results"][0]["name"]), ("MISS", "Kesses Heights"))
+
+    def test_stats_report_hit_rate_to_admins(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(self.client.get("/api/apartments/listing-cache/stats/").status_code, 401)
+
+        self.client.force_authenticate(User.objects.create(username="admin", is_staff=True))
+        stats = self.client.get("/api/apartments/listing-cache/stats/").data
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (1, 1, 0.5))
+
+
+class SingleFlightTests(TestCase):
+    def test_concurrent_misses_compute_once(self):
+        import threading
+        import time
+        from .listing_cache import cached_page, get_listing_cache_stats, reset_listing_cache_stats
+
+        reset_listing_cache_stats()
+        calls, results = [], []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return {"count": 1}
+
+        threads = [
+            threading.Thread(target=lambda: results.append(cached_page("single-flight-test", compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(status for _, status in results), ["HIT"] * 7 + ["MISS"])
+        stats = get_listing_cache_stats()
+        self.assertEqual((stats["misses"], stats["hits"] + stats["coalesced"]), (1, 7))
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(media.name, "room_videos", "1"))
+        self.data = bytes(range(256)) * 40
+        with open(os.path.join(media.name, "room_videos", "1", "tour.mp4"), "wb") as video:
+            video.write(self.data)
+        self.url = "/media/room_videos/1/tour.mp4"
+
+    def test_full_and_conditional_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.data)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Type"], "video/mp4")
+
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertEqual(self.client.get("/media/../settings.py").status_code, 404)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=100-199")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{len(self.data)}")
+        self.assertEqual(b"".join(response.streaming_content), self.data[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-10")
+        self.assertEqual(b"".join(response.streaming_content), self.data[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f"bytes={len(self.data)}-")
+        self.assertEqual((response.status_code, response["Content-Range"]), (416, f"bytes */{len(self.data)}"))
+
+        # a stale If-Range validator gets the whole (changed) file
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_content_addressed_paths_are_immutable(self):
+        from django.conf import settings
+
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, "apartments", "images", "ab"))
+        with open(os.path.join(settings.MEDIA_ROOT, "apartments", "images", "ab", "abc.jpg"), "wb") as image:
+            image.write(b"jpeg")
+        response = self.client.get("/media/apartments/images/ab/abc.jpg")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertNotIn("immutable", self.client.get(self.url)["Cache-Control"])
+
+        with self.settings(MEDIA_ACCEL_REDIRECT_PREFIX="/protected-media/"):
+            response = self.client.get(self.url)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/room_videos/1/tour.mp4")
+        self.assertEqual(response.content, b"")
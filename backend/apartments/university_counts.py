@@ -0,0 +1,81 @@
+# apartments/university_counts.py
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from ComradeHousingHub.conditional import bump_change_counters
+from universities.models import University
+from .models import Apartment
+
+UNIVERSITY_COUNT_FIELDS = ["approved_apartment_count", "vacant_room_count"]
+
+
+def _university_aggregates():
+    approved = Q(is_approved=True)
+    return {
+        "approved_apartment_count": Count("id", filter=approved),
+        "vacant_room_count": Coalesce(Sum("vacant_room_count", filter=approved), 0),
+    }
+
+
+def _empty_counts():
+    return {field: 0 for field in UNIVERSITY_COUNT_FIELDS}
+
+
+def refresh_university_counts(university_ids):
+    """
+    Recompute approved apartment and vacant room counts for the given universities (one grouped query).
+    The "universities" change counter only moves if a stored count actually changed.
+    """
+    university_ids = set(university_ids) - {None}
+    if not university_ids:
+        return
+
+    rows = (
+        Apartment.objects.filter(university_id__in=university_ids)
+        .values("university_id")
+        .annotate(**_university_aggregates())
+        .order_by()
+    )
+    counts = {row.pop("university_id"): row for row in rows}
+
+    changed = 0
+    with transaction.atomic():
+        for university_id in university_ids:
+            values = counts.get(university_id, _empty_counts())
+            # queryset.update() so University save hooks are not triggered; the
+            # exclude() skips rows that already hold these values
+            changed += University.objects.filter(pk=university_id).exclude(**values).update(**values)
+    if changed:
+        bump_change_counters("universities")
+
+
+def refresh_university_counts_for_apartments(apartment_ids):
+    refresh_university_counts(
+        Apartment.objects.filter(pk__in=apartment_ids).values_list("university_id", flat=True).distinct()
+    )
+
+
+def rebuild_university_counts():
+    """
+    Recompute the counts for every university.
+    Returns the number of universities whose stored values were out of date.
+    """
+    counts = {
+        row.pop("university_id"): row
+        for row in Apartment.objects.values("university_id").annotate(**_university_aggregates()).order_by()
+    }
+
+    changed = []
+    with transaction.atomic():
+        for university in University.objects.only("id", *UNIVERSITY_COUNT_FIELDS):
+            values = counts.get(university.id, _empty_counts())
+            if any(getattr(university, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(university, field, value)
+                changed.append(university)
+        University.objects.bulk_update(changed, UNIVERSITY_COUNT_FIELDS)
+    if changed:
+        bump_change_counters("universities")
+
+    return len(changed)
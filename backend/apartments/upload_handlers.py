@@ -0,0 +1,62 @@
+# apartments/upload_handlers.py
+"""
+Reject bad image and video uploads while the request body is still arriving.
+
+ValidatingUploadHandler runs ahead of Django's memory/temporary-file
+handlers and passes every chunk on unchanged. For image and video files
+(see media_types.upload_kind) it sniffs the magic bytes of the first
+chunk and counts bytes as they come in; a spoofed or oversized file
+raises UploadRejected, which stops parsing without reading the rest of
+the body. DRF turns it into a 400 ParseError; the model validators still
+run afterwards as before.
+"""
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+from .media_types import (
+    IMAGE_TYPES, MAX_IMAGE_SIZE_MB, MAX_VIDEO_SIZE_MB, SNIFF_BYTES, VIDEO_TYPES, sniff_media_type, upload_kind,
+)
+
+LIMITS = {
+    "image": (MAX_IMAGE_SIZE_MB, IMAGE_TYPES, "a JPG or PNG image"),
+    "video": (MAX_VIDEO_SIZE_MB, VIDEO_TYPES, "an MP4, MOV, or AVI video"),
+}
+
+
+class UploadRejected(MultiPartParserError):
+    pass
+
+
+class ValidatingUploadHandler(FileUploadHandler):
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.kind = upload_kind(field_name, file_name)
+        self.received = 0
+        self.head = b""  # None once the type has been checked
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.kind is None:
+            return raw_data
+        max_size_mb = LIMITS[self.kind][0]
+        self.received += len(raw_data)
+        if self.received > max_size_mb * 1024 * 1024:
+            self.reject(f"{self.kind.capitalize()} size should not exceed {max_size_mb}MB.")
+        if self.head is not None:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self.check_type()
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.kind is not None and self.head is not None:
+            self.check_type()  # files shorter than SNIFF_BYTES
+        return None  # the next handler builds the UploadedFile
+
+    def check_type(self):
+        _, types, description = LIMITS[self.kind]
+        if sniff_media_type(self.head) not in types:
+            self.reject(f"File content is not {description}.")
+        self.head = None
+
+    def reject(self, message):
+        raise UploadRejected(f"{self.field_name}: {message}")
@@ -0,0 +1,121 @@
+# apartments/uploads.py
+"""
+Chunked, resumable room video uploads.
+
+A client creates a VideoUpload (file name, size, optional sha256), then
+sends the file as raw request bodies with an Upload-Offset header. Each
+chunk is streamed straight into the part file at its offset, so memory
+use stays at CHUNK_READ_SIZE whatever the file size. After a dropped
+connection, the client asks for the upload's offset and continues from
+there. When the last byte arrives the part file is checked with
+validate_video and the whole-file checksum, then moved (not copied) into
+media storage as the apartment's RoomVideo for that room type.
+"""
+import hashlib
+import os
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db.models import F
+from django.utils import timezone
+
+from .models import RoomVideo, VideoUpload, validate_video
+
+CHUNK_READ_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class ChunkError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class AssembledFile(File):
+    """A finished part file; storages move it into place instead of copying."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as part:
+        for block in iter(lambda: part.read(CHUNK_READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_chunk(upload, stream, offset, length, checksum=None):
+    """
+    Write `length` bytes read from `stream` at `offset` of the upload's part file.
+    checksum, if given, is the chunk's sha256 hex digest. On a short read or a
+    checksum mismatch the part file is cut back to `offset` and ChunkError is raised.
+
+    The stored offset only advances if it is still `offset` (compare-and-set),
+    so of two requests racing for the same offset exactly one wins; the other
+    gets a 409 with the offset to resume from.
+    """
+    if upload.status != "uploading":
+        raise ChunkError(f"Upload is {upload.status}.", status=409)
+    if offset != upload.offset:
+        raise ChunkError(f"Expected offset {upload.offset}.", status=409)
+    if length > MAX_CHUNK_SIZE:
+        raise ChunkError(f"Chunks may not exceed {MAX_CHUNK_SIZE} bytes.", status=413)
+    if offset + length > upload.size:
+        raise ChunkError("Chunk runs past the declared file size.", status=413)
+
+    os.makedirs(os.path.dirname(upload.part_path), exist_ok=True)
+    digest = hashlib.sha256()
+    received = 0
+    with open(upload.part_path, "r+b" if os.path.exists(upload.part_path) else "wb") as part:
+        part.seek(offset)
+        part.truncate()  # drop the tail of an earlier, failed attempt
+        while received < length:
+            block = stream.read(min(CHUNK_READ_SIZE, length - received))
+            if not block:
+                break
+            part.write(block)
+            digest.update(block)
+            received += len(block)
+
+        if received != length:
+            part.truncate(offset)
+            raise ChunkError(f"Received {received} of {length} bytes; resend the chunk.")
+        if checksum and checksum.lower() != digest.hexdigest():
+            part.truncate(offset)
+            raise ChunkError("Chunk checksum mismatch; resend the chunk.")
+
+    advanced = VideoUpload.objects.filter(pk=upload.pk, status="uploading", offset=offset).update(
+        offset=F("offset") + length, updated_at=timezone.now()
+    )
+    if not advanced:
+        upload.refresh_from_db(fields=["offset", "status"])
+        raise ChunkError(f"Expected offset {upload.offset}.", status=409)
+    upload.offset = offset + length
+    return upload.offset
+
+
+def complete_upload(upload):
+    """Validate the assembled part file and attach it to the apartment's RoomVideo."""
+    path = upload.part_path
+    try:
+        if upload.checksum and _file_sha256(path) != upload.checksum.lower():
+            raise ValidationError("File checksum mismatch.")
+        with open(path, "rb") as part:
+            assembled = AssembledFile(part, name=upload.filename)
+            validate_video(assembled)
+
+            video = (
+                RoomVideo.objects.filter(apartment_id=upload.apartment_id, room_type=upload.room_type).first()
+                or RoomVideo(apartment_id=upload.apartment_id, room_type=upload.room_type)
+            )
+            video.video.save(upload.filename, assembled, save=True)
+    except ValidationError as e:
+        upload.status, upload.error = "failed", "; ".join(e.messages)
+        upload.discard_part()
+        return upload
+
+    upload.status, upload.room_video = "complete", video
+    upload.discard_part()  # normally already moved into media storage
+    return upload
@@ -6,8 +6,11 @@ from .views import (
     ApartmentImageViewSet,
     RoomViewSet,
     RoomVideoViewSet,
+    VideoUploadViewSet,
     landlord_stats,
+    listing_cache_stats,
     calculate_distance,
+    nearby_apartments,
 )
 
 # ------------------ ROUTER ------------------
@@ -16,10 +19,13 @@ router.register(r'apartments', ApartmentViewSet, basename='apartment')
 router.register(r'apartment-images', ApartmentImageViewSet, basename='apartmentimage')
 router.register(r'rooms', RoomViewSet, basename='room')
 router.register(r'room-videos', RoomVideoViewSet, basename='roomvideo')
+router.register(r'video-uploads', VideoUploadViewSet, basename='videoupload')
 
 # ------------------ URL PATTERNS ------------------
 urlpatterns = [
     path('landlord/stats/', landlord_stats, name='landlord-stats'),
+    path('listing-cache/stats/', listing_cache_stats, name='listing-cache-stats'),
     path('calculate-distance/', calculate_distance, name='calculate-distance'),
+    path('nearby/', nearby_apartments, name='nearby-apartments'),
     path('', include(router.urls)),
 ]
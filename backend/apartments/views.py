@@ -1,22 +1,33 @@
-from django.db import models
 from rest_framework.permissions import IsAuthenticated
-from rest_framework import viewsets, permissions, filters, status
+from rest_framework import mixins, viewsets, permissions, filters, status
 from rest_framework.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from math import radians, sin, cos, sqrt, atan2
-
-from payments.models import Payment
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+import json
+import math
+
+from ComradeHousingHub.conditional import ConditionalGetMixin
+from ComradeHousingHub.pagination import KeysetOrPageNumberPagination
 from universities.models import University
-from .models import Apartment, ApartmentImage, Room, RoomVideo
+from .models import Apartment, ApartmentImage, Room, RoomVideo, VideoUpload
+from .amenities import amenity_facets
+from .facets import apartment_facets
+from .filters import ApartmentFilter, FullTextSearchFilter
+from .landlord_stats import get_landlord_stats
+from .listing_cache import ListingCacheMixin, get_listing_cache_stats
+from .geo import haversine_km, haversine_matrix, round_rows
+from .spatial import get_apartment_index
+from .uploads import ChunkError, complete_upload, write_chunk
 from .serializers import (
-    ApartmentReadSerializer, ApartmentWriteSerializer,
-    ApartmentImageSerializer, RoomSerializer, RoomVideoSerializer
+    ApartmentReadSerializer, ApartmentListSerializer, ApartmentWriteSerializer,
+    ApartmentImageSerializer, RoomSerializer, RoomVideoSerializer, VideoUploadSerializer
 )
 from reviews.models import Review
-from bookings.models import Booking
 
 
 # --- Custom Permission ---
@@ -39,26 +50,49 @@ class IsOwnerOrAdmin(permissions.BasePermission):
 
 
 # --- Apartment ViewSet ---
-class ApartmentViewSet(viewsets.ModelViewSet):
-    queryset = Apartment.objects.all().select_related("university", "landlord").prefetch_related("rooms", "videos")
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ["university", "is_approved"]
+class ApartmentViewSet(ConditionalGetMixin, ListingCacheMixin, viewsets.ModelViewSet):
+    queryset = Apartment.objects.all()
+    change_counters = ("apartments",)  # ETag / 304 on list and retrieve
+    # anonymous list pages are served from apartments.listing_cache
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, FullTextSearchFilter, filters.OrderingFilter]
+    filterset_class = ApartmentFilter
+    pagination_class = KeysetOrPageNumberPagination  # ?cursor= for keyset paging
     search_fields = ["name", "address"]
-    ordering_fields = ["created_at"]
+    ordering_fields = ["created_at", "average_rating", "review_count", "distance_km", "min_rent"]
 
     def get_permissions(self):
         if self.action in ["create", "update", "partial_update", "destroy"]:
             return [IsOwnerOrAdmin()]
         return [permissions.AllowAny()]
 
+    # Actions rendering compact cards (ApartmentListSerializer, ?fields=/?expand=)
+    list_actions = ["list", "search"]
+
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update"]:
             return ApartmentWriteSerializer
+        if self.action in self.list_actions:
+            return ApartmentListSerializer
         return ApartmentReadSerializer
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in self.list_actions:
+            context["fields"] = self.requested_fields()
+        return context
+
+    def requested_fields(self):
+        if not hasattr(self, "_requested_fields"):
+            self._requested_fields = ApartmentListSerializer.requested_fields(self.request.query_params)
+        return self._requested_fields
+
     def get_queryset(self):
         user = self.request.user
-        qs = Apartment.objects.select_related("university", "landlord").prefetch_related("rooms", "videos")
+        qs = Apartment.objects.all()
+        if self.action in self.list_actions:
+            qs = ApartmentListSerializer.setup_eager_loading(qs, self.requested_fields())
+        elif self.action == "retrieve":
+            qs = ApartmentReadSerializer.setup_eager_loading(qs)
 
         if user.is_staff:
             return qs
@@ -72,6 +106,22 @@ class ApartmentViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("Only landlords can create apartments.")
         serializer.save()
 
+    # ✅ Amenity facet counts for the current filters (e.g. ?university=3&amenities=wifi)
+    @action(detail=False, methods=["get"], url_path="amenities")
+    def amenities(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(amenity_facets(queryset))
+
+    # ✅ Faceted search: a page of results plus bucketed counts for the same filters
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data["facets"] = apartment_facets(queryset)
+        return response
+
 
 # --- ApartmentImage ViewSet ---
 class ApartmentImageViewSet(viewsets.ModelViewSet):
@@ -109,6 +159,8 @@ class RoomViewSet(viewsets.ModelViewSet):
     serializer_class = RoomSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ["apartment", "room_type", "is_vacant"]
+    pagination_class = KeysetOrPageNumberPagination
+    keyset_ordering = ("-id",)  # rooms have no created_at
 
     def get_permissions(self):
         if self.action in ["create", "update", "partial_update", "destroy"]:
@@ -165,58 +217,131 @@ class RoomVideoViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
+# --- Chunked RoomVideo Uploads ---
+class VideoUploadViewSet(
+    mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet
+):
+    """
+    POST   {apartment, room_type, filename, size, checksum?} starts an upload.
+    PATCH  a raw chunk with an Upload-Offset header (and optional Upload-Checksum,
+           the chunk's sha256 hex); the last chunk attaches the RoomVideo.
+    GET    returns the current offset to resume from; DELETE abandons the upload.
+    """
+    serializer_class = VideoUploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return VideoUpload.objects.filter(landlord__user=self.request.user)
+
+    def perform_create(self, serializer):
+        apartment = serializer.validated_data["apartment"]
+        if apartment.landlord != getattr(self.request.user, "profile", None):
+            raise PermissionDenied("You can only upload videos for your own apartments.")
+        serializer.save(landlord=apartment.landlord)
+
+    def partial_update(self, request, *args, **kwargs):
+        upload = self.get_object()
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.headers.get("Content-Length") or 0)
+        except (KeyError, ValueError):
+            return Response({"error": "Upload-Offset and Content-Length headers are required."}, status=400)
+
+        # ✅ Row locked for the whole chunk, so concurrent PATCHes for one upload run one at a time
+        with transaction.atomic():
+            upload = VideoUpload.objects.select_for_update().get(pk=upload.pk)
+            try:
+                # ✅ request.stream is read in small blocks; request.data is never touched
+                write_chunk(upload, request.stream, offset, length, request.headers.get("Upload-Checksum"))
+            except ChunkError as e:
+                return Response({"error": str(e), "offset": upload.offset}, status=e.status)
+
+            if upload.offset == upload.size:
+                complete_upload(upload)
+                upload.save(update_fields=["status", "error", "room_video", "updated_at"])
+        return Response(self.get_serializer(upload).data, headers={"Upload-Offset": str(upload.offset)})
+
+    def perform_destroy(self, instance):
+        instance.discard_part()
+        instance.delete()
+
+
+# --- Listing Cache Metrics ---
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def listing_cache_stats(request):
+    # ✅ Hit rate of the anonymous apartment list cache in this worker process
+    return Response(get_listing_cache_stats())
+
+
 # --- Landlord Stats Endpoint ---
+LANDLORD_STATS_PAGE_SIZE = 50
+LANDLORD_STATS_MAX_PAGE_SIZE = 200
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def landlord_stats(request):
     landlord = request.user.profile
-    apartments = Apartment.objects.filter(landlord=landlord).prefetch_related("rooms", "videos")
-
-    total_apartments = apartments.count()
-    total_rooms = Room.objects.filter(apartment__in=apartments).count()
-    pending_bookings = Booking.objects.filter(
-        room__apartment__in=apartments, status='pending'
-    ).count()
-    confirmed_bookings = Booking.objects.filter(
-        room__apartment__in=apartments, status='confirmed'
-    ).count()
-
-    total_earnings = Payment.objects.filter(
-        booking__room__apartment__in=apartments
-    ).aggregate(total=models.Sum('amount'))['total'] or 0
-
-    apartments_data = []
-    for apt in apartments:
-        cover_image_url = apt.image.image.url if hasattr(apt, "image") else None
-        avg_rent = apt.rooms.aggregate(avg=models.Avg("monthly_rent"))["avg"] or 0
-
-        apartments_data.append({
-            "id": apt.id,
-            "name": apt.name,
-            "description": apt.description,
-            "university": apt.university.name,
-            "average_rent": float(avg_rent),
-            "address": apt.address,
-            "is_approved": apt.is_approved,
-            "distance_km": apt.distance_from_university(),
-            "amenities": apt.amenities,
-            "cover_image": cover_image_url,
-            "videos": [vid.video.url for vid in apt.videos.all()],
-            "created_at": apt.created_at,
-        })
+    try:
+        page = int(request.query_params.get("page", 1))
+        page_size = int(request.query_params.get("page_size", LANDLORD_STATS_PAGE_SIZE))
+    except ValueError:
+        return Response({"error": "page and page_size must be integers."}, status=400)
+    if page < 1 or page_size < 1:
+        return Response({"error": "page and page_size must be positive."}, status=400)
+    page_size = min(page_size, LANDLORD_STATS_MAX_PAGE_SIZE)
+
+    # ✅ Cached per landlord and page; any worker's write moves the landlord's change counter
+    data = get_landlord_stats(landlord, (page - 1) * page_size, page_size)
+
+    count = data["totalApartments"]
+    url = request.build_absolute_uri()
+    next_url = replace_query_param(url, "page", page + 1) if page * page_size < count else None
+    previous_url = None
+    if page > 1:
+        previous_url = replace_query_param(url, "page", page - 1) if page > 2 else remove_query_param(url, "page")
 
     return Response({
-        "apartments": apartments_data,
-        "totalApartments": total_apartments,
-        "totalRooms": total_rooms,
-        "pendingBookings": pending_bookings,
-        "confirmedBookings": confirmed_bookings,
-        "totalEarnings": total_earnings,
+        **data,
+        "count": count,
+        "next": next_url,
+        "previous": previous_url,
     })
 
 
 # --- Distance Calculation Endpoint ---
-@api_view(['GET'])
+MAX_MATRIX_CELLS = 250_000  # largest matrix returned as a single JSON document
+MAX_STREAMED_MATRIX_CELLS = 5_000_000
+STREAM_CHUNK_ROWS = 256
+
+
+def _parse_points(points, name):
+    """Validate a list of [lat, lon] pairs; returns (lats, lons)."""
+    if not isinstance(points, list) or not points:
+        raise ValueError(f"'{name}' must be a non-empty list of [lat, lon] pairs.")
+    lats, lons = [], []
+    for point in points:
+        if not isinstance(point, (list, tuple)) or len(point) != 2:
+            raise ValueError(f"'{name}' must be a non-empty list of [lat, lon] pairs.")
+        lat, lon = float(point[0]), float(point[1])
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f"Coordinates out of range in '{name}'.")
+        lats.append(lat)
+        lons.append(lon)
+    return lats, lons
+
+
+def _stream_distance_rows(origins, destinations):
+    """NDJSON: one line per origin holding its row of distances."""
+    (o_lats, o_lons), (d_lats, d_lons) = origins, destinations
+    for start in range(0, len(o_lats), STREAM_CHUNK_ROWS):
+        stop = start + STREAM_CHUNK_ROWS
+        matrix = haversine_matrix(o_lats[start:stop], o_lons[start:stop], d_lats, d_lons)
+        yield "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in round_rows(matrix))
+
+
+@api_view(['GET', 'POST'])
 @permission_classes([permissions.AllowAny])
 def calculate_distance(request):
     """
@@ -224,7 +349,16 @@ def calculate_distance(request):
     Expected query parameters:
     - uni_lat, uni_lon (float)
     - apt_lat, apt_lon (float)
+
+    Batch mode (POST) computes a full distance matrix in one request:
+    - origins: [[lat, lon], ...]
+    - destinations: [[lat, lon], ...]
+    - stream (bool, optional): send one NDJSON line per origin instead of
+      a single JSON document; required above MAX_MATRIX_CELLS cells.
     """
+    if request.method == "POST":
+        return _distance_matrix(request)
+
     try:
         uni_lat = request.query_params.get("uni_lat")
         uni_lon = request.query_params.get("uni_lon")
@@ -240,12 +374,7 @@ def calculate_distance(request):
         uni_lat, uni_lon = float(uni_lat), float(uni_lon)
         apt_lat, apt_lon = float(apt_lat), float(apt_lon)
 
-        R = 6371
-        d_lat = radians(apt_lat - uni_lat)
-        d_lon = radians(apt_lon - uni_lon)
-        a = sin(d_lat / 2) ** 2 + cos(radians(uni_lat)) * cos(radians(apt_lat)) * sin(d_lon / 2) ** 2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        distance = R * c
+        distance = haversine_km(uni_lat, uni_lon, apt_lat, apt_lon)
 
         return Response({"distance_km": round(distance, 2)})
 
@@ -259,3 +388,90 @@ def calculate_distance(request):
             {"error": str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+def _distance_matrix(request):
+    try:
+        origins = _parse_points(request.data.get("origins"), "origins")
+        destinations = _parse_points(request.data.get("destinations"), "destinations")
+    except (TypeError, ValueError) as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    stream = str(request.data.get("stream", "")).lower() in ("1", "true")
+    cells = len(origins[0]) * len(destinations[0])
+    limit = MAX_STREAMED_MATRIX_CELLS if stream else MAX_MATRIX_CELLS
+    if cells > limit:
+        return Response(
+            {"error": f"Matrix too large ({cells} cells, limit {limit}). Use stream=true or split the request."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if stream:
+        return StreamingHttpResponse(
+            _stream_distance_rows(origins, destinations),
+            content_type="application/x-ndjson",
+        )
+
+    matrix = haversine_matrix(*origins, *destinations)
+    return Response({
+        "origins": len(origins[0]),
+        "destinations": len(destinations[0]),
+        "distances_km": round_rows(matrix),
+    })
+
+
+# --- Nearby Apartments Endpoint ---
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def nearby_apartments(request):
+    """
+    Approved apartments closest to a point, nearest first.
+    Expected query parameters:
+    - lat, lon (float)
+    - radius_km (float, optional, default 5, max 50)
+    - limit (int, optional, default 20, max 100)
+    """
+    try:
+        lat = float(request.query_params["lat"])
+        lon = float(request.query_params["lon"])
+        radius_km = float(request.query_params.get("radius_km", 5))
+        limit = int(request.query_params.get("limit", 20))
+    except KeyError:
+        return Response(
+            {"error": "Missing latitude or longitude values."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except ValueError:
+        return Response(
+            {"error": "Invalid latitude, longitude, radius or limit."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if not all(math.isfinite(value) for value in (lat, lon, radius_km)):  # float() accepts "nan" and "inf"
+        return Response(
+            {"error": "Invalid latitude, longitude, radius or limit."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or radius_km <= 0 or limit <= 0:
+        return Response(
+            {"error": "Coordinates out of range or non-positive radius/limit."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    radius_km = min(radius_km, 50)
+    limit = min(limit, 100)
+
+    hits = get_apartment_index().nearby(lat, lon, radius_km, limit=limit)
+    apartments = ApartmentReadSerializer.setup_eager_loading(
+        Apartment.objects.filter(id__in=[pk for pk, _ in hits], is_approved=True)
+    ).in_bulk()
+
+    results = []
+    for pk, distance in hits:
+        apartment = apartments.get(pk)
+        if apartment is None:  # unapproved/deleted since the index was updated
+            continue
+        data = ApartmentReadSerializer(apartment, context={"request": request}).data
+        data["distance_from_point_km"] = round(distance, 2)
+        results.append(data)
+
+    return Response({"count": len(results), "radius_km": radius_km, "results": results})
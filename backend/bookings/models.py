@@ -26,6 +26,10 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        indexes = [
+            # keyset pagination (newest first)
+            models.Index(fields=["created_at", "id"], name="booking_created_id_idx"),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["room"],
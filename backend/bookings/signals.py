@@ -0,0 +1,51 @@
+# bookings/signals.py
+from collections import Counter
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apartments.landlord_summary import (
+    BOOKING_COUNT_FIELDS, apply_summary_change, landlord_of_room, rebuild_landlord_summaries,
+)
+from .models import Booking
+
+
+# --- Landlord summary ---
+@receiver(pre_save, sender=Booking)
+def remember_previous_booking(sender, instance, raw=False, **kwargs):
+    """Keep the stored room/status so an edit can move the counts."""
+    instance._previous_booking = None
+    if instance.pk and not raw:
+        instance._previous_booking = (
+            Booking.objects.filter(pk=instance.pk).values_list("room_id", "status").first()
+        )
+
+
+@receiver(post_save, sender=Booking)
+def update_landlord_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    landlord_id = landlord_of_room(instance.room_id)
+    deltas = Counter()
+    deltas[BOOKING_COUNT_FIELDS.get(instance.status)] += 1
+
+    previous = getattr(instance, "_previous_booking", None)
+    if previous is not None:
+        previous_room_id, previous_status = previous
+        if previous_room_id != instance.room_id:
+            previous_landlord_id = landlord_of_room(previous_room_id)
+            if previous_landlord_id != landlord_id:
+                # the booking's payment moves too
+                rebuild_landlord_summaries({previous_landlord_id, landlord_id} - {None})
+                return
+        deltas[BOOKING_COUNT_FIELDS.get(previous_status)] -= 1
+
+    deltas.pop(None, None)
+    apply_summary_change(landlord_id, **deltas)
+
+
+@receiver(post_delete, sender=Booking)
+def update_landlord_summary_on_delete(sender, instance, **kwargs):
+    field = BOOKING_COUNT_FIELDS.get(instance.status)
+    if field:
+        apply_summary_change(landlord_of_room(instance.room_id), create=False, **{field: -1})
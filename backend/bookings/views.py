@@ -3,6 +3,7 @@ from django.shortcuts import render
 # Create your views here.
 from rest_framework import viewsets, permissions
 from rest_framework.exceptions import PermissionDenied
+from ComradeHousingHub.pagination import KeysetOrPageNumberPagination
 from .models import Booking
 from .serializers import BookingSerializer
 
@@ -10,6 +11,7 @@ from .serializers import BookingSerializer
 class BookingViewSet(viewsets.ModelViewSet):
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetOrPageNumberPagination  # ?cursor= for keyset paging
 
     def get_queryset(self):
         user = self.request.user
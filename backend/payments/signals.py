@@ -0,0 +1,48 @@
+# payments/signals.py
+from decimal import Decimal
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apartments.landlord_summary import apply_summary_change, landlord_of_booking
+from .models import Payment
+
+
+# --- Landlord summary ---
+@receiver(pre_save, sender=Payment)
+def remember_previous_payment(sender, instance, raw=False, **kwargs):
+    """Keep the stored booking/amount so an edit can move the earnings."""
+    instance._previous_payment = None
+    if instance.pk and not raw:
+        instance._previous_payment = (
+            Payment.objects.filter(pk=instance.pk).values_list("booking_id", "amount").first()
+        )
+
+
+@receiver(post_save, sender=Payment)
+def update_landlord_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    amount = Decimal(str(instance.amount))
+    landlord_id = landlord_of_booking(instance.booking_id)
+    previous = getattr(instance, "_previous_payment", None)
+    if previous is None:
+        apply_summary_change(landlord_id, total_earnings=amount)
+        return
+
+    previous_booking_id, previous_amount = previous
+    previous_landlord_id = (
+        landlord_id if previous_booking_id == instance.booking_id else landlord_of_booking(previous_booking_id)
+    )
+    if previous_landlord_id == landlord_id:
+        apply_summary_change(landlord_id, total_earnings=amount - previous_amount)
+    else:
+        apply_summary_change(previous_landlord_id, total_earnings=-previous_amount)
+        apply_summary_change(landlord_id, total_earnings=amount)
+
+
+@receiver(post_delete, sender=Payment)
+def update_landlord_summary_on_delete(sender, instance, **kwargs):
+    apply_summary_change(
+        landlord_of_booking(instance.booking_id), create=False, total_earnings=-Decimal(str(instance.amount))
+    )
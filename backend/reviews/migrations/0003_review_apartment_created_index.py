@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0009_keyset_indexes'),
+        ('reviews', '0002_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['apartment', 'created_at', 'id'], name='review_apartment_created_idx'),
+        ),
+    ]
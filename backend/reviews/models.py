@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apartments.models import Apartment
@@ -10,5 +10,19 @@ class Review(models.Model):
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination (newest first)
+            models.Index(fields=["created_at", "id"], name="review_created_id_idx"),
+            # latest reviews per apartment (embedded + nested /apartments/{id}/reviews/)
+            models.Index(fields=["apartment", "created_at", "id"], name="review_apartment_created_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The apartment's rating aggregates are updated by reviews.signals
+        # inside this same transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Review by {self.user.username} ({self.rating}/5)"
@@ -0,0 +1,45 @@
+# reviews/signals.py
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apartments.ratings import apply_rating_change
+from ComradeHousingHub.conditional import bump_change_counters
+from .models import Review
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, raw=False, **kwargs):
+    """Keep the stored apartment/rating so an edit can move the counts."""
+    instance._previous_rating = None
+    if instance.pk and not raw:
+        instance._previous_rating = (
+            Review.objects.filter(pk=instance.pk).values_list("apartment_id", "rating").first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_rating", None)
+    if previous is None:
+        apply_rating_change(instance.apartment_id, added=instance.rating)
+        return
+
+    previous_apartment_id, previous_rating = previous
+    if previous_apartment_id != instance.apartment_id:
+        apply_rating_change(previous_apartment_id, removed=previous_rating)
+        apply_rating_change(instance.apartment_id, added=instance.rating)
+    elif previous_rating != instance.rating:
+        apply_rating_change(instance.apartment_id, added=instance.rating, removed=previous_rating)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    apply_rating_change(instance.apartment_id, removed=instance.rating)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def bump_apartments_counter(sender, **kwargs):
+    # reviews and rating aggregates are part of the apartment payloads
+    bump_change_counters("apartments")
@@ -1,3 +1,86 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import Profile
+from apartments.models import Apartment
+from apartments.serializers import EMBEDDED_REVIEW_LIMIT
+from universities.models import University
+from .models import Review
+
+
+class RatingAggregateTests(TestCase):
+    """Apartment review aggregates follow review creates, edits and deletes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        university = University.objects.create(name="Maseno University")
+        landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        cls.student = User.objects.create(username="student")
+        cls.apartment = Apartment.objects.create(university=university, landlord=landlord, name="Block A")
+        cls.other = Apartment.objects.create(university=university, landlord=landlord, name="Block B")
+
+    def assertStats(self, apartment, average, count, histogram):
+        apartment.refresh_from_db()
+        self.assertAlmostEqual(apartment.average_rating, average)
+        self.assertEqual(apartment.review_count, count)
+        self.assertEqual(apartment.rating_histogram, {**dict.fromkeys(range(1, 6), 0), **histogram})
+
+    def test_create_edit_delete(self):
+        first = Review.objects.create(apartment=self.apartment, user=self.student, rating=5)
+        second = Review.objects.create(apartment=self.apartment, user=self.student, rating=2)
+        self.assertStats(self.apartment, 3.5, 2, {5: 1, 2: 1})
+
+        second.rating = 4
+        second.save()
+        self.assertStats(self.apartment, 4.5, 2, {5: 1, 4: 1})
+
+        first.apartment = self.other
+        first.save()
+        self.assertStats(self.apartment, 4, 1, {4: 1})
+        self.assertStats(self.other, 5, 1, {5: 1})
+
+        second.delete()
+        self.assertStats(self.apartment, 0, 0, {})
+
+    def test_rebuild_command_repairs_drift(self):
+        Review.objects.create(apartment=self.apartment, user=self.student, rating=3)
+        Review.objects.create(apartment=self.apartment, user=self.student, rating=1)
+        Apartment.objects.update(average_rating=0, review_count=0, rating_1_count=0, rating_3_count=0)
+
+        call_command("rebuild_rating_stats", stdout=StringIO())
+        self.assertStats(self.apartment, 2, 2, {3: 1, 1: 1})
+        self.assertStats(self.other, 0, 0, {})
+
+
+class EmbeddedReviewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        university = University.objects.create(name="Egerton University")
+        landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        cls.apartment = Apartment.objects.create(
+            university=university, landlord=landlord, name="Popular", is_approved=True,
+        )
+        for i in range(7):
+            user = User.objects.create(username=f"student{i}")
+            Review.objects.create(apartment=cls.apartment, user=user, rating=1 + i % 5, comment=f"#{i}")
+
+    def test_detail_embeds_latest_reviews_only(self):
+        client = APIClient()
+        with self.assertNumQueries(5):  # change counter, apartment, rooms, videos, latest reviews
+            response = client.get(f"/api/apartments/apartments/{self.apartment.id}/")
+
+        self.assertEqual(response.data["review_count"], 7)
+        self.assertEqual(
+            [r["comment"] for r in response.data["reviews"]],
+            [f"#{i}" for i in range(6, 6 - EMBEDDED_REVIEW_LIMIT, -1)],
+        )
+        self.assertEqual(response.data["reviews"][0]["reviewer"], "student6")
 
-# Create your tests here.
+    def test_nested_route_pages_through_the_rest(self):
+        response = APIClient().get(f"/api/reviews/apartments/{self.apartment.id}/reviews/", {"page": 1})
+        self.assertEqual(response.data["count"], 7)
+        self.assertEqual(response.data["results"][-1]["comment"], "#0")
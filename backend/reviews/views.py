@@ -1,4 +1,5 @@
 from rest_framework import viewsets, permissions
+from ComradeHousingHub.pagination import KeysetOrPageNumberPagination
 from .models import Review
 from .serializers import ReviewSerializer
 
@@ -16,6 +17,7 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
 
 class ReviewViewSet(viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
+    pagination_class = KeysetOrPageNumberPagination  # ?cursor= for keyset paging
 
     def get_queryset(self):
         """
@@ -23,7 +25,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
         - Otherwise: return all reviews.
         """
         apartment_id = self.kwargs.get("apartment_pk")  # from nested router
-        qs = Review.objects.all().select_related("apartment", "user")
+        qs = Review.objects.all().select_related("apartment", "user").order_by("-created_at", "-id")
         if apartment_id:
             qs = qs.filter(apartment_id=apartment_id)
         return qs
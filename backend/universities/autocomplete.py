@@ -0,0 +1,200 @@
+# universities/autocomplete.py
+"""
+In-process university name index for the autocomplete endpoint.
+
+Names are normalised (casefolded, whitespace collapsed) and inserted into
+two prefix tries: one keyed by the full name and one by every suffix that
+starts at a word boundary. Each trie node keeps its entries pre-sorted
+shortest name first, so a prefix lookup is a walk of len(q) nodes plus a
+slice. Ranking follows UniversityViewSet's ?search=:
+
+    1 exact, 2 starts with, 3 contains, then shorter names first.
+
+Within "contains", word-start matches ("kenyatta" in "Kenyatta
+University") come before mid-word ones, which are only looked for when
+the tries return too few results, via an index of every 3-character
+substring. When nothing
+contains the query at all, matches come from a trigram index instead,
+scored like pg_trgm's word_similarity (share of the query's trigrams
+found in the name), so typos like "kenyata" still find something.
+
+Entries carry total_apartments (University.approved_apartment_count) for
+the dropdown's apartment count badge.
+
+Built lazily on first lookup and versioned by the "universities" change
+counter (see ComradeHousingHub.conditional), a database row that moves
+whenever a university or its counts change, in any process. A lookup that
+sees a newer version than its index rebuilds it first, so every worker
+picks up the change.
+"""
+import threading
+from collections import defaultdict
+
+from ComradeHousingHub.conditional import change_counter
+
+FUZZY_THRESHOLD = 0.5
+
+COUNTER = "universities"
+
+_index = None
+_build_lock = threading.Lock()
+
+
+def normalize(text):
+    return " ".join(text.casefold().split())
+
+
+def trigrams(text):
+    """Trigrams of each word padded as pg_trgm does ('  w', ' wo', 'wor', 'ord', 'rd ')."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _Node:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []
+
+
+class _Trie:
+    def __init__(self):
+        self.root = _Node()
+
+    def insert(self, key, entry_id):
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+            if not node.ids or node.ids[-1] != entry_id:  # one id per node, even for repeated words
+                node.ids.append(entry_id)
+
+    def finish(self, sort_key):
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            node.ids.sort(key=sort_key)
+            stack.extend(node.children.values())
+
+    def find(self, prefix):
+        """Entry ids under `prefix`, shortest name first."""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.ids
+
+
+class UniversityIndex:
+    def __init__(self, universities):
+        """universities: iterable of (id, name, town, total_apartments)."""
+        self.entries = {}
+        self.names = {}
+        self.full = _Trie()
+        self.words = _Trie()
+        self.grams = defaultdict(set)
+        self.substrings = defaultdict(set)
+        self.version = None
+
+        for pk, name, town, total_apartments in universities:
+            key = normalize(name)
+            self.entries[pk] = {"id": pk, "name": name, "town": town, "total_apartments": total_apartments}
+            self.names[pk] = key
+            self.full.insert(key, pk)
+            for start in range(1, len(key)):
+                if key[start - 1] == " ":
+                    self.words.insert(key[start:], pk)
+            for gram in trigrams(key):
+                self.grams[gram].add(pk)
+            for i in range(len(key) - 2):
+                self.substrings[key[i:i + 3]].add(pk)
+
+        self.full.finish(self.sort_key)
+        self.words.finish(self.sort_key)
+        self.by_length = sorted(self.names, key=self.sort_key)
+
+    def sort_key(self, pk):
+        return len(self.names[pk]), self.names[pk]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, limit=10):
+        """Up to `limit` entries ranked exact > prefix > contains > fuzzy, each tagged with its match."""
+        q = normalize(query)
+        if not q or limit < 1:
+            return []
+        results, seen = [], set()
+
+        def take(ids, match):
+            for pk in ids:
+                if len(results) >= limit:
+                    return
+                if pk not in seen:
+                    seen.add(pk)
+                    results.append({**self.entries[pk], "match": match})
+
+        prefixed = self.full.find(q)
+        take(prefixed[:1] if prefixed and self.names[prefixed[0]] == q else (), "exact")
+        take(prefixed, "prefix")
+        take(self.words.find(q), "contains")
+        if len(results) < limit:
+            take(self.containing(q), "contains")
+        if not results:  # nothing contains q: probably a typo
+            take(self.fuzzy(q), "fuzzy")
+        return results
+
+    def containing(self, q):
+        """Ids whose name contains q anywhere, shortest first."""
+        if len(q) < 3:
+            return (pk for pk in self.by_length if q in self.names[pk])
+        postings = sorted((self.substrings.get(q[i:i + 3], set()) for i in range(len(q) - 2)), key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        return sorted((pk for pk in candidates if q in self.names[pk]), key=self.sort_key)
+
+    def fuzzy(self, q):
+        """Ids whose trigram similarity to q reaches FUZZY_THRESHOLD, most similar first."""
+        query_grams = trigrams(q)
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for pk in self.grams.get(gram, ()):
+                shared[pk] += 1
+        scored = []
+        for pk, common in shared.items():
+            score = common / len(query_grams)
+            if score >= FUZZY_THRESHOLD:
+                scored.append((-score, len(self.names[pk]), pk))
+        return [pk for _, _, pk in sorted(scored)]
+
+
+def build_university_index():
+    from .models import University
+
+    return UniversityIndex(
+        University.objects.values_list("id", "name", "town", "approved_apartment_count").iterator()
+    )
+
+
+def get_university_index():
+    """The current index, rebuilt first if universities changed since it was built."""
+    global _index
+    version = change_counter(COUNTER)[0]
+    index = _index
+    if index is None or index.version != version:
+        with _build_lock:
+            index = _index
+            if index is None or index.version != version:
+                index = build_university_index()
+                index.version = version  # read before building, so a concurrent change forces a rebuild
+                _index = index
+    return index
+
+
+def reset_university_index():
+    """Drop this process's index; the next lookup rebuilds it from the database."""
+    global _index
+    _index = None
@@ -1,9 +1,14 @@
 import csv
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from ComradeHousingHub.conditional import bump_change_counters
 from universities.models import University
 from django.conf import settings
 import os
 
+FIELDS = ["town", "lat", "lng"]
+
+
 class Command(BaseCommand):
     help = "Load universities from a CSV file"
 
@@ -14,6 +19,11 @@ class Command(BaseCommand):
             help="Path to the CSV file containing universities",
             default=os.path.join(settings.BASE_DIR, "universities", "universities.csv"),
         )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show what would be added or updated without writing anything",
+        )
 
     def handle(self, *args, **kwargs):
         file_path = kwargs["file"]
@@ -22,27 +32,59 @@ class Command(BaseCommand):
             with open(file_path, newline='', encoding="utf-8") as csvfile:
                 reader = csv.DictReader(csvfile)
 
+                rows = {}
                 for row in reader:
-                    name = row["name"].strip()
-                    town = row["town"].strip()
-                    lat = float(row["lat"])
-                    lng = float(row["lng"])   
-
-                    uni, created = University.objects.update_or_create(
-                        name=name,
-                        defaults={
-                            "town": town,
-                            "lat": lat,
-                            "lng": lng,
-                        },
-                    )
-
-                    if created:
-                        self.stdout.write(self.style.SUCCESS(f"Added {name}"))
-                    else:
-                        self.stdout.write(self.style.WARNING(f"Updated {name}"))
+                    rows[row["name"].strip()] = {
+                        "town": row["town"].strip(),
+                        "lat": float(row["lat"]),
+                        "lng": float(row["lng"]),
+                    }
+
+            self.sync(rows, kwargs["dry_run"])
 
         except FileNotFoundError:
             self.stderr.write(self.style.ERROR(f"File not found: {file_path}"))
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"Error: {e}"))
+
+    def sync(self, rows, dry_run):
+        """Diff the CSV against the stored universities and write only what changed."""
+        existing = University.objects.in_bulk(rows, field_name="name")
+        added, updated, moved = [], [], []
+
+        for name, values in rows.items():
+            uni = existing.get(name)
+            if uni is None:
+                added.append(University(name=name, **values))
+                continue
+            if all(getattr(uni, field) == value for field, value in values.items()):
+                continue
+            if (uni.lat, uni.lng) != (values["lat"], values["lng"]):
+                moved.append(uni)
+            for field, value in values.items():
+                setattr(uni, field, value)
+            updated.append(uni)
+
+        for uni in added:
+            self.stdout.write(self.style.SUCCESS(f"{'Would add' if dry_run else 'Added'} {uni.name}"))
+        for uni in updated:
+            self.stdout.write(self.style.WARNING(f"{'Would update' if dry_run else 'Updated'} {uni.name}"))
+
+        if not dry_run:
+            with transaction.atomic():
+                # update_conflicts covers a university created since the diff was taken
+                University.objects.bulk_create(
+                    added, update_conflicts=True, unique_fields=["name"], update_fields=FIELDS
+                )
+                University.objects.bulk_update(updated, FIELDS)
+                # bulk writes skip the University signals; recompute stored distances and move the
+                # counter behind catalog ETags and the autocomplete index here
+                from apartments.models import Apartment
+                Apartment.refresh_distances(moved)
+                bump_change_counters("universities")
+
+        unchanged = len(rows) - len(added) - len(updated)
+        self.stdout.write(
+            f"{'Dry run: ' if dry_run else ''}{len(added)} added, {len(updated)} updated "
+            f"({len(moved)} with new coordinates), {unchanged} unchanged"
+        )
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:11
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_university_counts(apps, schema_editor):
+    Apartment = apps.get_model("apartments", "Apartment")
+    University = apps.get_model("universities", "University")
+
+    rows = Apartment.objects.filter(is_approved=True).values("university_id").annotate(
+        approved_apartment_count=Count("id"),
+        vacant_room_count=Sum("vacant_room_count"),
+    ).order_by()
+    for row in rows:
+        University.objects.filter(pk=row.pop("university_id")).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('universities', '0001_initial'),
+        ('apartments', '0008_apartment_room_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='university',
+            name='approved_apartment_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='university',
+            name='vacant_room_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_university_counts, migrations.RunPython.noop),
+    ]
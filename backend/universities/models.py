@@ -6,8 +6,24 @@ class University(models.Model):
     lat = models.FloatField(null=True, blank=True)
     lng = models.FloatField(null=True, blank=True)
 
+    # Listing counts, kept in sync by apartments.signals (rebuild with `rebuild_university_counts`)
+    approved_apartment_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+    vacant_room_count = models.PositiveIntegerField(default=0, editable=False)
+
     class Meta:
         ordering = ['name']  # default order by name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored coordinates so saves can tell whether they moved
+        instance._loaded_coords = (instance.__dict__.get("lat"), instance.__dict__.get("lng"))
+        return instance
+
+    @property
+    def coordinates_changed(self):
+        """True for new universities or when lat/lng differ from what was loaded."""
+        return getattr(self, "_loaded_coords", None) != (self.lat, self.lng)
+
     def __str__(self):
         return self.name
@@ -13,7 +13,7 @@ class UniversityReadSerializer(serializers.ModelSerializer):
         model = University
         fields = [
             'id', 'name', 'town', 'lat', 'lng',
-            'location', 'total_apartments'
+            'location', 'total_apartments', 'vacant_room_count'
         ]
 
     def get_location(self, obj):
@@ -0,0 +1,12 @@
+# universities/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ComradeHousingHub.conditional import bump_change_counters
+from .models import University
+
+
+# Also versions the autocomplete index (universities.autocomplete)
+@receiver([post_save, post_delete], sender=University)
+def bump_universities_counter(sender, **kwargs):
+    bump_change_counters("universities")
@@ -1,3 +1,238 @@
+from io import StringIO
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Profile
+from apartments.models import Apartment
+from .autocomplete import reset_university_index
+from .models import University
+
+
+class LoadUniversitiesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.moved = University.objects.create(name="Moved University", town="Old", lat=0.0, lng=0.0)
+        University.objects.create(name="Same University", town="Nyeri", lat=-0.4, lng=36.9)
+        landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        cls.apartment = Apartment.objects.create(
+            university=cls.moved, landlord=landlord, name="Near", lat=-1.0, lon=37.0,
+        )
+
+    def setUp(self):
+        handle = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8")
+        with handle:
+            handle.write(
+                "name,town,lat,lng\n"
+                "Moved University,New,-1.0,37.01\n"
+                "Same University,Nyeri,-0.4,36.9\n"
+                "New University,Embu,-0.5,37.45\n"
+            )
+        self.path = handle.name
+        self.addCleanup(os.remove, handle.name)
+
+    def load(self, *args):
+        out = StringIO()
+        call_command("load_universities", "--file", self.path, *args, stdout=out, stderr=out)
+        return out.getvalue()
+
+    def test_dry_run_writes_nothing(self):
+        out = self.load("--dry-run")
+        self.assertIn("Would add New University", out)
+        self.assertIn("Dry run: 1 added, 1 updated (1 with new coordinates), 1 unchanged", out)
+        self.assertFalse(University.objects.filter(name="New University").exists())
+
+    def test_applies_diff_and_refreshes_distances(self):
+        with CaptureQueriesContext(connection) as queries:
+            out = self.load()
+        self.assertIn("1 added, 1 updated (1 with new coordinates), 1 unchanged", out)
+        self.assertLessEqual(len(queries), 7)  # select, savepoint, insert, update, distances, release
+
+        self.moved.refresh_from_db()
+        self.assertEqual((self.moved.town, self.moved.lng), ("New", 37.01))
+        self.apartment.refresh_from_db()
+        self.assertAlmostEqual(self.apartment.distance_km, 1.11, places=2)
+
+        self.assertIn("0 added, 0 updated (0 with new coordinates), 3 unchanged", self.load())
+
+
+class AutocompleteTests(TestCase):
+    url = "/api/universities/universities/autocomplete/"
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in [
+            "Kenyatta University", "Kenya Methodist University", "Kenya", "Technical University of Kenya",
+            "Moi University", "Egerton University",
+        ]:
+            University.objects.create(name=name)
+
+    def setUp(self):
+        reset_university_index()
+
+    def names(self, q, **params):
+        response = self.client.get(self.url, {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(row["name"], row["match"]) for row in response.data]
+
+    def test_ranks_exact_then_prefix_then_contains(self):
+        self.assertEqual(self.names("kenya"), [
+            ("Kenya", "exact"),
+            ("Kenyatta University", "prefix"),
+            ("Kenya Methodist University", "prefix"),
+            ("Technical University of Kenya", "contains"),
+        ])
+        self.assertEqual(self.names("  KENYA   meth"), [("Kenya Methodist University", "prefix")])
+        self.assertEqual(self.names("erton"), [("Egerton University", "contains")])
+        self.assertEqual(len(self.names("university", limit=2)), 2)
+
+    def test_typos_fall_back_to_trigram_matches(self):
+        self.assertEqual(self.names("kenyata")[0], ("Kenyatta University", "fuzzy"))
+        self.assertEqual(self.names("egertn univ")[0], ("Egerton University", "fuzzy"))
+        self.assertEqual(self.names("zzzz"), [])
+
+    def test_lookups_do_not_query_and_follow_changes(self):
+        self.names("moi")  # build
+        with self.assertNumQueries(1):  # the index version
+            self.assertEqual(self.names("moi"), [("Moi University", "prefix")])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            University.objects.create(name="Moi Teaching Hospital")
+        self.assertEqual([name for name, _ in self.names("moi")], ["Moi University", "Moi Teaching Hospital"])
+        self.assertEqual(self.client.get(self.url, {"q": "moi", "limit": "x"}).status_code, 400)
+
+    def test_entries_carry_apartment_counts(self):
+        moi = University.objects.get(name="Moi University")
+        self.assertEqual(self.client.get(self.url, {"q": "moi"}).data[0]["total_apartments"], 0)
+
+        landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        with self.captureOnCommitCallbacks(execute=True):
+            Apartment.objects.create(university=moi, landlord=landlord, name="Kesses Court", is_approved=True)
+        self.assertEqual(self.client.get(self.url, {"q": "moi"}).data[0]["total_apartments"], 1)
+
+
+class UniversityCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.kenyatta = University.objects.create(name="Kenyatta University")
+        cls.moi = University.objects.create(name="Moi University")
+        cls.landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+
+    def counts(self, university):
+        university.refresh_from_db()
+        return university.approved_apartment_count, university.vacant_room_count
+
+    def test_counts_follow_approval_vacancy_and_moves(self):
+        from apartments.models import Room
+
+        apartment = Apartment.objects.create(university=self.kenyatta, landlord=self.landlord, name="Pending")
+        room = Room.objects.create(apartment=apartment, label="A1", monthly_rent=5000)
+        Room.objects.create(apartment=apartment, label="A2", monthly_rent=5000)
+        self.assertEqual(self.counts(self.kenyatta), (0, 0))  # unapproved listings are not counted
+
+        apartment = Apartment.objects.get(pk=apartment.pk)
+        apartment.is_approved = True
+        apartment.save()
+        self.assertEqual(self.counts(self.kenyatta), (1, 2))
+
+        room.is_vacant = False
+        room.save()
+        self.assertEqual(self.counts(self.kenyatta), (1, 1))
+
+        apartment.refresh_from_db()
+        apartment.university = self.moi
+        apartment.save()
+        self.assertEqual((self.counts(self.kenyatta), self.counts(self.moi)), ((0, 0), (1, 1)))
+
+        apartment.delete()
+        self.assertEqual(self.counts(self.moi), (0, 0))
+
+    def test_counter_only_moves_when_a_count_changes(self):
+        from apartments.university_counts import refresh_university_counts
+
+        Apartment.objects.create(university=self.moi, landlord=self.landlord, name="Approved", is_approved=True)
+        with self.captureOnCommitCallbacks() as callbacks:
+            refresh_university_counts([self.moi.id, self.kenyatta.id])
+        self.assertEqual(callbacks, [])
+
+        University.objects.filter(pk=self.moi.pk).update(approved_apartment_count=7)
+        with self.captureOnCommitCallbacks() as callbacks:
+            refresh_university_counts([self.moi.id, self.kenyatta.id])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.counts(self.moi), (1, 0))
+
+    def test_list_orders_by_counter_without_grouping(self):
+        Apartment.objects.create(university=self.moi, landlord=self.landlord, name="Approved", is_approved=True)
+        Apartment.objects.create(university=self.kenyatta, landlord=self.landlord, name="Pending")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/universities/universities/", {"ordering": "-total_apartments"})
+        self.assertNotIn("GROUP BY", queries[0]["sql"])
+        self.assertEqual(
+            [(row["name"], row["total_apartments"]) for row in response.data],
+            [("Moi University", 1), ("Kenyatta University", 0)],
+        )
+
+    def test_rebuild_repairs_drift(self):
+        Apartment.objects.create(university=self.moi, landlord=self.landlord, name="Approved", is_approved=True)
+        University.objects.update(approved_apartment_count=7)
+
+        out = StringIO()
+        call_command("rebuild_university_counts", stdout=out)
+        self.assertIn("2 university(ies) updated", out.getvalue())
+        self.assertEqual((self.counts(self.moi), self.counts(self.kenyatta)), ((1, 0), (0, 0)))
+
+
+class UniversityApartmentsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from apartments.models import Room
+
+        cls.university = University.objects.create(name="Egerton University", lat=-0.37, lng=35.93)
+        landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        listings = [("Far", -0.40, 4000), ("Near", -0.371, 9000), ("Middle", -0.38, 5000), ("Unmapped", None, 3000)]
+        for name, lat, rent in listings:
+            apartment = Apartment.objects.create(
+                university=cls.university, landlord=landlord, name=name, lat=lat, lon=35.93 if lat else None,
+                is_approved=True,
+            )
+            Room.objects.create(apartment=apartment, label="R1", monthly_rent=rent)
+        Apartment.objects.create(university=cls.university, landlord=landlord, name="Pending", lat=-0.37, lon=35.93)
+
+    def get(self, **params):
+        return self.client.get(f"/api/universities/universities/{self.university.id}/apartments/", params)
+
+    def test_nearest_affordable_first(self):
+        with self.assertNumQueries(3):  # university, count, apartments (cover image joined)
+            response = self.get(ordering="distance")
+        self.assertEqual([a["name"] for a in response.data["results"]], ["Near", "Middle", "Far", "Unmapped"])
+
+        response = self.get(ordering="distance", max_rent=5000)
+        self.assertEqual([a["name"] for a in response.data["results"]], ["Middle", "Far", "Unmapped"])
+
+    def test_rejects_bad_parameters(self):
+        self.assertEqual(self.get(ordering="rating").status_code, 400)
+        self.assertEqual(self.get(max_rent="cheap").status_code, 400)
+
+
+class UniversityConditionalGetTests(TestCase):
+    def test_list_revalidates_against_the_change_counter(self):
+        University.objects.create(name="Maseno University")
+        url = "/api/universities/universities/"
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(1):  # the change counter only
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
 
-# Create your tests here.
+        landlord = Profile.objects.create(user=User.objects.create(username="landlord"), role="landlord")
+        with self.captureOnCommitCallbacks(execute=True):
+            Apartment.objects.create(
+                university=University.objects.get(), landlord=landlord, name="Lakeside", is_approved=True,
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)  # total_apartments moved
+        self.assertEqual(response.json()[0]["total_apartments"], 1)
@@ -1,14 +1,18 @@
 # universities/views.py
-from django.db.models import Count, Case, When, IntegerField, Value
+from django.db.models import F, Case, When, IntegerField, Value
 from django.db.models.functions import Length
 from rest_framework import viewsets, permissions, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
+from ComradeHousingHub.conditional import ConditionalGetMixin
+from .autocomplete import get_university_index
 from .models import University
 from .serializers import UniversityReadSerializer, UniversityWriteSerializer
+from apartments.filters import ApartmentFilter
 from apartments.models import Apartment
-from apartments.serializers import ApartmentReadSerializer
+from apartments.serializers import ApartmentListSerializer
 
 
 # ✅ Custom pagination for apartments (keep it)
@@ -20,9 +24,21 @@ class UniversityApartmentPagination(PageNumberPagination):
     max_page_size = 50
 
 
-class UniversityViewSet(viewsets.ModelViewSet):
+# Nearest first uses the (university, distance_km) index; apartments without coordinates go last
+UNIVERSITY_APARTMENT_ORDERINGS = {
+    "newest": ("-created_at", "-id"),
+    "distance": (F("distance_km").asc(nulls_last=True), "id"),
+}
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+
+class UniversityViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    change_counters = ("universities",)  # ETag / 304 on list and retrieve
+    # total_apartments reads the counter cache kept by apartments.signals (no GROUP BY)
     queryset = University.objects.all().annotate(
-        total_apartments=Count("apartments")
+        total_apartments=F("approved_apartment_count")
     )
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["name"]
@@ -59,22 +75,48 @@ class UniversityViewSet(viewsets.ModelViewSet):
             return UniversityReadSerializer
         return UniversityWriteSerializer
 
+    # ✅ Autocomplete from the in-process name index (one version lookup per keystroke, no name scan)
+    @action(detail=False, methods=["get"], url_path="autocomplete")
+    def autocomplete(self, request):
+        try:
+            limit = int(request.query_params.get("limit", AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=400)
+        limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+        return Response(get_university_index().search(request.query_params.get("q", ""), limit))
+
     # ✅ Custom action: fetch paginated apartments for a university
+    # Takes the apartment list filters (?max_rent=, ?vacant=, ...) and ?ordering=distance|newest
     @action(detail=True, methods=["get"], url_path="apartments")
     def apartments(self, request, pk=None):
         university = self.get_object()
-        apartments = Apartment.objects.filter(
-            university=university,
-            is_approved=True
+        ordering = request.query_params.get("ordering", "newest")
+        if ordering not in UNIVERSITY_APARTMENT_ORDERINGS:
+            return Response(
+                {"error": f"ordering must be one of: {', '.join(UNIVERSITY_APARTMENT_ORDERINGS)}."}, status=400
+            )
+
+        filterset = ApartmentFilter(
+            request.query_params,
+            queryset=Apartment.objects.filter(university=university, is_approved=True),
+            request=request,
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+
+        fields = ApartmentListSerializer.requested_fields(request.query_params)
+        apartments = ApartmentListSerializer.setup_eager_loading(
+            filterset.qs.order_by(*UNIVERSITY_APARTMENT_ORDERINGS[ordering]),
+            fields,
         )
 
         # ✅ Apply pagination for apartments only
         paginator = UniversityApartmentPagination()
         page = paginator.paginate_queryset(apartments, request)
 
-        serializer = ApartmentReadSerializer(
+        serializer = ApartmentListSerializer(
             page,
             many=True,
-            context={"request": request, "university": university}
+            context={"request": request, "university": university, "fields": fields}
         )
         return paginator.get_paginated_response(serializer.data)
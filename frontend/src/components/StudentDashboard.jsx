@@ -2,6 +2,8 @@ import React, { useState, useEffect, useRef } from "react";
 import axiosInstance from "../api/axios";
 import "./StudentDashboard.css";
 
+const SEARCH_DEBOUNCE_MS = 250;
+
 const StudentDashboard = () => {
   const [universities, setUniversities] = useState([]);
   const [filteredUnis, setFilteredUnis] = useState([]);
@@ -73,20 +75,55 @@ const StudentDashboard = () => {
     return () => document.removeEventListener("mousedown", handleClickOutside);
   }, []);
 
-  // Filter universities dynamically
+  // Filter universities dynamically (server-side autocomplete, typo tolerant).
+  // Requests wait for a pause in typing, and each one aborts the previous,
+  // so a slow older response can never replace a newer one.
+  const searchTimer = useRef(null);
+  const searchRequest = useRef(null);
+
+  const cancelSearch = () => {
+    clearTimeout(searchTimer.current);
+    searchRequest.current?.abort();
+  };
+
+  // Drop a pending search when the dashboard unmounts
+  useEffect(() => {
+    const timer = searchTimer;
+    const request = searchRequest;
+    return () => {
+      clearTimeout(timer.current);
+      request.current?.abort();
+    };
+  }, []);
+
+  const searchUniversities = async (term) => {
+    const controller = new AbortController();
+    searchRequest.current = controller;
+    try {
+      const res = await axiosInstance.get("/universities/universities/autocomplete/", {
+        params: { q: term },
+        signal: controller.signal,
+      });
+      setFilteredUnis(res.data);
+    } catch (err) {
+      if (!controller.signal.aborted) console.error("Error searching universities", err);
+    }
+  };
+
   const handleSearchChange = (e) => {
-    const term = e.target.value.toLowerCase();
+    const term = e.target.value;
     setSearchTerm(term);
-    const filtered = universities.filter(
-      (uni) =>
-        uni.name.toLowerCase().includes(term) ||
-        (uni.alias && uni.alias.toLowerCase().includes(term))
-    );
-    setFilteredUnis(filtered);
+    cancelSearch();
+    if (!term.trim()) {
+      setFilteredUnis(universities);
+      return;
+    }
+    searchTimer.current = setTimeout(() => searchUniversities(term), SEARCH_DEBOUNCE_MS);
   };
 
   // Select university
   const handleSelectUniversity = (uni) => {
+    cancelSearch();
     setSelectedUni(uni);
     setSearchTerm(uni.name);
     setFilteredUnis([]);